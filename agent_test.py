@@ -3,14 +3,45 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import io
+import json
+import math
+import multiprocessing
+import pickle
+import random
+import time
+import timeit
 import unittest
 
 import isolation
+import isolation.batch
 import game_agent
+import tournament
+
+from sample_players import improved_score, improved_score_batch, center_score, center_score_batch
 
 from importlib import reload
 
 
+def play_opening(player, opponent="Player2", moves=((3, 3), (2, 4)), board_cls=isolation.Board):
+    """Return a 7x7 board between `player` and `opponent` after the opening `moves`. """
+    game = board_cls(player, opponent)
+    for move in moves:
+        game.apply_move(move)
+    return game
+
+
+def random_opening(seed, plies=4):
+    """Return `plies` random opening moves drawn from a generator seeded with `seed`. """
+    rng = random.Random(seed)
+    game = isolation.Board("Player1", "Player2")
+    moves = []
+    for _ in range(plies):
+        moves.append(rng.choice(game.get_legal_moves()))
+        game.apply_move(moves[-1])
+    return moves
+
+
 class IsolationTest(unittest.TestCase):
     """Unit tests for isolation agents"""
 
@@ -75,5 +106,840 @@ class IsolationTest(unittest.TestCase):
         return next_move
 
 
+class RootOrderTest(unittest.TestCase):
+    """Randomization of the move order is only applied at the search root"""
+
+    def test_randomize_root(self):
+        game_agent.random.seed(0)
+        orders = set()
+        for _ in range(10):
+            player = game_agent.MinimaxPlayer(1, lambda g, p: 0., randomize_root=True)
+            game = play_opening(player, moves=((3, 3), (0, 0)))
+            orders.add(player.get_move(game, lambda: 1e3))
+        self.assertGreater(len(orders), 1)
+
+    def test_deterministic_by_default(self):
+        moves = set()
+        for _ in range(5):
+            player = game_agent.MinimaxPlayer(1, lambda g, p: 0.)
+            game = play_opening(player, moves=((3, 3), (0, 0)))
+            moves.add(player.get_move(game, lambda: 1e3))
+        self.assertEqual(len(moves), 1)
+
+
+class InPlaceSearchTest(unittest.TestCase):
+    """Searching with apply_move/undo_move must match the copy-based search"""
+
+    opening = ((3, 3), (2, 4), (1, 4), (4, 5), (2, 2))
+
+    def test_same_result_as_forecast_search(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for apply_alphabeta in (False, True):
+                results = []
+                for in_place in (False, True):
+                    player = game_agent.AlphaBetaPlayer(4, improved_score, in_place=in_place)
+                    player.time_left = lambda: 1e3
+                    game = play_opening(player, moves=self.opening, board_cls=board_cls)
+                    before = game.to_string()
+                    results.append(player.minimax_with_score(game, 4, apply_alphabeta=apply_alphabeta))
+                    self.assertEqual(game.to_string(), before)
+                self.assertEqual(results[0], results[1])
+
+    def test_board_restored_after_timeout(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, in_place=True)
+        game = play_opening(player, moves=self.opening)
+        before = game.to_string()
+        calls = []
+
+        def time_left():
+            calls.append(1)
+            return 1e3 if len(calls) < 500 else 0
+
+        move = player.get_move(game, time_left)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(game.to_string(), before)
+        self.assertEqual(game.move_count, 5)
+
+
+class TranspositionTableTest(unittest.TestCase):
+    """Replacement policy, counters and search integration of the table"""
+
+    def test_replacement_policy(self):
+        table = game_agent.TranspositionTable(size_mb=0)
+        self.assertEqual(table.size, 1)
+        table.store(11, 5, 1., game_agent.EXACT, (0, 0))
+        table.store(12, 2, 2., game_agent.EXACT, (0, 1))
+        self.assertEqual(table.probe(11)[1:], (5, 1., game_agent.EXACT, (0, 0)))
+        self.assertEqual(table.probe(12)[1:], (2, 2., game_agent.EXACT, (0, 1)))
+        table.store(13, 3, 3., game_agent.LOWER_BOUND, (0, 2))
+        self.assertIsNone(table.probe(12))
+        table.store(14, 6, 4., game_agent.UPPER_BOUND, (0, 3))
+        self.assertIsNone(table.probe(11))
+        self.assertEqual(table.probe(14)[2], 4.)
+        self.assertEqual(table.stats(), {"hits": 3, "misses": 2, "collisions": 2})
+
+    def test_aging(self):
+        table = game_agent.TranspositionTable(size_mb=0)
+        table.store(11, 5, 1., game_agent.EXACT, (0, 0))
+        table.store(12, 2, 2., game_agent.EXACT, (0, 1))
+        table.age()
+        self.assertEqual(table.probe(11)[1:], (5, 1., game_agent.EXACT, (0, 0)))
+        table.store(13, 1, 3., game_agent.EXACT, (0, 2))
+        self.assertEqual(table.probe(13)[1], 1)
+        self.assertEqual(table.probe(12)[1], 2)
+        self.assertIsNone(table.probe(11))
+        table.store(14, 0, 4., game_agent.EXACT, (0, 3))
+        self.assertEqual(table.probe(13)[1], 1)
+        self.assertIsNone(table.probe(12))
+        table.clear()
+        self.assertEqual(table.generation, 0)
+
+    def test_same_score_as_plain_search(self):
+        for apply_alphabeta in (False, True):
+            scores = []
+            for tt_size_mb in (0, 1):
+                player = game_agent.AlphaBetaPlayer(score_fn=improved_score, in_place=True, tt_size_mb=tt_size_mb)
+                player.time_left = lambda: 1e3
+                game = play_opening(player, moves=((3, 3), (2, 4), (1, 4), (4, 5)))
+                scores.append(player.minimax_with_score(game, 5, apply_alphabeta=apply_alphabeta)[0])
+            self.assertEqual(scores[0], scores[1])
+
+    def test_get_move_with_table(self):
+        player = game_agent.AlphaBetaPlayer(search_depth=5, score_fn=improved_score, tt_size_mb=1)
+        game = play_opening(player)
+        self.assertIn(player.get_move(game, lambda: 1e3), game.get_legal_moves())
+        self.assertGreater(player.tt.hits, 0)
+
+
+class MoveOrdererTest(unittest.TestCase):
+    """Killer moves, history heuristic and root move re-sorting"""
+
+    def test_order(self):
+        orderer = game_agent.MoveOrderer(killer_slots=2)
+        moves = [(0, 0), (0, 1), (0, 2), (0, 3), (0, 4)]
+        self.assertEqual(orderer.order(moves, 3), moves)
+        orderer.record_cutoff((0, 4), 3, 2, 1)
+        orderer.record_cutoff((0, 3), 3, 1, 0)
+        orderer.record_cutoff((0, 2), 5, 3, 0)
+        self.assertEqual(orderer.order(moves, 3), [(0, 3), (0, 4), (0, 2), (0, 0), (0, 1)])
+        self.assertEqual(orderer.order(moves, 3, tt_move=(0, 1)), [(0, 1), (0, 3), (0, 4), (0, 2), (0, 0)])
+        self.assertEqual(orderer.order(moves, 5), [(0, 2), (0, 4), (0, 3), (0, 0), (0, 1)])
+        self.assertAlmostEqual(orderer.first_move_cutoff_rate, 2 / 3.)
+        orderer.new_search()
+        self.assertEqual(orderer.order(moves, 3), moves)
+
+    def test_age(self):
+        orderer = game_agent.MoveOrderer()
+        moves = [(0, 0), (0, 1), (0, 2), (0, 3)]
+        orderer.record_cutoff((0, 3), 3, 2, 0)
+        orderer.record_cutoff((0, 2), 4, 3, 0)
+        orderer.record_cutoff((0, 1), 1, 1, 0)
+        orderer.age(2)
+        self.assertEqual(orderer.order(moves, 1), [(0, 3), (0, 2), (0, 0), (0, 1)])
+        self.assertEqual(orderer.order(moves, 2), [(0, 2), (0, 3), (0, 0), (0, 1)])
+        self.assertEqual(orderer._history, {(0, 3): 2., (0, 2): 4.5})
+
+    def test_same_score_as_plain_search(self):
+        scores = []
+        for move_orderer in (None, game_agent.MoveOrderer()):
+            player = game_agent.AlphaBetaPlayer(score_fn=improved_score, in_place=True, move_orderer=move_orderer)
+            player.time_left = lambda: 1e3
+            game = play_opening(player, moves=((3, 3), (2, 4), (1, 5), (0, 2)))
+            scores.append(player.minimax_with_score(game, 5, apply_alphabeta=True)[0])
+        self.assertEqual(scores[0], scores[1])
+        self.assertGreater(move_orderer.cutoffs, 0)
+
+    def test_get_move_reports_cutoff_rate(self):
+        orderer = game_agent.MoveOrderer()
+        player = game_agent.AlphaBetaPlayer(search_depth=6, score_fn=improved_score, move_orderer=orderer)
+        game = play_opening(player)
+        self.assertIn(player.get_move(game, lambda: 1e3), game.get_legal_moves())
+        self.assertGreater(orderer.first_move_cutoff_rate, 0.5)
+
+
+class PrincipalVariationSearchTest(unittest.TestCase):
+    """PVS and aspiration windows must not change the search result"""
+
+    opening = ((3, 3), (2, 4), (1, 5), (0, 2))
+
+    def test_pvs_same_score(self):
+        for depth in range(1, 7):
+            scores = []
+            for pvs in (False, True):
+                player = game_agent.AlphaBetaPlayer(score_fn=improved_score, in_place=True,
+                                                    move_orderer=game_agent.MoveOrderer(), pvs=pvs)
+                player.time_left = lambda: 1e3
+                game = play_opening(player, moves=self.opening)
+                scores.append(player.minimax_with_score(game, depth, apply_alphabeta=True)[0])
+            self.assertEqual(scores[0], scores[1])
+
+    def test_aspiration_same_score(self):
+        for window in (0.01, 0.5, 4):
+            scores = []
+            for options in ({}, {"aspiration_window": window, "pvs": True}):
+                player = game_agent.AlphaBetaPlayer(search_depth=6, score_fn=improved_score, **options)
+                game = play_opening(player, moves=self.opening)
+                self.assertIn(player.get_move(game, lambda: 1e3), game.get_legal_moves())
+                self.assertEqual(player.completed_depth, 6)
+                scores.append(player.search_score)
+            self.assertEqual(scores[0], scores[1])
+
+    def test_null_window_search(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, pvs=True)
+        player.time_left = lambda: 1e3
+        game = play_opening(player, moves=self.opening)
+        exact, _ = player.minimax_with_score(game, 3, apply_alphabeta=True)
+        self.assertEqual(player.null_window_search(game, 3, exact - 1, exact + 1, False, 1), exact)
+        self.assertGreaterEqual(player.null_window_search(game, 3, -math.inf, exact - 1, False, 1), exact - 1)
+        self.assertLessEqual(player.null_window_search(game, 3, exact + 1, math.inf, True, 1), exact + 1)
+
+    def test_nextafter_fallback(self):
+        for value in (0., 1., -1., 0.25, -1e300, 5e-324, math.inf, -math.inf):
+            up, down = game_agent._nextafter(value, math.inf), game_agent._nextafter(value, -math.inf)
+            self.assertTrue(up > value or up == value == math.inf)
+            self.assertTrue(down < value or down == value == -math.inf)
+            if hasattr(math, "nextafter"):
+                self.assertEqual((up, down), (math.nextafter(value, math.inf), math.nextafter(value, -math.inf)))
+
+
+class SearchStatsTest(unittest.TestCase):
+
+    def test_record_per_move(self):
+        player = game_agent.AlphaBetaPlayer(search_depth=4, score_fn=improved_score, name="AB")
+        game = play_opening(player)
+        move = player.get_move(game, lambda: 1e3)
+        record = player.stats.last
+        self.assertEqual(len(player.stats.records), 1)
+        self.assertEqual(record["player"], "AB")
+        self.assertEqual(record["move_number"], 2)
+        self.assertEqual(tuple(record["move"]), move)
+        self.assertEqual(record["nodes"], player.nodes)
+        self.assertEqual(record["leaf_evaluations"], player.leaf_evaluations)
+        self.assertGreater(player.leaf_evaluations, 0)
+        self.assertLess(player.leaf_evaluations, player.nodes)
+        self.assertEqual(record["completed_depth"], 4)
+        self.assertEqual([it["depth"] for it in record["iterations"]], [1, 2, 3, 4])
+        self.assertEqual(sum(it["nodes"] for it in record["iterations"]), player.nodes)
+        self.assertEqual(record["effective_branching_factor"],
+                         record["iterations"][-1]["nodes"] / record["iterations"][-2]["nodes"])
+        self.assertFalse(record["timed_out"])
+
+    def test_node_count_matches_tree_size(self):
+        # Plain minimax visits the full tree of every iterative deepening depth
+        from isolation.benchmark import count_nodes
+        player = game_agent.MinimaxPlayer(search_depth=3, score_fn=improved_score)
+        game = play_opening(player)
+        player.get_move(game, lambda: 1e3)
+        self.assertEqual(player.nodes, sum(count_nodes(game, depth) for depth in (1, 2, 3)))
+
+    def test_timeout_and_history(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, stats_records=2)
+        game = play_opening(player)
+        for _ in range(3):
+            player.get_move(game, lambda: player.TIMER_THRESHOLD - 1)
+        self.assertEqual(len(player.stats.records), 2)
+        self.assertTrue(player.stats.last["timed_out"])
+        self.assertEqual(player.stats.last["iterations"], [])
+        self.assertIsNone(player.stats.last["effective_branching_factor"])
+
+    def test_write_jsonl(self):
+        player = game_agent.AlphaBetaPlayer(search_depth=3, score_fn=improved_score)
+        game = play_opening(player)
+        player.get_move(game, lambda: 1e3)
+        player.get_move(game.forecast_move((1, 5)).forecast_move((0, 2)), lambda: 1e3)
+        output = io.StringIO()
+        player.stats.write_jsonl(output)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(lines, [json.loads(json.dumps(record)) for record in player.stats.records])
+        self.assertEqual(player.stats.summary()["moves"], 2)
+
+    def test_disabled(self):
+        player = game_agent.AlphaBetaPlayer(search_depth=2, score_fn=improved_score, stats_records=0)
+        game = play_opening(player)
+        player.get_move(game, lambda: 1e3)
+        self.assertIsNone(player.stats)
+        self.assertGreater(player.nodes, 0)
+
+
+class BatchEvaluationTest(unittest.TestCase):
+
+    opening = ((3, 3), (2, 4), (1, 5), (0, 2))
+
+    def search(self, score_fn, depth):
+        player = game_agent.AlphaBetaPlayer(search_depth=depth, score_fn=score_fn, in_place=True,
+                                            move_orderer=game_agent.MoveOrderer())
+        game = play_opening(player, moves=self.opening)
+        move = player.get_move(game, lambda: 1e3)
+        return move, player.search_score
+
+    def test_batch_protocol(self):
+        # A pure Python batch function exercises the frontier path without NumPy
+        calls = []
+
+        def score_batch(game, moves, player):
+            calls.append(len(moves))
+            return [improved_score(game.forecast_move(move), player) for move in moves]
+
+        batch_score = game_agent.BatchScore(improved_score, score_batch)
+        self.assertEqual(batch_score.__name__, "improved_score")
+        for depth in (1, 3, 5):
+            self.assertEqual(self.search(batch_score, depth), self.search(improved_score, depth))
+        self.assertTrue(calls)
+
+    @unittest.skipIf(isolation.batch.np is None, "NumPy is not installed")
+    def test_batch_scores_match(self):
+        rng = random.Random(0)
+        pairs = [(improved_score, improved_score_batch), (center_score, center_score_batch),
+                 (game_agent.custom_score, game_agent.custom_score_batch)]
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            game = board_cls("Player1", "Player2")
+            for _ in range(2):
+                game.apply_move(rng.choice(game.get_legal_moves()))
+            while game.get_legal_moves():
+                moves = game.get_legal_moves()
+                for score_fn, score_batch in pairs:
+                    for player in ("Player1", "Player2"):
+                        expected = [score_fn(game.forecast_move(move), player) for move in moves]
+                        for actual, value in zip(score_batch(game, moves, player), expected):
+                            if math.isinf(value):
+                                self.assertEqual(actual, value)
+                            else:
+                                self.assertAlmostEqual(actual, value, places=12)
+                game.apply_move(rng.choice(moves))
+
+    @unittest.skipIf(isolation.batch.np is None, "NumPy is not installed")
+    def test_batch_search(self):
+        for score_fn, score_batch in [(improved_score, improved_score_batch),
+                                      (game_agent.custom_score, game_agent.custom_score_batch)]:
+            batch_score = game_agent.BatchScore(score_fn, score_batch)
+            for depth in (1, 4):
+                self.assertEqual(self.search(batch_score, depth), self.search(score_fn, depth))
+
+    def test_batch_with_endgame_solver(self):
+        # The children that the solver scores exactly must not get a batch score
+        def score_batch(game, moves, player):
+            return [improved_score(game.forecast_move(move), player) for move in moves]
+
+        rng = random.Random(0)
+        for _ in range(4):
+            game = isolation.Board("Player1", "Player2")
+            while game.get_legal_moves():
+                if game.move_count >= 12:
+                    scores = []
+                    for score_fn in (improved_score, game_agent.BatchScore(improved_score, score_batch)):
+                        player = game_agent.AlphaBetaPlayer(score_fn=score_fn,
+                                                            endgame_solver=game_agent.EndgameSolver())
+                        player.time_left = lambda: 1e3
+                        position = game.copy()
+                        position.replace_player(position.active_player, player)
+                        scores.append(player.minimax_with_score(position, 3, apply_alphabeta=True))
+                    self.assertEqual(scores[0], scores[1])
+                game.apply_move(rng.choice(game.get_legal_moves()))
+
+    @unittest.skipIf(isolation.batch.np is not None, "NumPy is installed")
+    def test_requires_numpy(self):
+        game = play_opening("Player1", moves=self.opening)
+        self.assertRaises(RuntimeError, improved_score_batch, game, game.get_legal_moves(), "Player1")
+
+
+class TimeManagerTest(unittest.TestCase):
+
+    def test_predict(self):
+        manager = game_agent.TimeManager()
+        # Iterations of 1, 2 and 6 ms: the next one grows by the larger of the last two ratios
+        iterations = [(0, 0, 0.), (1, 10, 0.001), (2, 50, 0.003), (3, 300, 0.009)]
+        self.assertAlmostEqual(manager.predict(iterations), 18.)
+        self.assertAlmostEqual(manager.predict(iterations[:2]), 5.)
+        # Iterations too short to be timed fall back to the node counts
+        self.assertAlmostEqual(manager.predict([(0, 0, 0.), (1, 10, 0.), (2, 50, 0.), (3, 250, 0.002)]), 10.)
+
+    def test_should_stop(self):
+        manager = game_agent.TimeManager(stable_iterations=3)
+        iterations = [(0, 0, 0.), (1, 10, 0.001), (2, 50, 0.003)]
+        self.assertFalse(manager.should_stop(iterations, 2, 10.))
+        self.assertTrue(manager.should_stop(iterations, 2, 3.))
+        self.assertTrue(manager.should_stop(iterations, 3, 10.))
+        self.assertEqual((manager.skipped, manager.stable_stops), (1, 1))
+
+    def search(self, manager, time_left):
+        player = game_agent.AlphaBetaPlayer(search_depth=8, score_fn=improved_score, in_place=True,
+                                            time_manager=manager)
+        game = play_opening(player)
+        move = player.get_move(game, time_left)
+        self.assertIn(move, game.get_legal_moves())
+        return player
+
+    def test_stable_move_stops_search(self):
+        manager = game_agent.TimeManager(stable_iterations=2)
+        player = self.search(manager, lambda: 1e6)
+        self.assertEqual(manager.stable_stops, 1)
+        self.assertLess(player.completed_depth, 8)
+        self.assertFalse(player.stats.last["timed_out"])
+
+    def test_skipped_iteration(self):
+        # With no time to spare, only the first iteration is searched and it is not thrown away
+        manager = game_agent.TimeManager()
+        player = self.search(manager, lambda: 10.001)
+        self.assertEqual((manager.skipped, player.completed_depth), (1, 1))
+        self.assertFalse(player.stats.last["timed_out"])
+
+
+class DeadlineTest(unittest.TestCase):
+
+    def test_clock_read_every_n_nodes(self):
+        results = []
+        for margin in (None, 5.):
+            calls = []
+
+            def time_left():
+                calls.append(None)
+                return 1e6
+
+            player = game_agent.AlphaBetaPlayer(search_depth=5, score_fn=improved_score, in_place=True,
+                                                deadline_margin=margin)
+            game = play_opening(player)
+            results.append((player.get_move(game, time_left), player.search_score, player.nodes))
+            if margin is None:
+                self.assertGreaterEqual(len(calls), player.nodes)
+            else:
+                self.assertLess(len(calls), player.nodes / 10)
+        self.assertEqual(results[0], results[1])
+
+    def test_timeout(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, deadline_margin=5.)
+        game = isolation.Board(player, "Player2")
+        move = player.get_move(game, lambda: 5.)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertTrue(player.stats.last["timed_out"])
+
+    def test_no_timeouts_under_tournament_time_limit(self):
+        for seed in range(3):
+            players = [game_agent.AlphaBetaPlayer(score_fn=score_fn, in_place=True, deadline_margin=2.)
+                       for score_fn in (improved_score, game_agent.custom_score)]
+            game = isolation.Board(*players)
+            rng = random.Random(seed)
+            for _ in range(2):
+                game.apply_move(rng.choice(game.get_legal_moves()))
+            _, _, outcome = game.play(time_limit=tournament.TIME_LIMIT)
+            self.assertNotEqual(outcome, "timeout")
+
+
+def search_endgames(player, count, seed=0):
+    """Let `player` search `count` random positions where the players are
+    separated, which fills the memo of its endgame solver.
+    """
+    rng = random.Random(seed)
+    searched = 0
+    while searched < count:
+        game = isolation.Board(player, "Player2")
+        while game.get_legal_moves():
+            if (game.move_count >= 2 and game.active_player == player and
+                    player.endgame_solver.regions(game) is not None):
+                player.get_move(game, lambda: 1e3)
+                searched += 1
+                break
+            game.apply_move(rng.choice(game.get_legal_moves()))
+
+
+class ParallelSearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.player = game_agent.AlphaBetaPlayer(score_fn=improved_score, in_place=True,
+                                                 move_orderer=game_agent.MoveOrderer(), parallel_workers=2,
+                                                 parallel_min_depth=2)
+
+    def tearDown(self):
+        self.player.close()
+
+    def test_scores_match_serial_search(self):
+        serial = game_agent.AlphaBetaPlayer(score_fn=improved_score, in_place=True)
+        serial.time_left = self.player.time_left = lambda: float("inf")
+        for seed in range(3):
+            for depth in (2, 4):
+                game = play_opening(self.player, moves=random_opening(seed))
+                move = self.player.search(game, depth)
+                self.assertIn(move, game.get_legal_moves())
+                serial.alphabeta(play_opening(serial, moves=random_opening(seed)), depth)
+                self.assertEqual(self.player.search_score, serial.search_score)
+                # The chosen move must reach the score, not only tie it with an upper bound
+                child = play_opening(serial, moves=random_opening(seed)).forecast_move(move)
+                self.assertEqual(serial.minimax_with_score(child, depth - 1)[0], serial.search_score)
+        self.assertIsNotNone(self.player._pool)
+
+    def test_worker_reports_bounds(self):
+        self.player.time_left = lambda: float("inf")
+        game = play_opening(self.player, moves=random_opening(2))
+        child = game.forecast_move(game.get_legal_moves()[0])
+        payload = game_agent._search_payload(child, self.player)
+        task = (payload, 4, timeit.default_timer() + 60, 1)
+        game_agent._init_search_worker(multiprocessing.Value("d", float("-inf")))
+        score, exact, variation, _, _ = game_agent._search_root_move(task)
+        self.assertTrue(exact)
+        self.assertEqual(score, self.player.minimax_with_score(child, 3, apply_alphabeta=False)[0])
+        self.assertEqual(len(variation), 3)
+        for move in variation:
+            self.assertTrue(child.move_is_legal(move))
+            child.apply_move(move)
+        # A child that cannot beat the shared score only gets an upper bound
+        game_agent._init_search_worker(multiprocessing.Value("d", score))
+        bound, exact, variation, _, _ = game_agent._search_root_move(task)
+        self.assertFalse(exact)
+        self.assertLessEqual(bound, score)
+        self.assertEqual(variation, [])
+
+    def test_deadline(self):
+        game = play_opening(self.player, moves=random_opening(0))
+        start = timeit.default_timer()
+        move = self.player.get_move(game, lambda: 100 - 1000 * (timeit.default_timer() - start))
+        self.assertIn(move, game.get_legal_moves())
+        self.assertLess(1000 * (timeit.default_timer() - start), 100)
+        self.assertTrue(self.player.stats.last["timed_out"])
+
+    def test_play_against_other_players(self):
+        # The opponent holds the clock of Board.play, which cannot be pickled
+        self.player.search_depth = 3
+        opponent = game_agent.MCTSPlayer(max_playouts=50)
+        game = isolation.Board(self.player, opponent)
+        winner, history, outcome = game.play(time_limit=float("inf"))
+        self.assertIn(winner, (self.player, opponent))
+        self.assertEqual(outcome, "illegal move")
+        self.assertGreater(self.player.nodes, 0)
+
+    def test_payload_without_search_state(self):
+        self.player.endgame_solver = game_agent.EndgameSolver(max_blanks=49, max_region=30)
+        search_endgames(self.player, 5)
+        memo, history = self.player.endgame_solver._memo, dict(self.player.move_orderer._history)
+        self.assertGreater(len(memo), 1000)
+        game = play_opening(self.player, moves=random_opening(0))
+        self.assertLess(len(game_agent._search_payload(game, self.player)), 10000)
+        self.assertIs(self.player.endgame_solver._memo, memo)
+        self.assertEqual(self.player.move_orderer._history, history)
+
+    def test_player_is_picklable(self):
+        self.player.time_left = lambda: float("inf")
+        self.player.search(play_opening(self.player, moves=random_opening(1)), 2)
+        copy = pickle.loads(pickle.dumps(self.player))
+        self.assertIsNone(copy._pool)
+        self.assertEqual(copy.parallel_workers, 2)
+
+
+class PonderTest(unittest.TestCase):
+    """Fixed-depth players, so that the results do not depend on timing"""
+
+    def setUp(self):
+        self.player = game_agent.AlphaBetaPlayer(search_depth=3, score_fn=improved_score, in_place=True)
+
+    def tearDown(self):
+        self.player.close()
+
+    def ponder(self, hit):
+        """Ponder after the player's move until the pondering search is
+        complete, then let the opponent play the predicted reply if `hit` or
+        else another move.
+        """
+        game = play_opening(self.player, moves=((3, 3), (2, 4), (1, 5)))
+        self.player.start_ponder(game.copy())
+        self.assertTrue(self.player._ponderer._conn.poll(60))
+        replies = [move for move in game.get_legal_moves() if move != self.player.ponder_move]
+        game.apply_move(self.player.ponder_move if hit else replies[0])
+        self.player.stop_ponder()
+        return game
+
+    def test_ponder_hit(self):
+        game = self.ponder(hit=True)
+        # Without time left, only the pondering result is available
+        move = self.player.get_move(game, lambda: 0.)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual((self.player.ponder_hits, self.player.ponder_misses), (1, 0))
+        self.assertEqual(self.player.completed_depth, 3)
+
+    def test_ponder_miss(self):
+        game = self.ponder(hit=False)
+        self.player.get_move(game, lambda: 0.)
+        self.assertEqual((self.player.ponder_hits, self.player.ponder_misses), (0, 1))
+        self.assertEqual(self.player.completed_depth, 0)
+
+    def test_payload_size(self):
+        class RecordingPonderer:
+            busy = False
+
+            def __init__(self):
+                self.payloads = []
+
+            def start(self, payload):
+                self.payloads.append(payload)
+
+            def close(self):
+                pass
+
+        self.player.endgame_solver = game_agent.EndgameSolver(max_blanks=49, max_region=30)
+        search_endgames(self.player, 5)
+        self.assertGreater(len(self.player.endgame_solver._memo), 1000)
+        self.player._ponderer = RecordingPonderer()
+        game = play_opening(self.player, moves=((3, 3), (2, 4), (1, 5)))
+        self.player.start_ponder(game)
+        self.assertEqual(len(self.player._ponderer.payloads), 1)
+        self.assertLess(len(self.player._ponderer.payloads[0]), 10000)
+
+    def test_prediction_keeps_search_state(self):
+        self.player = game_agent.AlphaBetaPlayer(search_depth=3, score_fn=improved_score, in_place=True,
+                                                 tt_size_mb=1, move_orderer=game_agent.MoveOrderer())
+        game = play_opening(self.player)
+        self.player.get_move(game, lambda: 1e3)
+        state = (self.player.nodes, self.player.tt.stats(), dict(self.player.move_orderer._history))
+        game.apply_move((1, 5))
+        self.player.start_ponder(game)
+        self.assertEqual((self.player.nodes, self.player.tt.stats(), self.player.move_orderer._history), state)
+
+    def test_play_with_pondering(self):
+        random.seed(0)
+        opponent = game_agent.AlphaBetaPlayer(search_depth=3, score_fn=improved_score, in_place=True)
+        game = isolation.Board(self.player, opponent)
+        for move in ((3, 3), (2, 4)):
+            game.apply_move(move)
+        _, history, outcome = game.play(time_limit=float("inf"), ponder=True)
+        self.assertEqual(outcome, "illegal move")
+        self.assertGreater(self.player.ponder_hits + self.player.ponder_misses, 0)
+        # The background processes stop at the end of the game
+        self.assertIsNone(self.player._ponderer)
+        self.assertIsNone(opponent._ponderer)
+
+    def test_ponder_against_other_players(self):
+        # The opponent holds the clock of Board.play, which cannot be pickled
+        opponent = game_agent.MCTSPlayer(max_playouts=50)
+        game = isolation.Board(self.player, opponent)
+        _, _, outcome = game.play(time_limit=float("inf"), ponder=True)
+        self.assertEqual(outcome, "illegal move")
+        self.assertGreater(self.player.ponder_hits + self.player.ponder_misses, 0)
+
+
+class PersistentStateTest(unittest.TestCase):
+    """Search state kept between the moves of a game"""
+
+    def setUp(self):
+        self.player = game_agent.AlphaBetaPlayer(search_depth=4, score_fn=improved_score, in_place=True,
+                                                 tt_size_mb=1, move_orderer=game_agent.MoveOrderer(),
+                                                 persistent_state=True)
+        self.game = play_opening(self.player)
+
+    def test_state_kept_within_a_game(self):
+        key = self.game.hash()
+        self.player.get_move(self.game, lambda: 1e3)
+        self.assertEqual(self.game.hash(), key)
+        pv = self.player.principal_variation
+        self.assertEqual(len(pv), 4)
+        for move in pv[:2]:
+            self.game.apply_move(move)
+
+        hits = self.player.tt.hits
+        self.assertEqual(self.player.get_move(self.game, lambda: 1e3), self.player.principal_variation[0])
+        self.assertEqual(self.player.tt.generation, 1)
+        self.assertGreater(self.player.tt.hits, hits)
+
+        # Entries of the previous search cut the new one short
+        fresh = game_agent.AlphaBetaPlayer(search_depth=4, score_fn=improved_score, in_place=True, tt_size_mb=1,
+                                           move_orderer=game_agent.MoveOrderer())
+        fresh.get_move(self.game, lambda: 1e3)
+        self.assertLess(self.player.nodes, fresh.nodes)
+
+    def test_predicted_move_searched_first(self):
+        self.player.get_move(self.game, lambda: 1e3)
+        pv = self.player.principal_variation
+        for move in pv[:2]:
+            self.game.apply_move(move)
+        self.player.search_depth = 0
+        self.assertEqual(self.player.get_move(self.game, lambda: 1e3), pv[2])
+
+    def test_parallel_search(self):
+        self.player.parallel_workers = 2
+        self.player.parallel_min_depth = 2
+        self.addCleanup(self.player.close)
+        for seed in range(3):
+            game = play_opening(self.player, moves=random_opening(seed))
+            move = self.player.get_move(game, lambda: 1e3)
+            pv = self.player.principal_variation
+            self.assertEqual(len(pv), 4)
+            self.assertEqual(pv[0], move)
+            self.assertIsNotNone(self.player._expected_root)
+
+    def test_reset_on_new_game(self):
+        self.player.get_move(self.game, lambda: 1e3)
+        self.player.get_move(self.game.copy(), lambda: 1e3)
+        self.assertEqual(self.player.tt.generation, 1)
+        self.player.get_move(isolation.Board(self.player, "Player2"), lambda: 1e3)
+        self.assertEqual(self.player.tt.generation, 0)
+
+        self.player.persistent_state = False
+        self.player.get_move(self.game, lambda: 1e3)
+        self.player.get_move(self.game, lambda: 1e3)
+        self.assertEqual(self.player.tt.generation, 0)
+
+
+class EndgameSolverTest(unittest.TestCase):
+
+    def separated_positions(self, count, seed=0, width=5, height=5):
+        """Random positions where the players are separated and can still move. """
+        rng = random.Random(seed)
+        solver = game_agent.EndgameSolver(max_blanks=width * height)
+        positions = []
+        while len(positions) < count:
+            game = isolation.Board("Player1", "Player2", width, height)
+            while game.get_legal_moves():
+                if game.move_count >= 2 and solver.regions(game) is not None:
+                    positions.append(game)
+                    break
+                game = game.forecast_move(rng.choice(game.get_legal_moves()))
+        return positions
+
+    def register(self, game, player):
+        """Replace the active player of `game` by `player`. """
+        if game.active_player == game._player_1:
+            game._player_1 = player
+        else:
+            game._player_2 = player
+        game._active_player = player
+        return game
+
+    def active_player_wins(self, game):
+        # Exhaustive search of the real two player game
+        return any(not self.active_player_wins(game.forecast_move(move)) for move in game.get_legal_moves())
+
+    def longest_path(self, game, player):
+        # Brute force longest path of a player moving alone
+        location = game.get_player_location(player)
+        best = 0
+        for move in game.get_legal_moves(player):
+            child = game.copy()
+            child._board_state[move[0] + move[1] * game.height] = 1
+            if player == child._player_1:
+                child._board_state[-1] = move[0] + move[1] * game.height
+            else:
+                child._board_state[-2] = move[0] + move[1] * game.height
+            best = max(best, 1 + self.longest_path(child, player))
+        self.assertIsNotNone(location)
+        return best
+
+    def test_longest_path(self):
+        solver = game_agent.EndgameSolver(max_blanks=25)
+        for game in self.separated_positions(30):
+            regions = solver.regions(game)
+            for player, region in zip((game.active_player, game.inactive_player), regions):
+                row, col = game.get_player_location(player)
+                self.assertEqual(solver.longest_path(game, region, row + col * game.height),
+                                 self.longest_path(game, player))
+
+    def test_solve_matches_game_tree(self):
+        solver = game_agent.EndgameSolver(max_blanks=25)
+        for game in self.separated_positions(30, seed=1):
+            expected = float("inf") if self.active_player_wins(game) else float("-inf")
+            self.assertEqual(solver.solve(game, game.active_player), expected)
+            self.assertEqual(solver.solve(game, game.inactive_player), -expected)
+            score, move = solver.best_move(game)
+            self.assertEqual(score, expected)
+            self.assertIn(move, game.get_legal_moves())
+            if score > 0:
+                self.assertFalse(self.active_player_wins(game.forecast_move(move)))
+
+    def test_not_separated(self):
+        solver = game_agent.EndgameSolver(max_blanks=49)
+        game = isolation.Board("Player1", "Player2")
+        self.assertIsNone(solver.regions(game))
+        game.apply_move((3, 3))
+        game.apply_move((2, 4))
+        self.assertIsNone(solver.solve(game, "Player1"))
+        self.assertIsNone(game_agent.EndgameSolver(max_blanks=10).regions(game))
+
+    def test_player_uses_solver(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, endgame_solver=game_agent.EndgameSolver())
+        game = self.register(self.separated_positions(1, seed=2, width=7, height=7)[0], player)
+        move = player.get_move(game, lambda: 1e3)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertTrue(math.isinf(player.search_score))
+        self.assertEqual(player.completed_depth, 0)
+        self.assertEqual(player.nodes, 0)
+
+    def test_search_uses_exact_scores(self):
+        solver = game_agent.EndgameSolver(max_blanks=25)
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, endgame_solver=solver)
+        player.time_left = lambda: 1e3
+        for game in self.separated_positions(10, seed=3):
+            game = self.register(game, player)
+            expected = float("inf") if self.active_player_wins(game) else float("-inf")
+            self.assertEqual(player.minimax_with_score(game, 2, apply_alphabeta=True)[0], expected)
+        self.assertGreater(solver.solved, 0)
+
+
+
+class MCTSTest(unittest.TestCase):
+
+    def test_anytime_contract(self):
+        random.seed(0)
+        player = game_agent.MCTSPlayer()
+        game = play_opening(player)
+        move = player.get_move(game, lambda: 5.)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(player.playouts, 0)
+
+        # One playout per clock read until the time left falls below the threshold
+        clock = iter(range(1000, 0, -1))
+        move = player.get_move(game, lambda: next(clock))
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(player.playouts, 991)
+        self.assertGreater(player.playouts_per_second(), 0)
+
+    def test_tree_reuse(self):
+        random.seed(0)
+        player = game_agent.MCTSPlayer(max_playouts=500)
+        game = play_opening(player)
+        game.apply_move(player.get_move(game, lambda: 1e3))
+        self.assertEqual(player.reused_visits, 0)
+        game.apply_move(game.get_legal_moves()[0])
+        player.get_move(game, lambda: 1e3)
+        self.assertGreater(player.reused_visits, 0)
+
+        # A different game is searched from scratch
+        player.get_move(play_opening(player), lambda: 1e3)
+        self.assertEqual(player.reused_visits, 0)
+
+    def test_tree_reuse_follows_the_played_order(self):
+        random.seed(0)
+        player = game_agent.MCTSPlayer(max_playouts=2000)
+        game = play_opening(player)
+        move = player.get_move(game, lambda: 1e3)
+        root = player._root
+        node = next(child for child in root.children if child.move == move)
+        # An opponent reply to a cell that the player could also have moved to
+        root_moves = [child.move for child in root.children]
+        reply = next(child for child in node.children if child.move in root_moves)
+        # List the root child of that cell first, so that it matches before the move played
+        root.children.sort(key=lambda child: child.move != reply.move)
+        visits = reply.visits
+        game.apply_move(move)
+        game.apply_move(reply.move)
+        player.get_move(game, lambda: 1e3)
+        self.assertEqual(player.reused_visits, visits)
+        self.assertGreater(visits, 0)
+
+    def test_finds_winning_moves(self):
+        # Endgame positions on a 4x4 board where some moves win and others lose
+        def wins(game):
+            return any(not wins(game.forecast_move(move)) for move in game.get_legal_moves())
+
+        rng = random.Random(1)
+        random.seed(1)
+        checked = 0
+        while checked < 5:
+            player = game_agent.MCTSPlayer(max_playouts=2000, reuse_tree=False)
+            game = isolation.Board(player, "Player2", 4, 4)
+            while game.get_legal_moves() and game.move_count < 6:
+                game.apply_move(rng.choice(game.get_legal_moves()))
+            if game.active_player != player:
+                continue
+            winning = [move for move in game.get_legal_moves() if not wins(game.forecast_move(move))]
+            if not winning or len(winning) == len(game.get_legal_moves()):
+                continue
+            self.assertIn(player.get_move(game, lambda: 1e3), winning)
+            checked += 1
+
 if __name__ == '__main__':
     unittest.main()
@@ -2,6 +2,40 @@
 test your agent's strength against a set of known agents using tournament.py
 and include the results in your report.
 """
+import json
+import math
+import multiprocessing
+import pickle
+import random
+import struct
+import timeit
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from isolation import extract_features, knight_tables, popcount
+from isolation.batch import child_features
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _nextafter(value, toward):
+    """Return the next float after `value` in the direction of `toward`, like
+    math.nextafter (which is new in Python 3.9).
+    """
+    if value == toward or value != value:
+        return toward
+    if value == 0.:
+        return math.copysign(5e-324, toward)
+    bits, = struct.unpack("<q", struct.pack("<d", value))
+    bits += 1 if (value < toward) == (value > 0.) else -1
+    return struct.unpack("<d", struct.pack("<q", bits))[0]
+
+
+nextafter = getattr(math, "nextafter", _nextafter)
 
 
 class SearchTimeout(Exception):
@@ -9,7 +43,7 @@ class SearchTimeout(Exception):
     pass
 
 
-def get_open_moves(game, player):
+def get_open_moves(game, player, features=None):
     """
     :param game : `isolation.Board`
         An instance of `isolation.Board` encoding the current state of the
@@ -17,13 +51,15 @@ def get_open_moves(game, player):
     :param player: object
         A player instance in the current game (i.e., an object corresponding to
         one of the player objects `game.__player_1__` or `game.__player_2__`.)
+    :param features: `isolation.Features` (optional)
+        The features of the game state for the player, extracted if not given.
     :return: (float, float)
         Tuple of player moves and opponent moves, normalised to 0-1 range.
     """
+    if features is None:
+        features = extract_features(game, player)
     max_move = float(8)
-    player_moves = len(game.get_legal_moves(player)) / max_move
-    opponent_moves = len(game.get_legal_moves(game.get_opponent(player))) / max_move
-    return player_moves, opponent_moves
+    return features.player_mobility / max_move, features.opponent_mobility / max_move
 
 
 def get_distance_to_centre(game, player):
@@ -55,12 +91,7 @@ def get_distance_to_blanks(game, player):
         Squared distance to the centre of all blanks in the board, normalised to 0-1 range
     """
     y, x = game.get_player_location(player)
-    blanks = game.get_blank_spaces()
-    sum_move = (0, 0)
-    for blank in blanks:
-        sum_move = (sum_move[0] + blank[0], sum_move[1] + blank[1])
-    blanks_centre_y = float(sum_move[0] / len(blanks))
-    blanks_centre_x = float(sum_move[1] / len(blanks))
+    blanks_centre_y, blanks_centre_x = game.blank_centroid()
     sq_dist_from_blanks = float((y - blanks_centre_y) ** 2 + (x - blanks_centre_x) ** 2)
     return sq_dist_from_blanks / float(game.width**2 + game.height**2)
 
@@ -94,13 +125,7 @@ def get_distance_to_target(game, player):
             Squared distance to the middle point between the opponent and the centre of the board, 
         normalised to 0-1 range
         """
-    blanks = game.get_blank_spaces()
-    sum_move = (0, 0)
-    for blank in blanks:
-        sum_move = (sum_move[0] + blank[0], sum_move[1] + blank[1])
-    blanks_centre_y = float(sum_move[0] / len(blanks))
-    blanks_centre_x = float(sum_move[1] / len(blanks))
-    blank_centre = (blanks_centre_y, blanks_centre_x)
+    blank_centre = game.blank_centroid()
 
     opp_loc = game.get_player_location(game.get_opponent(player))
     player_loc = game.get_player_location(player)
@@ -131,17 +156,14 @@ def custom_score(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    features = extract_features(game, player)
+    if features.utility:
+        return features.utility
 
-    player_moves, opponent_moves = get_open_moves(game, player)
+    player_moves, opponent_moves = get_open_moves(game, player, features)
     dist_from_blanks = get_distance_to_blanks(game, player)
 
-    blank_count = len(game.get_blank_spaces())
-    blank_perc = float(blank_count) / float(game.width * game.height)
+    blank_perc = game.blank_ratio()
     return player_moves - opponent_moves - dist_from_blanks * blank_perc * 0.5
 
 
@@ -167,13 +189,11 @@ def custom_score_2(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    if game.is_loser(player):
-        return float("-inf")
+    features = extract_features(game, player)
+    if features.utility:
+        return features.utility
 
-    if game.is_winner(player):
-        return float("inf")
-
-    player_moves, _ = get_open_moves(game, player)
+    player_moves, _ = get_open_moves(game, player, features)
     dist_to_opp = get_distance_to_opponent(game, player)
 
     return dist_to_opp + player_moves * 5
@@ -203,19 +223,635 @@ def custom_score_3(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
+    features = extract_features(game, player)
+    if features.utility:
+        return features.utility
 
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
-
-    player_moves, _ = get_open_moves(game, player)
+    player_moves, _ = get_open_moves(game, player, features)
     dist_to_target = get_distance_to_target(game, player)
 
     return dist_to_target + player_moves
 
 
+def custom_score_batch(game, moves, player):
+    """Vectorized `custom_score` of every child of `game` reached by one of `moves`, the legal moves of the
+    active player. Requires NumPy.
+
+    :param game: `isolation.Board`
+        The parent position
+    :param moves: list<(int, int)>
+        Legal moves of the active player of `game`
+    :param player: object
+        A player instance in the current game
+    :return: list<float>
+        The `custom_score` of every child, in the order of `moves`
+    """
+    features = child_features(game, moves, player)
+    max_move = float(8)
+    player_moves = features.player_mobility / max_move
+    opponent_moves = features.opponent_mobility / max_move
+    sq_dist_from_blanks = ((features.player_rows - features.blank_rows) ** 2 +
+                           (features.player_cols - features.blank_cols) ** 2)
+    dist_from_blanks = sq_dist_from_blanks / float(game.width**2 + game.height**2)
+    blank_perc = features.blank_count / float(game.width * game.height)
+    scores = player_moves - opponent_moves - dist_from_blanks * blank_perc * 0.5
+    return np.where(features.utility != 0, features.utility, scores).tolist()
+
+
+class BatchScore:
+    """Score function that can also evaluate all the children of a search frontier node in one call.
+
+    Instances are called like any `score_fn(game, player)`. Minimax players detect the `score_batch(game, moves,
+    player)` method, which returns the scores of the children of `game` reached by each of `moves` (the legal
+    moves of the active player) in the order of `moves`, and use it instead of scoring the children one by one
+    at the nodes one ply above the search horizon. Both functions must return the same values, up to floating
+    point rounding.
+
+    :param score_fn: callable
+        The scalar score function, `score_fn(game, player)`
+    :param score_batch: callable
+        The batch score function, `score_batch(game, moves, player)`
+    """
+
+    def __init__(self, score_fn, score_batch):
+        self.score_fn = score_fn
+        self.score_batch = score_batch
+        self.__name__ = getattr(score_fn, "__name__", type(self).__name__)
+
+    def __call__(self, game, player):
+        return self.score_fn(game, player)
+
+
+# Bound types of the scores stored in the transposition table
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+
+class TranspositionTable:
+    """Bounded transposition table keyed on the Zobrist key of a position
+    (`isolation.Board.hash()`).
+
+    Each bucket holds two entries: a depth-preferred slot that only gives way
+    to searches at least as deep, and an always-replace slot that keeps the
+    most recent entry that did not qualify for the first one. An entry is a
+    tuple (key, depth, score, bound, move), with the score measured from the
+    point of view of the player that owns the table.
+
+    Tables kept between searches are aged with `age()`: a depth-preferred
+    entry stored before the last call gives way to any newer entry, so the
+    deep entries of positions that can no longer occur are replaced.
+
+    Parameters
+    ----------
+    size_mb : float
+        Approximate memory budget of the table in megabytes.
+    """
+    # Approximate size in bytes of one stored entry and its slot in the table
+    ENTRY_BYTES = 160
+
+    def __init__(self, size_mb=16.):
+        self.size_mb = size_mb
+        self.size = max(1, int(size_mb * 2 ** 20) // (2 * self.ENTRY_BYTES))
+        self.clear()
+
+    def clear(self):
+        """Remove all entries and reset the counters. """
+        self._depth_preferred = [None] * self.size
+        self._always_replace = [None] * self.size
+        self._generations = [0] * self.size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+
+    def probe(self, key):
+        """Return the entry stored for `key`, or None if there is none.
+
+        A miss on a bucket that holds entries for other positions is also
+        counted as a collision.
+        """
+        idx = key % self.size
+        entry = self._depth_preferred[idx]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        other = self._always_replace[idx]
+        if other is not None and other[0] == key:
+            self.hits += 1
+            return other
+        self.misses += 1
+        if entry is not None or other is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        """Store the result of searching the position `key` to `depth` plies.
+        """
+        idx = key % self.size
+        entry = (key, depth, score, bound, move)
+        current = self._depth_preferred[idx]
+        if (current is None or current[0] == key or depth >= current[1] or
+                self._generations[idx] != self.generation):
+            self._depth_preferred[idx] = entry
+            self._generations[idx] = self.generation
+        else:
+            self._always_replace[idx] = entry
+
+    def age(self):
+        """Start a new search that keeps the entries of the previous ones;
+        their depth-preferred entries can be replaced by any new entry.
+        """
+        self.generation += 1
+
+    def stats(self):
+        """Return the table counters as a dictionary. """
+        return {"hits": self.hits, "misses": self.misses, "collisions": self.collisions}
+
+
+class MoveOrderer:
+    """Move ordering for the minimax players, combining the transposition
+    table move, killer moves and the history heuristic.
+
+    Below the root, moves are explored in this order: the best move stored
+    in the transposition table, the killer moves of the current ply (moves
+    that recently caused a cutoff in a sibling node), then all other moves
+    by decreasing history score. The history score of a destination cell
+    grows by depth ** 2 every time a move to that cell causes a cutoff.
+
+    The root moves are ordered by `MinimaxBasedIsolationPlayer.get_move()`
+    with the scores of the previous iterative deepening iteration.
+
+    Parameters
+    ----------
+    killer_slots : int
+        The number of killer moves remembered per ply.
+    """
+
+    def __init__(self, killer_slots=2):
+        self.killer_slots = killer_slots
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.new_search()
+
+    def new_search(self):
+        """Forget the killer moves and history scores of previous searches. """
+        self._killers = {}
+        self._history = {}
+
+    def age(self, plies, decay=0.5):
+        """Start a new search `plies` plies below the root of the previous
+        one, keeping its killer moves at the plies that are still below the
+        new root and its history scores multiplied by `decay`.
+        """
+        self._killers = {ply - plies: killers for ply, killers in self._killers.items() if ply > plies}
+        self._history = {move: score * decay for move, score in self._history.items() if score * decay >= 1}
+
+    def order(self, moves, ply, tt_move=None):
+        """Return a new list with `moves` in the order they should be explored
+        at a node `ply` plies below the root.
+        """
+        front = []
+        if tt_move is not None and tt_move in moves:
+            front.append(tt_move)
+        for killer in self._killers.get(ply, ()):
+            if killer in moves and killer not in front:
+                front.append(killer)
+        rest = [move for move in moves if move not in front]
+        rest.sort(key=lambda move: self._history.get(move, 0), reverse=True)
+        return front + rest
+
+    def record_cutoff(self, move, ply, depth, index):
+        """Update the killer moves and history scores after `move`, the
+        `index`-th move explored at a node `ply` plies below the root with
+        `depth` plies left, caused a cutoff.
+        """
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        killers = self._killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[self.killer_slots:]
+        self._history[move] = self._history.get(move, 0) + depth * depth
+
+    @property
+    def first_move_cutoff_rate(self):
+        """The fraction of cutoffs that were caused by the first move explored
+        at their node; the closer to 1, the closer alpha-beta gets to the
+        minimal tree.
+        """
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.
+
+    def stats(self):
+        """Return the cutoff counters as a dictionary. """
+        return {"cutoffs": self.cutoffs, "first_move_cutoffs": self.first_move_cutoffs,
+                "first_move_cutoff_rate": self.first_move_cutoff_rate}
+
+
+class EndgameSolver:
+    """Exact solver of the positions where the two players are separated.
+
+    When no open cell can be reached by both players, their moves no longer
+    interact and the game is decided by the longest knight path each player
+    can walk in its own region: the player to move wins if and only if its
+    longest path is strictly longer than the opponent's. The longest paths
+    are found with a depth-first search memoized on (region, position),
+    where the region is the set of open cells reachable from the position.
+
+    Parameters
+    ----------
+    max_blanks : int
+        Only look for a separation when at most this many cells are open;
+        flood fills are too costly to run on every node of the opening.
+
+    max_region : int
+        Only solve regions of at most this many cells, the longest path
+        search being exponential in the region size.
+
+    max_entries : int
+        The memo table is cleared when it grows beyond this many entries.
+    """
+
+    def __init__(self, max_blanks=30, max_region=18, max_entries=1 << 18):
+        self.max_blanks = max_blanks
+        self.max_region = max_region
+        self.max_entries = max_entries
+        self.solved = 0
+        self._memo = {}
+        self._tables = {}
+        self._time_check = None
+        self._calls = 0
+
+    def _masks(self, game):
+        """Return the knight move masks and the cell colour masks of the board size of `game`. """
+        key = (game.width, game.height)
+        tables = self._tables.get(key)
+        if tables is None:
+            neighbors, coords = knight_tables(game.width, game.height)
+            masks = tuple(sum(1 << idx for idx in cell) for cell in neighbors)
+            even = sum(1 << idx for idx, (row, col) in enumerate(coords) if (row + col) % 2 == 0)
+            tables = self._tables[key] = (masks, even)
+        return tables
+
+    @staticmethod
+    def _reachable(masks, region, start):
+        """Return the cells of `region` reachable from the cell `start` by knight moves. """
+        seen = frontier = masks[start] & region
+        while frontier:
+            targets = 0
+            while frontier:
+                low = frontier & -frontier
+                targets |= masks[low.bit_length() - 1]
+                frontier ^= low
+            frontier = targets & region & ~seen
+            seen |= frontier
+        return seen
+
+    def regions(self, game):
+        """Return the (active player region, inactive player region) masks of `game` if the players are
+        separated and both regions can be solved, or else None.
+        """
+        if game.blank_count() > self.max_blanks:
+            return None
+        active_loc = game.get_player_location(game.active_player)
+        inactive_loc = game.get_player_location(game.inactive_player)
+        if active_loc is None or inactive_loc is None:
+            return None
+        masks, _ = self._masks(game)
+        blanks = game.blank_mask()
+        active_region = self._reachable(masks, blanks, active_loc[0] + active_loc[1] * game.height)
+        inactive_region = self._reachable(masks, blanks, inactive_loc[0] + inactive_loc[1] * game.height)
+        if active_region & inactive_region:
+            return None
+        if max(popcount(active_region), popcount(inactive_region)) > self.max_region:
+            return None
+        return active_region, inactive_region
+
+    def longest_path(self, game, region, start, time_check=None):
+        """Return the number of moves of the longest knight path from the cell `start` through the cells of
+        `region`, which must be the cells reachable from `start`. `time_check` is called regularly during the
+        search and may raise an exception to abort it.
+        """
+        masks, even = self._masks(game)
+        if len(self._memo) > self.max_entries:
+            self._memo.clear()
+        self._time_check = time_check
+        try:
+            return self._longest_path(masks, even, region, start)
+        finally:
+            self._time_check = None
+
+    def _longest_path(self, masks, even, region, start):
+        key = (region, start)
+        best = self._memo.get(key)
+        if best is not None:
+            return best
+        self._calls += 1
+        if self._time_check is not None and not self._calls & 0xff:
+            self._time_check()
+
+        # Knight moves alternate colours, so a path cannot be longer than
+        # twice the cells of the colour it visits least
+        if even >> start & 1:
+            same, other = popcount(region & even), popcount(region & ~even)
+        else:
+            same, other = popcount(region & ~even), popcount(region & even)
+        bound = min(other, same + 1) + min(other, same)
+
+        best = 0
+        targets = masks[start] & region
+        while targets and best < bound:
+            low = targets & -targets
+            targets ^= low
+            cell = low.bit_length() - 1
+            rest = region ^ low
+            length = 1 + self._longest_path(masks, even, self._reachable(masks, rest, cell), cell)
+            if length > best:
+                best = length
+        self._memo[key] = best
+        return best
+
+    def solve(self, game, player, time_check=None):
+        """Return the exact utility of `game` for `player` (+inf or -inf) if the players are separated, or else
+        None.
+        """
+        regions = self.regions(game)
+        if regions is None:
+            return None
+        active_loc = game.get_player_location(game.active_player)
+        inactive_loc = game.get_player_location(game.inactive_player)
+        active_moves = self.longest_path(game, regions[0], active_loc[0] + active_loc[1] * game.height, time_check)
+        inactive_moves = self.longest_path(game, regions[1], inactive_loc[0] + inactive_loc[1] * game.height,
+                                           time_check)
+        self.solved += 1
+        active_wins = active_moves > inactive_moves
+        return float("inf") if active_wins == (player == game.active_player) else float("-inf")
+
+    def best_move(self, game, time_check=None):
+        """Return (utility for the active player, move starting its longest path) if the players are
+        separated, or else None.
+        """
+        regions = self.regions(game)
+        if regions is None:
+            return None
+        masks, _ = self._masks(game)
+        region, other_region = regions
+        inactive_loc = game.get_player_location(game.inactive_player)
+        inactive_moves = self.longest_path(game, other_region, inactive_loc[0] + inactive_loc[1] * game.height,
+                                           time_check)
+        best_length, best_move = -1, None
+        for move in game.get_legal_moves():
+            cell = move[0] + move[1] * game.height
+            rest = region & ~(1 << cell)
+            length = 1 + self.longest_path(game, self._reachable(masks, rest, cell), cell, time_check)
+            if length > best_length:
+                best_length, best_move = length, move
+        self.solved += 1
+        return (float("inf") if best_length > inactive_moves else float("-inf")), best_move
+
+    def stats(self):
+        """Return the solver counters as a dictionary. """
+        return {"solved": self.solved, "memo_entries": len(self._memo)}
+
+
+class TimeManager:
+    """Decides after every iterative deepening iteration whether the next
+    one should be started.
+
+    The cost of the next iteration is predicted from the time of the last one
+    and the growth between the previous iterations: the larger of the last
+    two time ratios, which covers the alternation between odd and even depths
+    of alpha-beta, or the effective branching factor of the node counts if
+    the iterations were too short to be timed. An iteration that is not
+    predicted to finish before the timeout is not started, since a timed out
+    iteration is thrown away.
+
+    :param safety: float
+        Factor applied to the predicted cost of the next iteration
+    :param stable_iterations: int
+        Stop once the best move has been the same for this many consecutive iterations; 0 disables the rule
+    :param default_ratio: float
+        The predicted growth of the cost of an iteration when only one iteration was completed
+    """
+
+    def __init__(self, safety=1., stable_iterations=0, default_ratio=5.):
+        self.safety = safety
+        self.stable_iterations = stable_iterations
+        self.default_ratio = default_ratio
+        self.skipped = 0
+        self.stable_stops = 0
+
+    def predict(self, iterations):
+        """
+        :param iterations: list<(int, int, float)>
+            The depth, the node count and the timer value at the end of every completed iteration, preceded by
+            (0, 0, start time), as recorded by `get_move`
+        :return: float
+            The predicted duration of the next iteration in milliseconds
+        """
+        times = [1000 * (end - prev_end) for (_, _, prev_end), (_, _, end) in zip(iterations, iterations[1:])]
+        nodes = [count - prev_count for (_, prev_count, _), (_, count, _) in zip(iterations, iterations[1:])]
+        ratios = [time / prev_time for prev_time, time in zip(times, times[1:]) if prev_time > 0][-2:]
+        if ratios:
+            ratio = max(ratios)
+        elif len(nodes) > 1 and nodes[-2]:
+            ratio = nodes[-1] / float(nodes[-2])
+        else:
+            ratio = self.default_ratio
+        return times[-1] * max(ratio, 1.)
+
+    def should_stop(self, iterations, count_same_move, remaining):
+        """
+        :param iterations: list<(int, int, float)>
+            The completed iterations, see `predict`
+        :param count_same_move: int
+            The number of consecutive iterations that returned the current best move
+        :param remaining: float
+            The milliseconds left before the search times out
+        :return: bool
+            True if the next iteration should not be started
+        """
+        if self.stable_iterations and count_same_move >= self.stable_iterations:
+            self.stable_stops += 1
+            return True
+        if self.safety * self.predict(iterations) > remaining:
+            self.skipped += 1
+            return True
+        return False
+
+
+class SearchStats:
+    """Per-move statistics of the searches of a minimax player.
+
+    Every call to `MinimaxBasedIsolationPlayer.get_move()` that searches adds
+    one record: a dictionary with the number of nodes visited and of leaf
+    evaluations, the depth and the time of every completed iterative
+    deepening iteration, the nodes per second and the effective branching
+    factor (the ratio of the nodes visited by the last two completed
+    iterations).
+
+    Parameters
+    ----------
+    max_records : int
+        The number of most recent records to keep.
+    """
+
+    def __init__(self, max_records=1000):
+        self.records = deque(maxlen=max_records)
+
+    def add(self, record):
+        """Append a record, dropping the oldest one if the history is full. """
+        self.records.append(record)
+
+    @property
+    def last(self):
+        """The record of the most recent search, or None. """
+        return self.records[-1] if self.records else None
+
+    def summary(self):
+        """Return the totals and averages of the kept records as a dictionary. """
+        count = len(self.records)
+        nodes = sum(record["nodes"] for record in self.records)
+        seconds = sum(record["time_ms"] for record in self.records) / 1000.
+        factors = [record["effective_branching_factor"] for record in self.records
+                   if record["effective_branching_factor"] is not None]
+        return {"moves": count,
+                "nodes": nodes,
+                "leaf_evaluations": sum(record["leaf_evaluations"] for record in self.records),
+                "nps": nodes / seconds if seconds else 0.,
+                "average_depth": sum(record["completed_depth"] for record in self.records) / count if count else 0.,
+                "effective_branching_factor": sum(factors) / len(factors) if factors else None}
+
+    def write_jsonl(self, output):
+        """Write the kept records as JSON lines to `output`, a file object or
+        the path of a file to append to.
+        """
+        if isinstance(output, str):
+            with open(output, "a") as fp:
+                self.write_jsonl(fp)
+            return
+        for record in self.records:
+            output.write(json.dumps(record) + "\n")
+
+    def clear(self):
+        """Remove all records. """
+        self.records.clear()
+
+
+class _PlaceholderPlayer:
+    """Stand-in for the opponent in the boards sent to other processes. """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return "_PlaceholderPlayer({!r})".format(self.name)
+
+
+def _search_payload(game, player):
+    """Pickle `game` for a search by `player` in another process. The
+    opponent is replaced by a `_PlaceholderPlayer`, so any opponent can be
+    sent. The player is sent without its transposition table, statistics
+    and opening book, and with an empty move orderer and endgame solver of
+    the same settings, so the size of the payload does not grow with the
+    state gathered by previous searches.
+    """
+    board = game.copy()
+    opponent = board.get_opponent(player)
+    board.replace_player(opponent, _PlaceholderPlayer(getattr(opponent, "name", str(opponent))))
+    stripped = {"tt": None, "stats": None}
+    if player.move_orderer is not None:
+        stripped["move_orderer"] = MoveOrderer(player.move_orderer.killer_slots)
+    solver = player.endgame_solver
+    if solver is not None:
+        stripped["endgame_solver"] = EndgameSolver(solver.max_blanks, solver.max_region, solver.max_entries)
+    if getattr(player, "opening_book", None) is not None:
+        stripped["opening_book"] = None
+    saved = {attribute: getattr(player, attribute) for attribute in stripped}
+    for attribute, value in stripped.items():
+        setattr(player, attribute, value)
+    try:
+        return pickle.dumps(board)
+    finally:
+        for attribute, value in saved.items():
+            setattr(player, attribute, value)
+
+
+def _ponder_worker(conn, stop):
+    """Loop of the background process of a `Ponderer`: search every position
+    received on `conn` with iterative deepening until `stop` is set, then
+    send back the result of the last completed iteration.
+    """
+    while True:
+        payload = conn.recv()
+        if payload is None:
+            break
+        game = pickle.loads(payload)
+        player = game.active_player
+        if getattr(player, "parallel_workers", 0):
+            player.parallel_workers = 0
+        player.time_left = lambda: float("-inf") if stop.value else float("inf")
+        result = None
+        try:
+            depth = 1
+            while depth <= player.search_depth:
+                move = player.search(game, depth)
+                result = (depth, move, player.search_score)
+                if math.isinf(player.search_score):
+                    break
+                depth += 1
+        except SearchTimeout:
+            pass
+        conn.send(result)
+
+
+class Ponderer:
+    """Background process that searches a position while the opponent
+    thinks, for `MinimaxBasedIsolationPlayer.start_ponder()`.
+
+    The process is started on first use and serves every search of the
+    player; the search of the current position is stopped through a shared
+    flag that the worker reads at every node.
+    """
+
+    def __init__(self):
+        self._process = None
+        self._conn = None
+        self._stop = None
+        self.busy = False
+
+    def start(self, payload):
+        """Start searching the pickled position `payload`, whose active player
+        is the pondering player.
+        """
+        if self._process is None:
+            self._conn, child_conn = multiprocessing.Pipe()
+            self._stop = multiprocessing.RawValue("b", 0)
+            self._process = multiprocessing.Process(target=_ponder_worker, args=(child_conn, self._stop),
+                                                    daemon=True)
+            self._process.start()
+        self._stop.value = 0
+        self._conn.send(payload)
+        self.busy = True
+
+    def stop(self):
+        """Stop the current search and return its (depth, move, score) for
+        the last completed iteration, or None.
+        """
+        if not self.busy:
+            return None
+        self._stop.value = 1
+        self.busy = False
+        return self._conn.recv()
+
+    def close(self):
+        """Stop the background process. """
+        if self._process is not None:
+            self.stop()
+            self._conn.send(None)
+            self._process.join()
+            self._process = None
+
+
 class IsolationPlayer:
     """Base class for minimax and alphabeta agents -- this class is never
     constructed or tested directly.
@@ -252,8 +888,120 @@ class MinimaxBasedIsolationPlayer(IsolationPlayer):
     Abstract IsolationPLayer class that defines some of the common functionality that is used by players that utilise 
     minimax search algorithm with or without alpha-beta pruning. Concrete classes extending this abstract class should 
     implement the search method with their choice of a search algorithm.
+
+    After every search, `search_score` holds the score of the best move found
+    at the root and `completed_depth` the depth of the last iterative
+    deepening iteration completed by `get_move()`.
+
+    If the score function is a `BatchScore` (or any callable with a
+    `score_batch` method), the children of the nodes one ply above the search
+    horizon are scored in one batch call instead of one by one, unless an
+    `endgame_solver` is set. Batch scoring is slower than scalar scoring in
+    pure Python searches, so it is only worth enabling for costly batched
+    score functions.
+
+    Parameters
+    ----------
+    randomize_root : bool (optional)
+        Shuffle the legal moves at the root of every search. Moves below the
+        root are always explored in the deterministic order returned by
+        `Board.get_legal_moves()`.
+
+    in_place : bool (optional)
+        Walk the game tree on the board passed to `get_move()` with
+        `apply_move()`/`undo_move()` instead of creating a copy of the board
+        with `forecast_move()` for every node. Disabled by default because
+        the project tests count `forecast_move()` calls.
+
+    tt_size_mb : float (optional)
+        Memory budget in megabytes of the transposition table used for
+        cutoffs and move ordering; 0 disables the table.
+
+    move_orderer : `MoveOrderer` (optional)
+        Orders the moves below the root with killer moves and the history
+        heuristic, and the root moves by the scores of the previous iterative
+        deepening iteration. Moves are explored in generation order if None.
+
+    stats_records : int (optional)
+        The number of per-move records kept in `stats`, a `SearchStats`
+        collector; 0 disables the collector. The `nodes` and
+        `leaf_evaluations` counters of the last search are always kept.
+
+    endgame_solver : `EndgameSolver` (optional)
+        Scores the nodes where the players are separated exactly instead of
+        searching them, and plays the longest path directly once the players
+        are separated at the root.
+
+    time_manager : `TimeManager` (optional)
+        Stops iterative deepening before an iteration that is not predicted
+        to finish in time, or once the best move is stable. Iterative
+        deepening runs until the timeout if None.
+
+    deadline_margin : float (optional)
+        Read the clock only every N nodes instead of at every node, where N
+        is adapted to the measured nodes per second (the slower of the
+        average rate of the search and the rate since the last read) so
+        that at most `deadline_margin` milliseconds (and at most half of the
+        time left before the threshold) pass between two reads. The search may then
+        stop up to `deadline_margin` milliseconds after the time left falls
+        below `timeout`, which should leave room for it. The clock is read
+        at every node if None.
+
+    persistent_state : bool (optional)
+        Keep the transposition table (aged with `TranspositionTable.age()`),
+        the killer moves and decayed history scores of the move orderer and
+        the principal variation between the moves of a game, and explore the
+        move of the principal variation first at the root when the opponent
+        played the predicted reply. Everything is reset when `get_move()`
+        receives a board with a new `game_id`.
+
+    With `Board.play(ponder=True)`, the player ponders: `start_ponder()`
+    predicts the reply of the opponent after each of its moves and searches
+    the predicted position in a background process until `stop_ponder()`.
+    If the opponent plays the predicted reply, the next `get_move()`
+    continues iterative deepening after the depth reached while pondering
+    (a ponder hit); otherwise the pondering work is discarded. At the end
+    of the game, `end_ponder()` stops the background process.
     """
 
+    def __init__(self, search_depth=999, score_fn=custom_score, timeout=10., name="", info_log=False,
+                 randomize_root=False, in_place=False, tt_size_mb=0, move_orderer=None, stats_records=1000,
+                 endgame_solver=None, time_manager=None, deadline_margin=None, persistent_state=False):
+        super().__init__(search_depth, score_fn, timeout, name, info_log)
+        self.randomize_root = randomize_root
+        self.in_place = in_place
+        self.tt = TranspositionTable(tt_size_mb) if tt_size_mb else None
+        self.move_orderer = move_orderer
+        self.endgame_solver = endgame_solver
+        self.time_manager = time_manager
+        self.deadline_margin = deadline_margin
+        self.persistent_state = persistent_state
+        self.stats = SearchStats(stats_records) if stats_records else None
+        self.nodes = 0
+        self.leaf_evaluations = 0
+        self.search_score = None
+        self.completed_depth = 0
+        self._root_moves = None
+        self._root_scores = None
+        self._search_start = None
+        self._next_check = 0
+        self._last_check = None
+        self.principal_variation = []
+        self._game_id = None
+        self._root_move_count = 0
+        self._expected_root = None
+        self._ponderer = None
+        self._ponder_hash = None
+        self._ponder_result = None
+        self.ponder_move = None
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+
+    # Principal variation search and aspiration windows are only available to
+    # alpha-beta players, see `AlphaBetaPlayer`
+    pvs = False
+    aspiration_window = None
+
     def search(self, game, depth):
         """
         :param game: `isolation.Board`
@@ -299,43 +1047,277 @@ class MinimaxBasedIsolationPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
-        try:
-            # Return immediately if there are no legal moves
-            legal_moves = game.get_legal_moves(game.active_player)
-            if len(legal_moves) == 0:
-                return -1, -1
 
-            # Default to a random legal move until we find a better one (in case timeout happens too quick)
-            best_move = legal_moves[0]
+        # Return immediately if there are no legal moves
+        legal_moves = game.get_legal_moves(game.active_player)
+        if len(legal_moves) == 0:
+            return -1, -1
+
+        if self.randomize_root:
+            random.shuffle(legal_moves)
+        self._root_moves = legal_moves
+        self.search_score = None
+        self.completed_depth = 0
+        self.nodes = 0
+        self.leaf_evaluations = 0
+        self._next_check = 0
+        self._last_check = None
+        keep_state = self.persistent_state and game.game_id == self._game_id
+        if self.tt is not None:
+            if keep_state:
+                self.tt.age()
+            else:
+                self.tt.clear()
+        if self.move_orderer is not None:
+            if keep_state:
+                self.move_orderer.age(game.move_count - self._root_move_count)
+            else:
+                self.move_orderer.new_search()
+            self._root_scores = {}
+        if keep_state and self._expected_root is not None and self._expected_root[0] == game.hash():
+            # The opponent played the reply of the principal variation
+            expected_move = self._expected_root[1]
+            if expected_move in legal_moves:
+                legal_moves.remove(expected_move)
+                legal_moves.insert(0, expected_move)
+        self._game_id = game.game_id
+        self._root_move_count = game.move_count
+        self._expected_root = None
+
+        # Default to the first legal move until we find a better one (in case timeout happens too quick)
+        best_move = legal_moves[0]
+        timed_out = False
+        iterations = [(0, 0, timeit.default_timer())]
+        self._search_start = iterations[0][2]
+        try:
+            # Play the longest path without searching once the players are separated
+            if self.endgame_solver is not None:
+                solved = self.endgame_solver.best_move(game, self.check_time)
+                if solved is not None:
+                    self.search_score, best_move = solved
+                    return best_move
 
             # Perform iterative deepening search.
             last_best_move = None
             count_same_move = 0
             depth = 1
+
+            # Continue after the iterations completed while pondering on this position
+            pondered = self._ponder_result if self._ponder_hash == game.hash() else None
+            if self._ponder_hash is not None:
+                if pondered is not None and pondered[1] in legal_moves:
+                    self.ponder_hits += 1
+                    self.completed_depth, best_move, self.search_score = pondered
+                    legal_moves.remove(best_move)
+                    legal_moves.insert(0, best_move)
+                    last_best_move, count_same_move = best_move, 1
+                    depth = self.completed_depth + 1
+                else:
+                    self.ponder_misses += 1
+                self._ponder_hash = self._ponder_result = None
             while self.search_depth >= depth:
                 best_move = self.search(game, depth)
+                self.completed_depth = depth
+                iterations.append((depth, self.nodes, timeit.default_timer()))
                 if self.info_log:
                     if game.active_player.name == "AB_Custom" or game.inactive_player.name == "AB_Custom":
                         print("Best move at depth {} {}".format(depth, best_move))
                         print(game.print_board())
                 depth = depth + 1
+                if self._root_scores is not None:
+                    # Explore the best moves of this iteration first in the next one
+                    legal_moves.sort(key=lambda move: self._root_scores.get(move, float("-inf")), reverse=True)
                 if best_move == last_best_move:
                     count_same_move += 1
                 else:
                     count_same_move = 1
                     last_best_move = best_move
+                if (self.time_manager is not None and self.search_depth >= depth and
+                        self.time_manager.should_stop(iterations, count_same_move,
+                                                      self.time_left() - self.TIMER_THRESHOLD)):
+                    break
 
         except SearchTimeout:
             # Handle any actions required at timeout, if necessary
+            timed_out = True
             if self.info_log:
                 if game.active_player.name == "AB_Custom" or game.inactive_player.name == "AB_Custom":
                     print("Timed out")
             return best_move
+        finally:
+            self._root_moves = None
+            self._root_scores = None
+            if self.persistent_state:
+                self.remember_principal_variation(game)
+            if self.stats is not None:
+                self.stats.add(self.search_record(game, best_move, iterations, timed_out))
 
         # Return the best move from the last completed search iteration
         return best_move
 
-    def minimax_with_score(self, game, depth, alpha=float("-inf"), beta=float("inf"), apply_alphabeta=False):
+    def remember_principal_variation(self, game):
+        """Extract the principal variation of the last search from the
+        transposition table into `principal_variation`, and remember the
+        position it predicts two plies later for the next `get_move()`.
+
+        :param game: `isolation.Board`
+            The root position of the last search
+        """
+        self.principal_variation = self.table_variation(game, max(self.completed_depth, 1))
+        if len(self.principal_variation) > 2:
+            # Replay the move and the predicted reply on the root board itself and take them back
+            game.apply_move(self.principal_variation[0])
+            game.apply_move(self.principal_variation[1])
+            after_reply = game.hash()
+            game.undo_move()
+            game.undo_move()
+            self._expected_root = (after_reply, self.principal_variation[2])
+
+    def table_variation(self, game, length):
+        """Return the moves of at most `length` plies from `game` that follow
+        the best moves stored in the transposition table (empty without a
+        table).
+
+        :param game: `isolation.Board`
+            The first position of the variation; the moves are walked on it
+            and taken back before returning
+        :param length: int
+            The maximum number of moves
+        :return: list<(int, int)>
+            The moves of the variation
+        """
+        variation = []
+        if self.tt is None:
+            return variation
+        try:
+            while len(variation) < length:
+                entry = self.tt.probe(game.hash())
+                if entry is None or entry[4] is None or not game.move_is_legal(entry[4]):
+                    break
+                variation.append(entry[4])
+                game.apply_move(entry[4])
+        finally:
+            for _ in variation:
+                game.undo_move()
+        return variation
+
+    def start_ponder(self, game):
+        """Predict the reply of the opponent, who is the active player of
+        `game`, with a shallow search and start searching the resulting
+        position in the background.
+
+        :param game: `isolation.Board`
+            The position after the last move of this player
+        """
+        self.stop_ponder()
+        if not game.get_legal_moves():
+            return
+
+        # The prediction leaves the counters, tables and move ordering of
+        # the player as the last search left them
+        attributes = ("tt", "move_orderer", "endgame_solver", "time_left", "nodes", "leaf_evaluations",
+                      "_next_check", "_last_check", "_search_start")
+        saved = [getattr(self, attribute) for attribute in attributes]
+        self.tt = self.move_orderer = self.endgame_solver = None
+        self.time_left = lambda: float("inf")
+        try:
+            _, self.ponder_move = self.minimax_with_score(game, 2, apply_alphabeta=True)
+        finally:
+            for attribute, value in zip(attributes, saved):
+                setattr(self, attribute, value)
+        predicted = game.forecast_move(self.ponder_move)
+        if not predicted.get_legal_moves():
+            return
+
+        payload = _search_payload(predicted, self)
+        if self._ponderer is None:
+            self._ponderer = Ponderer()
+        self._ponderer.start(payload)
+        self._ponder_hash = predicted.hash()
+
+    def stop_ponder(self):
+        """Stop pondering and keep the result for the next `get_move()`. """
+        if self._ponderer is not None and self._ponderer.busy:
+            self._ponder_result = self._ponderer.stop()
+
+    def end_ponder(self):
+        """Stop pondering at the end of a game and stop the background
+        process.
+        """
+        if self._ponderer is not None:
+            self._ponderer.close()
+            self._ponderer = None
+        self._ponder_hash = self._ponder_result = None
+
+    def __getstate__(self):
+        # Worker processes and the clock of the current move stay in this process
+        state = self.__dict__.copy()
+        state["_ponderer"] = state["time_left"] = None
+        return state
+
+    def close(self):
+        """Stop the background processes of the player, if any. """
+        if self._ponderer is not None:
+            self._ponderer.close()
+            self._ponderer = None
+
+    def check_time(self):
+        """Raise `SearchTimeout` if the time left for the current move is below the threshold. """
+        if self.time_left() < self.TIMER_THRESHOLD:
+            raise SearchTimeout()
+
+    def check_deadline(self):
+        """Raise `SearchTimeout` if the time left for the current move is below the threshold, and schedule the
+        next clock read when `deadline_margin` is set.
+        """
+        remaining = self.time_left() - self.TIMER_THRESHOLD
+        if remaining < 0:
+            raise SearchTimeout()
+        now = timeit.default_timer()
+        interval = 1
+        if self._search_start is not None and now > self._search_start:
+            # The slower of the average rate and the rate since the last read
+            nodes_per_ms = self.nodes / (1000 * (now - self._search_start))
+            if self._last_check is not None and now > self._last_check[0]:
+                last_time, last_nodes = self._last_check
+                nodes_per_ms = min(nodes_per_ms, (self.nodes - last_nodes) / (1000 * (now - last_time)))
+            interval = max(int(nodes_per_ms * min(self.deadline_margin, remaining / 2)), 1)
+        self._last_check = (now, self.nodes)
+        self._next_check = self.nodes + interval
+
+    def search_record(self, game, move, iterations, timed_out):
+        """
+        :param game: `isolation.Board`
+            The position that was searched
+        :param move: (int, int)
+            The move returned by the search
+        :param iterations: list<(int, int, float)>
+            The depth, the node count and the timer value at the end of every completed iteration, preceded by
+            (0, 0, start time)
+        :param timed_out: bool
+            Whether the search was stopped by a timeout
+        :return: dict
+            The statistics record of the search, see `SearchStats`
+        """
+        elapsed = timeit.default_timer() - iterations[0][2]
+        completed = [{"depth": depth, "nodes": nodes - prev_nodes, "time_ms": 1000 * (end - prev_end)}
+                     for (_, prev_nodes, prev_end), (depth, nodes, end) in zip(iterations, iterations[1:])]
+        branching_factor = None
+        if len(completed) > 1 and completed[-2]["nodes"]:
+            branching_factor = completed[-1]["nodes"] / float(completed[-2]["nodes"])
+        return {"player": self.name,
+                "move_number": game.move_count,
+                "move": list(move),
+                "nodes": self.nodes,
+                "leaf_evaluations": self.leaf_evaluations,
+                "completed_depth": self.completed_depth,
+                "time_ms": 1000 * elapsed,
+                "nps": self.nodes / elapsed if elapsed else 0.,
+                "iterations": completed,
+                "effective_branching_factor": branching_factor,
+                "timed_out": timed_out}
+
+    def minimax_with_score(self, game, depth, alpha=float("-inf"), beta=float("inf"), apply_alphabeta=False, ply=0):
         """
         :param game : isolation.Board
             An instance of the Isolation game `Board` class representing the
@@ -352,6 +1334,9 @@ class MinimaxBasedIsolationPlayer(IsolationPlayer):
             Beta limits the upper bound of search on maximizing layers
         :param apply_alphabeta: bool
             Flag that defines whether alpha beta pruning will be applied
+        :param ply: int
+            Distance from the root of the search; the root of a search started by `get_move` explores its moves in
+            the (optionally shuffled) root order
         :return: 
         float
             Score corresponding to the best move found in the current search
@@ -360,17 +1345,61 @@ class MinimaxBasedIsolationPlayer(IsolationPlayer):
             (-1, -1) if there are no legal moves
         """
 
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self.nodes += 1
+        if self.deadline_margin is None:
+            if self.time_left() < self.TIMER_THRESHOLD:
+                raise SearchTimeout()
+        elif self.nodes >= self._next_check:
+            self.check_deadline()
+
+        # The value of a position where the players are separated is known exactly
+        if self.endgame_solver is not None and ply > 0:
+            exact_score = self.endgame_solver.solve(game, self, self.check_time)
+            if exact_score is not None:
+                self.leaf_evaluations += 1
+                return exact_score, None
+
+        # Use the transposition table entry of this position for a cutoff if it was searched deep enough, or
+        # else to explore its best move first. The root always searches, so that it returns a move.
+        tt_move = None
+        if self.tt is not None and depth > 0:
+            entry = self.tt.probe(game.hash())
+            if entry is not None:
+                _, entry_depth, entry_score, bound, tt_move = entry
+                if ply > 0 and entry_depth >= depth:
+                    if bound == EXACT:
+                        return entry_score, tt_move
+                    if apply_alphabeta and ((bound == LOWER_BOUND and entry_score >= beta) or
+                                            (bound == UPPER_BOUND and entry_score <= alpha)):
+                        return entry_score, tt_move
 
         # Return the score of the active player if bottom of the depth is reached or if there are no moves available
-        legal_moves = game.get_legal_moves(game.active_player)
+        if ply == 0 and self._root_moves is not None:
+            legal_moves = self._root_moves
+        else:
+            legal_moves = game.get_legal_moves(game.active_player)
         maximising = game.active_player == self
 
         if depth == 0 or len(legal_moves) == 0:
+            self.leaf_evaluations += 1
             current_score = self.score(game, game.active_player if maximising else game.inactive_player)
             return current_score, None
 
+        if self.move_orderer is not None and ply > 0:
+            legal_moves = self.move_orderer.order(legal_moves, ply, tt_move)
+        elif tt_move is not None and tt_move in legal_moves:
+            legal_moves = [tt_move] + [move for move in legal_moves if move != tt_move]
+        original_alpha, original_beta = alpha, beta
+
+        # Score all the children of a frontier node at once if the score function supports it. The batch cannot
+        # tell which children the endgame solver would score exactly, so it is not used with a solver.
+        child_scores = None
+        score_batch = getattr(self.score, "score_batch", None)
+        if depth == 1 and score_batch is not None and self.endgame_solver is None:
+            self.nodes += len(legal_moves)
+            self.leaf_evaluations += len(legal_moves)
+            child_scores = score_batch(game, legal_moves, self)
+
         # Define helper functions that perform the right action depending on if the active player is a maximising player
         best_move = (float("-inf") if maximising else float("inf"), legal_moves[0])
         get_better_move = lambda x, y: max(x, y, key=lambda a: a[0]) if maximising else min(x, y, key=lambda a: a[0])
@@ -378,21 +1407,79 @@ class MinimaxBasedIsolationPlayer(IsolationPlayer):
         updated_beta = lambda b, x: min(b, x) if not maximising else b
 
         # Pick the best move from available moves by iteratively calling minimax_with_score function
-        for move in legal_moves:
-            forecasted_game = game.forecast_move(move)
-            (new_score, _) = self.minimax_with_score(forecasted_game, depth - 1, alpha, beta, apply_alphabeta)
+        for index, move in enumerate(legal_moves):
+            if child_scores is not None:
+                new_score = child_scores[index]
+            else:
+                if self.in_place:
+                    game.apply_move(move)
+                    child = game
+                else:
+                    child = game.forecast_move(move)
+                try:
+                    if self.pvs and apply_alphabeta and index > 0:
+                        new_score = self.null_window_search(child, depth - 1, alpha, beta, maximising, ply + 1)
+                    else:
+                        (new_score, _) = self.minimax_with_score(child, depth - 1, alpha, beta, apply_alphabeta,
+                                                                 ply + 1)
+                finally:
+                    if self.in_place:
+                        game.undo_move()
             new_move = (new_score, move)
             best_move = get_better_move(new_move, best_move)
+            if ply == 0 and self._root_scores is not None:
+                self._root_scores[move] = new_score
 
             # Apply alpha-beta pruning if the flag is set
             if apply_alphabeta:
                 alpha = updated_alpha(alpha, best_move[0])
                 beta = updated_beta(beta, best_move[0])
                 if alpha >= beta:
+                    if self.move_orderer is not None:
+                        self.move_orderer.record_cutoff(move, ply, depth, index)
                     break
 
+        if self.tt is not None:
+            if apply_alphabeta and best_move[0] <= original_alpha:
+                bound = UPPER_BOUND
+            elif apply_alphabeta and best_move[0] >= original_beta:
+                bound = LOWER_BOUND
+            else:
+                bound = EXACT
+            self.tt.store(game.hash(), depth, best_move[0], bound, best_move[1])
+
         return best_move
 
+    def null_window_search(self, game, depth, alpha, beta, maximising, ply):
+        """Principal variation search of a child that is not the first child of its parent.
+
+        The child is first searched with a null window at the bound of the parent, which only proves that it is
+        not better than the moves explored before it. It is searched again with the full window if it turns out
+        to be better (fails high for the parent).
+
+        :param game: isolation.Board
+            The child position to search
+        :param depth: int
+            The number of plies to search below the child
+        :param alpha: float
+            The lower bound of the parent's window
+        :param beta: float
+            The upper bound of the parent's window
+        :param maximising: bool
+            Whether the parent of the child is a maximising node
+        :param ply: int
+            Distance of the child from the root of the search
+        :return: float
+            The score of the child; exact if it falls inside the parent's window
+        """
+        if maximising:
+            (score, _) = self.minimax_with_score(game, depth, alpha, nextafter(alpha, math.inf), True, ply)
+        else:
+            (score, _) = self.minimax_with_score(game, depth, nextafter(beta, -math.inf), beta, True, ply)
+        if alpha < score < beta:
+            (score, _) = self.minimax_with_score(game, depth, alpha, beta, True, ply)
+        return score
+
     def minimax(self, game, depth):
         """Implement depth-limited minimax search algorithm as described in
         the lectures.
@@ -432,7 +1519,8 @@ class MinimaxBasedIsolationPlayer(IsolationPlayer):
                 each helper function or else your agent will timeout during
                 testing.
         """
-        return self.minimax_with_score(game, depth)[1]
+        self.search_score, move = self.minimax_with_score(game, depth)
+        return move
 
     def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
         """Implement depth-limited minimax search with alpha-beta pruning as
@@ -484,6 +1572,7 @@ class MinimaxBasedIsolationPlayer(IsolationPlayer):
             if game.active_player.name == "AB_Custom" or game.inactive_player.name == "AB_Custom":
                 print("score is {}".format(score))
 
+        self.search_score = score[0]
         return score[1]
 
 
@@ -497,11 +1586,447 @@ class MinimaxPlayer(MinimaxBasedIsolationPlayer):
         return self.minimax(game, depth)
 
 
+# Best root score found so far by the parallel search, shared with the worker
+# processes of an `AlphaBetaPlayer`; set by _init_search_worker()
+_shared_alpha = None
+
+# Transposition table of a worker process of the parallel search, kept
+# between its tasks; the pool of a player only searches for that player
+_worker_tt = None
+
+
+def _init_search_worker(shared_alpha):
+    """Register the shared root bound in a worker process of the parallel search. """
+    global _shared_alpha
+    _shared_alpha = shared_alpha
+
+
+def _search_root_move(task):
+    """Search the child of the root reached by one root move in a worker
+    process of the parallel search.
+
+    :param task: (bytes, int, float, float)
+        The pickled child position, the depth of the root search, the timer
+        value of the deadline and the size in megabytes of the transposition
+        table of the worker (0 for none)
+    :return: (float, bool, list<(int, int)>, int, int)
+        The score of the child for the player at the root (None if the
+        search timed out), whether the score is exact rather than an upper
+        bound of a child that failed low, the principal variation from the
+        child (empty without a transposition table), and the nodes and leaf
+        evaluations searched
+    """
+    global _worker_tt
+    payload, depth, deadline, tt_size_mb = task
+    child = pickle.loads(payload)
+    player = child.inactive_player
+    if tt_size_mb and (_worker_tt is None or _worker_tt.size_mb != tt_size_mb):
+        _worker_tt = TranspositionTable(tt_size_mb)
+    player.tt = _worker_tt if tt_size_mb else None
+    player.time_left = lambda: 1000 * (deadline - timeit.default_timer())
+    player.nodes = player.leaf_evaluations = player._next_check = 0
+    player._search_start = timeit.default_timer()
+    player._last_check = None
+
+    # Start from the best score of the moves searched so far: a child that
+    # cannot beat it fails low without being searched exactly
+    alpha = _shared_alpha.value
+    try:
+        score, _ = player.minimax_with_score(child, depth - 1, alpha, float("inf"), True, 1)
+    except SearchTimeout:
+        return None, False, [], player.nodes, player.leaf_evaluations
+    exact = score > alpha
+    with _shared_alpha.get_lock():
+        if score > _shared_alpha.value:
+            _shared_alpha.value = score
+    variation = player.table_variation(child, depth - 1) if exact else []
+    return score, exact, variation, player.nodes, player.leaf_evaluations
+
+
 class AlphaBetaPlayer(MinimaxBasedIsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Accepts all the parameters of `MinimaxBasedIsolationPlayer` and:
+
+    Parameters
+    ----------
+    pvs : bool (optional)
+        Use principal variation search: every child after the first one is
+        searched with a null window, and searched again with the full window
+        only if it fails high.
+
+    aspiration_window : float (optional)
+        Start every iterative deepening iteration after the first one with
+        the window (score - aspiration_window, score + aspiration_window)
+        around the score of the previous iteration, and repeat the iteration
+        with the full window if the score falls outside of it. Disabled if
+        None.
+
+    opening_book : `opening_book.OpeningBook` (optional)
+        Play the stored move without searching when the position is in the
+        book (any object with a `lookup(game)` method returning None or an
+        entry with `move`, `depth` and `score` attributes).
+
+    parallel_workers : int (optional)
+        Split the root moves of the iterations of at least
+        `parallel_min_depth` plies over a pool of this many processes (see
+        `parallel_alphabeta()`); the search runs in this process if below 2.
+
+    parallel_min_depth : int (optional)
+        The shallowest iteration searched in parallel; shallower iterations
+        cost less than sending the positions to the workers.
     """
 
+    def __init__(self, *args, pvs=False, aspiration_window=None, opening_book=None, parallel_workers=0,
+                 parallel_min_depth=4, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pvs = pvs
+        self.aspiration_window = aspiration_window
+        self.opening_book = opening_book
+        self.parallel_workers = parallel_workers
+        self.parallel_min_depth = parallel_min_depth
+        self._pool = None
+        self._shared_alpha = None
+
+    def __getstate__(self):
+        # The process pool of the parallel search stays in this process
+        state = super().__getstate__()
+        state["_pool"] = state["_shared_alpha"] = None
+        return state
+
+    def close(self):
+        """Stop the background processes of the player, including the
+        workers of the parallel search.
+        """
+        super().close()
+        if self._pool is not None:
+            # Every search cancels its pending futures, so none are queued here
+            self._pool.shutdown()
+            self._pool = self._shared_alpha = None
+
+    def get_move(self, game, time_left):
+        if self.opening_book is not None:
+            entry = self.opening_book.lookup(game)
+            if entry is not None and game.move_is_legal(entry.move):
+                self.search_score = entry.score
+                self.completed_depth = entry.depth
+                self.nodes = 0
+                self.leaf_evaluations = 0
+                return entry.move
+        return super().get_move(game, time_left)
+
     def search(self, game, depth):
-        return self.alphabeta(game, depth)
+        if self.parallel_workers > 1 and depth >= self.parallel_min_depth:
+            return self.parallel_alphabeta(game, depth)
+        previous_score = self.search_score
+        if self.aspiration_window is None or previous_score is None or math.isinf(previous_score):
+            return self.alphabeta(game, depth)
+
+        alpha = previous_score - self.aspiration_window
+        beta = previous_score + self.aspiration_window
+        move = self.alphabeta(game, depth, alpha, beta)
+        if not alpha < self.search_score < beta:
+            move = self.alphabeta(game, depth)
+        return move
+
+
+    def parallel_alphabeta(self, game, depth):
+        """Alpha-beta search with the root moves split over a process pool.
+
+        The first root move is searched in this process with the full window
+        (Young Brothers Wait), and the other root moves are then searched by
+        the workers, each starting from the best root score found so far,
+        which is shared through a `multiprocessing.Value`: a move that cannot
+        beat it fails low early. Such a move only gets an upper bound, which
+        can tie the best score, so only the exact scores reported by the
+        workers can replace the best move. Workers stop at the same deadline
+        as this process, and a timeout in any of them raises `SearchTimeout`.
+
+        The children are sent with a placeholder for the opponent and
+        without the transposition table, statistics, opening book, move
+        ordering history and endgame memo of the player (see
+        `_search_payload()`). Workers keep their own transposition table
+        between tasks (if the player has one), and start their move ordering
+        and endgame memo empty. They return the principal variation of an
+        exact score.
+        The variation of the best move and the root result are then stored
+        in the player's table, so that `remember_principal_variation()` and
+        the next iteration find them.
+
+        :param game: `isolation.Board`
+            The root position
+        :param depth: int
+            The number of plies to search
+        :return: (int, int)
+            The best root move; (-1, -1) if there are no legal moves
+        """
+        legal_moves = self._root_moves if self._root_moves is not None else game.get_legal_moves()
+        if not legal_moves:
+            return -1, -1
+        if self._pool is None:
+            self._shared_alpha = multiprocessing.Value("d", float("-inf"))
+            self._pool = ProcessPoolExecutor(max_workers=self.parallel_workers, initializer=_init_search_worker,
+                                             initargs=(self._shared_alpha,))
+
+        best_move = legal_moves[0]
+        best_score, _ = self.minimax_with_score(game.forecast_move(best_move), depth - 1, float("-inf"),
+                                                float("inf"), True, 1)
+        if self._root_scores is not None:
+            self._root_scores[best_move] = best_score
+        self._shared_alpha.value = best_score
+
+        payloads = [_search_payload(game.forecast_move(move), self) for move in legal_moves[1:]]
+        deadline = timeit.default_timer() + self.time_left() / 1000.
+        tt_size_mb = self.tt.size_mb if self.tt is not None else 0
+        futures = [self._pool.submit(_search_root_move, (payload, depth, deadline, tt_size_mb))
+                   for payload in payloads]
+        try:
+            # The workers give up at the threshold; allow half of it to collect their results
+            timeout = self.time_left() - self.TIMER_THRESHOLD / 2
+            _, not_done = wait(futures, timeout=None if math.isinf(timeout) else max(timeout, 0) / 1000.)
+            if not_done:
+                raise SearchTimeout()
+            timed_out = False
+            best_variation = None
+            for move, future in zip(legal_moves[1:], futures):
+                score, exact, variation, nodes, leaf_evaluations = future.result()
+                self.nodes += nodes
+                self.leaf_evaluations += leaf_evaluations
+                if score is None:
+                    timed_out = True
+                    continue
+                if self._root_scores is not None:
+                    self._root_scores[move] = score
+                # A move that failed low only has an upper bound, which can equal the best exact score
+                if exact and score > best_score:
+                    best_score, best_move, best_variation = score, move, variation
+            if timed_out:
+                raise SearchTimeout()
+        finally:
+            for future in futures:
+                future.cancel()
+
+        if self.tt is not None:
+            # Store the principal variation found by a worker, then the root,
+            # as the serial search leaves them in the table
+            if best_variation:
+                child = game.forecast_move(best_move)
+                for ply, move in enumerate(best_variation):
+                    self.tt.store(child.hash(), depth - 1 - ply, best_score, EXACT, move)
+                    child.apply_move(move)
+            self.tt.store(game.hash(), depth, best_score, EXACT, best_move)
+        self.search_score = best_score
+        return best_move
+
+class MCTSNode:
+    """Node of the search tree of `MCTSPlayer`.
+
+    :param move: (int, int)
+        The move that leads to this node from its parent; None at the root
+    :param parent: `MCTSNode`
+        The parent node; None at the root
+    :param untried: list<(int, int)>
+        The legal moves of the position that have no child node yet
+    :param side: int
+        The side that made `move`: 0 for player 1 and 1 for player 2
+    """
+    __slots__ = ("move", "parent", "children", "untried", "side", "visits", "wins")
+
+    def __init__(self, move, parent, untried, side):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.side = side
+        self.visits = 0
+        self.wins = 0
+
+
+class MCTSPlayer(IsolationPlayer):
+    """Game-playing agent that chooses a move with Monte Carlo tree search:
+    UCT selection, expansion of one node and one playout to the end of the
+    game per iteration, until the time runs out.
+
+    The tree is kept between moves. The next call to `get_move()` finds the
+    moves played since the last search by comparing the blocked cells of the
+    board with those of the previous root, and re-roots the tree on the node
+    of the current position if it was expanded.
+
+    :param exploration: float
+        The exploration constant of UCT
+    :param guided: bool
+        Play the playouts with a heuristic instead of uniformly random moves: the move that leaves the mover the
+        most legal moves, or a random move with probability `epsilon`
+    :param epsilon: float
+        The probability of a random move in a guided playout
+    :param max_playouts: int
+        Stop after this many playouts even if there is time left; no limit if None
+    :param reuse_tree: bool
+        Keep the tree between moves
+    :param timeout: float
+        Time remaining (in milliseconds) when search is stopped
+    :param name: str
+        The name of the player
+    """
+
+    def __init__(self, exploration=math.sqrt(2), guided=False, epsilon=0.2, max_playouts=None, reuse_tree=True,
+                 timeout=10., name=""):
+        super().__init__(score_fn=None, timeout=timeout, name=name)
+        self.exploration = exploration
+        self.guided = guided
+        self.epsilon = epsilon
+        self.max_playouts = max_playouts
+        self.reuse_tree = reuse_tree
+        self.playouts = 0
+        self.reused_visits = 0
+        self.total_playouts = 0
+        self.total_time = 0.
+        self._root = None
+        self._root_board = None
+
+    def playouts_per_second(self):
+        """Return the playouts per second over every search of the player. """
+        return self.total_playouts / self.total_time if self.total_time else 0.
+
+    def get_move(self, game, time_left):
+        """Search for the best move until `time_left()` falls below the
+        threshold, and return the most visited move of the root.
+
+        :param game: `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the game
+        :param time_left: callable
+            A function that returns the number of milliseconds left in the current turn
+        :return: (int, int)
+            Board coordinates corresponding to a legal move; (-1, -1) if there are no available legal moves
+        """
+        self.time_left = time_left
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            self._root = self._root_board = None
+            return -1, -1
+
+        start = timeit.default_timer()
+        root = self._reuse_tree(game) if self.reuse_tree else None
+        if root is None:
+            root = MCTSNode(None, None, legal_moves, (game.move_count - 1) & 1)
+        self.reused_visits = root.visits
+
+        board = game.copy()
+        self.playouts = 0
+        while self.max_playouts is None or self.playouts < self.max_playouts:
+            if self.time_left() < self.TIMER_THRESHOLD:
+                break
+            self._playout(root, board)
+            self.playouts += 1
+        self.total_playouts += self.playouts
+        self.total_time += timeit.default_timer() - start
+
+        if self.reuse_tree:
+            self._root, self._root_board = root, game.copy()
+        if not root.children:
+            return legal_moves[0]
+        return max(root.children, key=lambda child: child.visits).move
+
+    def _reuse_tree(self, game):
+        """Return the node of the previous tree for the position of `game`, or
+        None if the position was not expanded.
+        """
+        root, board = self._root, self._root_board
+        self._root = self._root_board = None
+        if root is None or (board.width, board.height) != (game.width, game.height):
+            return None
+        previous_blanks, blanks = board.blank_mask(), game.blank_mask()
+        if blanks & ~previous_blanks:
+            return None
+
+        node = self._find_node(root, board.copy(), previous_blanks & ~blanks, game)
+        if node is None:
+            return None
+        node.parent = None
+        node.move = None
+        return node
+
+    def _find_node(self, node, replay, played, game):
+        """Return the descendant of `node` reached by playing every cell of the
+        `played` mask once, in the order that leads to the position of `game`,
+        or None if that path was not expanded. The moves are applied to
+        `replay`, which holds the position of `node` and is restored before
+        returning.
+        """
+        if not played:
+            if replay.hash() == game.hash() and replay.move_count == game.move_count:
+                return node
+            return None
+        # A cell can be a child of the node without being the move played
+        # from it (e.g. the reply of the opponent), so try every match
+        for child in node.children:
+            bit = 1 << (child.move[0] + child.move[1] * game.height)
+            if played & bit:
+                replay.apply_move(child.move)
+                try:
+                    found = self._find_node(child, replay, played & ~bit, game)
+                finally:
+                    replay.undo_move()
+                if found is not None:
+                    return found
+        return None
+
+    def _playout(self, root, board):
+        """Run one iteration of the search from `root` on `board`, which holds
+        the position of the root and is restored before returning.
+        """
+        node = root
+        applied = 0
+        exploration = self.exploration
+
+        # Selection: descend through fully expanded nodes with UCT
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            node = max(node.children, key=lambda child: child.wins / child.visits +
+                       exploration * math.sqrt(log_visits / child.visits))
+            board.apply_move(node.move)
+            applied += 1
+
+        # Expansion of one untried move
+        if node.untried:
+            move = node.untried.pop(random.randrange(len(node.untried)))
+            board.apply_move(move)
+            applied += 1
+            child = MCTSNode(move, node, board.get_legal_moves(), (board.move_count - 1) & 1)
+            node.children.append(child)
+            node = child
+
+        # Simulation: the side to move without legal moves loses
+        applied += self._simulate(board)
+        loser = board.move_count & 1
+        for _ in range(applied):
+            board.undo_move()
+
+        # Backpropagation: every node counts the wins of the side that moved into it
+        while node is not None:
+            node.visits += 1
+            if node.side != loser:
+                node.wins += 1
+            node = node.parent
+
+    def _simulate(self, board):
+        """Play `board` to the end and return the number of moves applied. """
+        count = 0
+        legal_moves = board.get_legal_moves()
+        while legal_moves:
+            if self.guided and random.random() >= self.epsilon:
+                best_mobility = -1
+                for candidate in legal_moves:
+                    board.apply_move(candidate)
+                    mobility = board.mobility(board.inactive_player)
+                    board.undo_move()
+                    if mobility > best_mobility:
+                        best_mobility, move = mobility, candidate
+            else:
+                move = random.choice(legal_moves)
+            board.apply_move(move)
+            count += 1
+            legal_moves = board.get_legal_moves()
+        return count
@@ -0,0 +1,213 @@
+"""Write and read compact binary records of finished games.
+
+Records are appended to a file as the games finish, so a tournament keeps
+no game in memory, and every record can be read back by its number to
+replay the game. Summarize a record file with:
+
+    python game_records.py games.rec
+
+File format (little-endian): a header with the magic bytes b"ISOGAME1" and
+the board width and height, followed by the records. Each record starts
+with a fixed part holding its length, the number of the winning player (1
+or 2), the termination code, the lengths of the player names and the
+numbers of opening moves and moves, followed by the UTF-8 player names, the
+cell indexes of the opening moves and of the moves, and the time of every
+move in milliseconds as half-precision floats. A companion index file, the
+record file path followed by ".idx", holds the 64-bit offset of every
+record in the record file.
+"""
+import argparse
+import os
+import struct
+
+from collections import Counter, namedtuple
+
+from isolation import Board
+
+MAGIC = b"ISOGAME1"
+HEADER = struct.Struct("<8sBB")  # magic, width, height
+# record length, winner, termination, name lengths, opening length, move count
+RECORD = struct.Struct("<IBBBBBH")
+OFFSET = struct.Struct("<Q")
+
+TERMINATIONS = ("timeout", "forfeit", "illegal move")
+
+# The names of the players, the number of the winning player (1 or 2), the
+# moves played before the game, the moves of the game, the reason for the end
+# of the game and the time of every move in milliseconds
+GameRecord = namedtuple("GameRecord", ["player_1", "player_2", "winner", "opening", "moves", "termination",
+                                       "move_times"])
+
+# The largest half-precision float; longer move times are clamped to it
+MAX_MOVE_TIME = 65504.
+
+
+def index_path(path):
+    """Return the path of the index file of a record file. """
+    return path + ".idx"
+
+
+def check_board_size(width, height):
+    """Raise a RuntimeError if the cell indexes of a board of the given size
+    do not fit in a byte.
+    """
+    if width * height > 255:
+        raise RuntimeError("Game records only support boards of up to 255 cells.")
+
+
+def read_header(record_file, path):
+    """Return the (width, height) of an open record file, or raise a
+    RuntimeError if it is not a record file.
+    """
+    header = record_file.read(HEADER.size)
+    if len(header) != HEADER.size or header[:len(MAGIC)] != MAGIC:
+        raise RuntimeError("{} is not a valid game record file.".format(path))
+    _, width, height = HEADER.unpack(header)
+    return width, height
+
+
+class GameRecordWriter:
+    """Append-only writer of game records. Records written to an existing
+    file are added after its records; the board size must match.
+
+    Parameters
+    ----------
+    path : str
+        The path of the record file; its index is written next to it.
+
+    width, height : int (optional)
+        The board size of the recorded games.
+    """
+
+    def __init__(self, path, width=7, height=7):
+        check_board_size(width, height)
+        self.path = path
+        self.width = width
+        self.height = height
+        self._records = open(path, "a+b")
+        try:
+            if self._records.tell() == 0:
+                self._records.write(HEADER.pack(MAGIC, width, height))
+            else:
+                self._records.seek(0)
+                if read_header(self._records, path) != (width, height):
+                    raise RuntimeError("{} records games of another board size.".format(path))
+                self._records.seek(0, os.SEEK_END)
+            self._index = open(index_path(path), "ab")
+        except Exception:
+            self._records.close()
+            raise
+        self.count = os.fstat(self._index.fileno()).st_size // OFFSET.size
+
+    def write(self, record):
+        """Append a `GameRecord` to the file, as record number `count`. """
+        if len(record.move_times) != len(record.moves):
+            raise RuntimeError("Game records need the time of every move.")
+        names = [record.player_1.encode(), record.player_2.encode()]
+        cells = [row + col * self.height for row, col in list(record.opening) + list(record.moves)]
+        times = [min(time, MAX_MOVE_TIME) for time in record.move_times]
+        payload = b"".join(names) + bytes(cells) + struct.pack("<{}e".format(len(times)), *times)
+        offset = self._records.tell()
+        self._records.write(RECORD.pack(RECORD.size + len(payload), record.winner,
+                                        TERMINATIONS.index(record.termination), len(names[0]), len(names[1]),
+                                        len(record.opening), len(record.moves)))
+        self._records.write(payload)
+        self._records.flush()
+        # The record is only indexed once it is complete
+        self._index.write(OFFSET.pack(offset))
+        self._index.flush()
+        self.count += 1
+
+    def close(self):
+        """Close the record and index files. """
+        self._records.close()
+        self._index.close()
+
+
+class GameRecordReader:
+    """Random access reader of a record file written by `GameRecordWriter`.
+
+    Parameters
+    ----------
+    path : str
+        The path of the record file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._records = open(path, "rb")
+        try:
+            self.width, self.height = read_header(self._records, path)
+            self._index = open(index_path(path), "rb")
+        except Exception:
+            self._records.close()
+            raise
+
+    def __len__(self):
+        return os.fstat(self._index.fileno()).st_size // OFFSET.size
+
+    def __getitem__(self, number):
+        if not 0 <= number < len(self):
+            raise IndexError("game record index out of range")
+        self._index.seek(number * OFFSET.size)
+        offset, = OFFSET.unpack(self._index.read(OFFSET.size))
+        self._records.seek(offset)
+        length, winner, termination, name_1, name_2, opening, moves = RECORD.unpack(
+            self._records.read(RECORD.size))
+        payload = self._records.read(length - RECORD.size)
+        cells = [(cell % self.height, cell // self.height)
+                 for cell in payload[name_1 + name_2:name_1 + name_2 + opening + moves]]
+        times = struct.unpack_from("<{}e".format(moves), payload, name_1 + name_2 + opening + moves)
+        return GameRecord(payload[:name_1].decode(), payload[name_1:name_1 + name_2].decode(), winner,
+                          cells[:opening], cells[opening:], TERMINATIONS[termination], list(times))
+
+    def __iter__(self):
+        for number in range(len(self)):
+            yield self[number]
+
+    def close(self):
+        """Close the record and index files. """
+        self._records.close()
+        self._index.close()
+
+
+def replay(record, width=7, height=7):
+    """Return the board at the end of a recorded game, played by the players
+    "Player1" and "Player2" (the recorded names may be equal).
+    """
+    game = Board("Player1", "Player2", width, height)
+    for move in record.opening + record.moves:
+        game.apply_move(move)
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a game record file")
+    parser.add_argument("path", help="path of the record file")
+    args = parser.parse_args()
+
+    reader = GameRecordReader(args.path)
+    try:
+        count = len(reader)
+        wins = Counter()
+        terminations = Counter()
+        moves = 0
+        move_time = 0.
+        for record in reader:
+            wins[record.player_1 if record.winner == 1 else record.player_2] += 1
+            terminations[record.termination] += 1
+            moves += len(record.moves)
+            move_time += sum(record.move_times)
+    finally:
+        reader.close()
+
+    print("{} games on a {}x{} board, {:.1f} ms per move".format(
+        count, reader.width, reader.height, move_time / moves if moves else 0.))
+    for name, count in wins.most_common():
+        print("{:>13}: {} wins".format(name, count))
+    for termination, count in terminations.most_common():
+        print("{:>13}: {} games".format(termination, count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Unit tests for the game record writer and reader."""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from contextlib import redirect_stdout
+
+import game_records
+import tournament
+
+from tournament_test import make_agents
+
+
+class GameRecordsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "games.rec")
+        self.records = [
+            game_records.GameRecord("AB_Improved", "Random", 1, [(3, 3), (2, 4)], [(1, 5), (0, 2), (2, 6)],
+                                    "illegal move", [12.5, 3., 48.25]),
+            game_records.GameRecord("AB_Custom", "MM_Open", 2, [(0, 0), (6, 6)], [], "timeout", []),
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        writer = game_records.GameRecordWriter(self.path)
+        for record in self.records:
+            writer.write(record)
+        writer.close()
+        reader = game_records.GameRecordReader(self.path)
+        self.assertEqual(len(reader), 2)
+        self.assertEqual(reader[1], self.records[1])
+        self.assertEqual(list(reader), self.records)
+        with self.assertRaises(IndexError):
+            reader[2]
+        reader.close()
+        self.assertEqual(os.path.getsize(game_records.index_path(self.path)), 16)
+
+    def test_append(self):
+        for record in self.records:
+            writer = game_records.GameRecordWriter(self.path)
+            writer.write(record)
+            writer.close()
+        self.assertEqual(writer.count, 2)
+        reader = game_records.GameRecordReader(self.path)
+        self.assertEqual(list(reader), self.records)
+        reader.close()
+        with self.assertRaises(RuntimeError):
+            game_records.GameRecordWriter(self.path, 5, 5)
+
+    def test_invalid_records(self):
+        with open(self.path, "wb") as record_file:
+            record_file.write(b"not a record file")
+        with self.assertRaises(RuntimeError):
+            game_records.GameRecordReader(self.path)
+        with self.assertRaises(RuntimeError):
+            game_records.GameRecordWriter(self.path)
+        with self.assertRaises(RuntimeError):
+            game_records.GameRecordWriter(os.path.join(self.directory, "large.rec"), 16, 16)
+
+    def test_tournament_records(self):
+        cpu_agents, test_agents = make_agents()
+        output = io.StringIO()
+        with redirect_stdout(output):
+            tournament.play_matches(cpu_agents, test_agents, 1, seed=5, time_limit=float("inf"),
+                                    record_path=self.path)
+        reader = game_records.GameRecordReader(self.path)
+        self.assertEqual(len(reader), 2 * len(cpu_agents) * len(test_agents))
+        for record in reader:
+            self.assertEqual(len(record.opening), 2)
+            self.assertEqual(len(record.move_times), len(record.moves))
+            # The loser is the player to move at the end of the game
+            game = game_records.replay(record)
+            self.assertEqual(game.active_player, "Player2" if record.winner == 1 else "Player1")
+            self.assertFalse(game.get_legal_moves())
+        reader.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+This file contains `child_features`, the vectorized counterpart of
+`extract_features` used to evaluate all the children of a search frontier
+node in one call.
+
+NumPy is an optional dependency of this module: it can be imported without
+NumPy, but `child_features` raises a RuntimeError if NumPy is not installed.
+"""
+from collections import namedtuple
+
+from .isolation import Board, knight_tables
+from .bitboard import BitBoard
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+ChildFeatures = namedtuple("ChildFeatures", ["utility", "player_mobility", "opponent_mobility",
+                                             "player_rows", "player_cols", "opponent_rows", "opponent_cols",
+                                             "blank_count", "blank_rows", "blank_cols"])
+ChildFeatures.__doc__ = """Board features of the children of a position from the point of view of
+one player, as NumPy arrays with one entry per child.
+
+utility : ndarray<float>
+    +inf if the player has won, -inf if the player has lost and 0 otherwise.
+
+player_mobility, opponent_mobility : ndarray<int>
+    The number of legal moves of the player and of its opponent.
+
+player_rows, player_cols, opponent_rows, opponent_cols : ndarray<float>
+    The location of the player and of its opponent.
+
+blank_count : int
+    The number of open cells, which is the same for every child.
+
+blank_rows, blank_cols : ndarray<float>
+    The mean row and column of the open cells (the blank centroid).
+"""
+
+# (width, height) -> (knight adjacency matrix, row of every cell, column of every cell)
+_ARRAYS = {}
+
+
+def _board_arrays(width, height):
+    """Return the NumPy form of the knight tables of a board size, built
+    from `knight_tables` and cached on first use.
+    """
+    key = (width, height)
+    arrays = _ARRAYS.get(key)
+    if arrays is None:
+        neighbors, coords = knight_tables(width, height)
+        adjacency = np.zeros((width * height, width * height), dtype=np.int64)
+        for idx, cell in enumerate(neighbors):
+            adjacency[idx, list(cell)] = 1
+        rows = np.array([row for row, _ in coords], dtype=np.float64)
+        cols = np.array([col for _, col in coords], dtype=np.float64)
+        arrays = _ARRAYS[key] = (adjacency, rows, cols)
+    return arrays
+
+
+def open_cells(game):
+    """Return the open cells of a board as a vector of 0/1 integers indexed
+    like the board state (index = row + col * height). Both the bitmask and
+    the list encodings are supported.
+    """
+    cells = game.width * game.height
+    if isinstance(game, BitBoard):
+        blocked = np.frombuffer(game._blocked.to_bytes((cells + 7) // 8, "little"), dtype=np.uint8)
+        return 1 - np.unpackbits(blocked, count=cells, bitorder="little").astype(np.int64)
+    return (np.array(game._board_state[:cells]) == Board.BLANK).astype(np.int64)
+
+
+def child_features(game, moves, player):
+    """Compute the features of every child of `game` reached by one of
+    `moves`, the legal moves of the active player, from the point of view of
+    `player`. The children are not created: their features are derived from
+    the parent with array operations.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        The parent position.
+
+    moves : list<(int, int)>
+        Legal moves of the active player of `game`.
+
+    player : object
+        One of the objects registered by the game object as a valid player.
+
+    Returns
+    -------
+    ChildFeatures
+        The features of the children, in the order of `moves`.
+    """
+    if np is None:
+        raise RuntimeError("NumPy is required for batch evaluation.")
+    adjacency, rows, cols = _board_arrays(game.width, game.height)
+    height = game.height
+    targets = np.array([row + col * height for row, col in moves], dtype=np.int64)
+    open_vector = open_cells(game)
+
+    # The mover can go from its new cell to every open target of that cell;
+    # the other player loses the new cell if it was one of its targets
+    mover_mobility = adjacency[targets] @ open_vector
+    other_idx = game._location_index(game.inactive_player)
+    if other_idx == Board.NOT_MOVED:
+        other_mobility = np.full(len(moves), game.blank_count() - 1, dtype=np.int64)
+        other_rows = other_cols = np.full(len(moves), np.nan)
+    else:
+        other_mobility = adjacency[other_idx] @ open_vector - adjacency[other_idx, targets]
+        other_rows = np.full(len(moves), rows[other_idx])
+        other_cols = np.full(len(moves), cols[other_idx])
+
+    # The other player is to move in every child, and loses without a move
+    blank_count = game.blank_count() - 1
+    mover_rows, mover_cols = rows[targets], cols[targets]
+    if player == game.active_player:
+        utility = np.where(other_mobility == 0, np.inf, 0.)
+        locations = (mover_rows, mover_cols, other_rows, other_cols)
+        player_mobility, opponent_mobility = mover_mobility, other_mobility
+    elif player == game.inactive_player:
+        utility = np.where(other_mobility == 0, -np.inf, 0.)
+        locations = (other_rows, other_cols, mover_rows, mover_cols)
+        player_mobility, opponent_mobility = other_mobility, mover_mobility
+    else:
+        raise RuntimeError("Invalid player in child_features: {}".format(player))
+
+    if blank_count:
+        blank_rows = (game._blank_row_sum - mover_rows) / blank_count
+        blank_cols = (game._blank_col_sum - mover_cols) / blank_count
+    else:
+        blank_rows = blank_cols = np.full(len(moves), np.nan)
+    return ChildFeatures(utility, player_mobility, opponent_mobility, *locations,
+                         blank_count, blank_rows, blank_cols)
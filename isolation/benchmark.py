@@ -0,0 +1,61 @@
+"""
+Throughput comparison of the `isolation.Board` backends.
+
+Every backend walks the same full-width game tree from the same opening
+with `get_legal_moves()` and `forecast_move()`, which is the work done per
+node by the search agents in game_agent.py. Run it with:
+
+    python -m isolation.benchmark
+"""
+import timeit
+
+from .isolation import Board
+from .bitboard import BitBoard
+
+BACKENDS = [("list", Board), ("bitboard", BitBoard)]
+
+
+def count_nodes(game, depth):
+    """Return the number of nodes in the full game tree below `game` down to
+    `depth` plies, including `game` itself.
+    """
+    if depth == 0:
+        return 1
+    nodes = 1
+    for move in game.get_legal_moves():
+        nodes += count_nodes(game.forecast_move(move), depth - 1)
+    return nodes
+
+
+def nodes_per_second(board_cls, depth, opening, width=7, height=7, repeat=3):
+    """Walk the game tree of a board of class `board_cls` after playing the
+    `opening` moves and return (nodes, seconds, nodes per second) for the
+    fastest of `repeat` runs.
+    """
+    game = board_cls("Player1", "Player2", width, height)
+    for move in opening:
+        game.apply_move(move)
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        nodes = count_nodes(game, depth)
+        elapsed = min(elapsed, timeit.default_timer() - start)
+    return nodes, elapsed, nodes / elapsed
+
+
+def compare_backends(depth=5, opening=((3, 3), (2, 4)), width=7, height=7):
+    """Print the nodes-per-second of every backend relative to the list
+    backend.
+    """
+    print("{:<10}{:>10}{:>10}{:>12}{:>9}".format(
+        "Backend", "Nodes", "Seconds", "Nodes/sec", "Speedup"))
+    baseline = None
+    for name, board_cls in BACKENDS:
+        nodes, elapsed, nps = nodes_per_second(board_cls, depth, opening, width, height)
+        baseline = baseline or nps
+        print("{:<10}{:>10}{:>10.3f}{:>12.0f}{:>8.2f}x".format(
+            name, nodes, elapsed, nps, nps / baseline))
+
+
+if __name__ == "__main__":
+    compare_backends()
@@ -0,0 +1,333 @@
+"""
+This file contains the `BitBoard` class, an alternative engine for the game
+Isolation that stores the blocked cells and the player locations as integer
+bitmasks instead of the list used by `isolation.Board`.
+
+Cells are numbered exactly as in `isolation.Board` (index = row + col *
+height), so bit `i` of a mask corresponds to `_board_state[i]` of the list
+backend. Copying a board is a handful of int assignments, and the legal moves
+of a player are the knight mask of its cell with the blocked cells removed.
+"""
+from .isolation import _GAME_IDS, Board, knight_tables, popcount, zobrist_keys
+
+# (width, height) -> tuple of knight-move bitmasks, one per cell index
+_KNIGHT_MASKS = {}
+
+
+def _knight_masks(width, height):
+    """Return the knight-move masks for a board of the given size, built from
+    the shared `knight_tables` and cached on first use.
+    """
+    key = (width, height)
+    masks = _KNIGHT_MASKS.get(key)
+    if masks is None:
+        neighbors, _ = knight_tables(width, height)
+        masks = _KNIGHT_MASKS[key] = tuple(
+            sum(1 << idx for idx in cell) for cell in neighbors)
+    return masks
+
+
+class BitBoard(Board):
+    """Bitmask implementation of the knight-move Isolation board.
+
+    The public interface is the same as `isolation.Board`, so a `BitBoard`
+    can be passed anywhere a `Board` is expected (agents, `play()`, the
+    tournament script).
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+    """
+
+    def __init__(self, player_1, player_2, width=7, height=7):
+        # The list-based state of the parent class is deliberately not
+        # allocated; every method that touches it is overridden below.
+        self.width = width
+        self.height = height
+        self.move_count = 0
+        # Copies of the board keep the identifier of the game
+        self.game_id = next(_GAME_IDS)
+        self._player_1 = player_1
+        self._player_2 = player_2
+        self._active_player = player_1
+        self._inactive_player = player_2
+
+        self._blocked = 0
+        self._p1_loc = Board.NOT_MOVED
+        self._p2_loc = Board.NOT_MOVED
+        self._all_cells = (1 << (width * height)) - 1
+        self._knight_masks = _knight_masks(width, height)
+        self._neighbors, self._coords = knight_tables(width, height)
+        self._zobrist = zobrist_keys(width, height)
+        self._hash = 0
+        self._blank_count = width * height
+        self._blank_row_sum = width * height * (height - 1) // 2
+        self._blank_col_sum = width * height * (width - 1) // 2
+        self._undo_stack = []
+
+    def hash(self):
+        """Return the 64-bit Zobrist key of the current state. The keys are
+        the same as those of `isolation.Board`, so both backends produce the
+        same key for the same position.
+        """
+        return self._hash
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return (self._hash == other._hash and self.width == other.width and
+                self.height == other.height and self._blocked == other._blocked and
+                self._p1_loc == other._p1_loc and self._p2_loc == other._p2_loc and
+                (self._active_player == self._player_2) == (other._active_player == other._player_2))
+
+    def copy(self):
+        """ Return a deep copy of the current board. The copy starts with an
+        empty undo history.
+        """
+        new_board = BitBoard.__new__(BitBoard)
+        new_board.width = self.width
+        new_board.height = self.height
+        new_board.move_count = self.move_count
+        new_board.game_id = self.game_id
+        new_board._player_1 = self._player_1
+        new_board._player_2 = self._player_2
+        new_board._active_player = self._active_player
+        new_board._inactive_player = self._inactive_player
+        new_board._blocked = self._blocked
+        new_board._p1_loc = self._p1_loc
+        new_board._p2_loc = self._p2_loc
+        new_board._all_cells = self._all_cells
+        new_board._knight_masks = self._knight_masks
+        new_board._neighbors = self._neighbors
+        new_board._coords = self._coords
+        new_board._zobrist = self._zobrist
+        new_board._hash = self._hash
+        new_board._blank_count = self._blank_count
+        new_board._blank_row_sum = self._blank_row_sum
+        new_board._blank_col_sum = self._blank_col_sum
+        new_board._undo_stack = []
+        return new_board
+
+    def move_is_legal(self, move):
+        """Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        -------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
+                not self._blocked >> (move[0] + move[1] * self.height) & 1)
+
+    def get_blank_spaces(self):
+        """Return a list of the locations that are still available on the board.
+        """
+        return self._mask_to_moves(self._all_cells & ~self._blocked)
+
+    def blank_mask(self):
+        """Return the blank cells as an integer bitmask (bit i = cell index i). """
+        return self._all_cells & ~self._blocked
+
+    def get_player_location(self, player):
+        """Find the current location of the specified player on the board.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        (int, int) or None
+            The coordinate pair (row, column) of the input player, or None
+            if the player has not moved.
+        """
+        idx = self._location_index(player)
+        if idx == Board.NOT_MOVED:
+            return Board.NOT_MOVED
+        return idx % self.height, idx // self.height
+
+    def get_legal_moves(self, player=None):
+        """Return the list of all legal moves for the specified player.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the legal moves for the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of all legal moves
+            for the player constrained by the current game state, in
+            increasing cell index order.
+        """
+        if player is None:
+            player = self._active_player
+        idx = self._location_index(player)
+        if idx == Board.NOT_MOVED:
+            return self.get_blank_spaces()
+        # Testing the (at most 8) knight targets against the blocked mask is
+        # cheaper in Python than extracting the set bits of the move mask
+        blocked = self._blocked
+        coords = self._coords
+        return [coords[i] for i in self._neighbors[idx] if not blocked >> i & 1]
+
+    def mobility(self, player=None):
+        """Return the number of legal moves of the specified player (the
+        active player if None), counted with a popcount of its move mask.
+        """
+        idx = self._location_index(self._active_player if player is None else player)
+        if idx == Board.NOT_MOVED:
+            return self._blank_count
+        return popcount(self._knight_masks[idx] & ~self._blocked)
+
+    def second_order_mobility(self, player=None):
+        """Return the number of moves available after each legal move of the
+        specified player (the active player if None), summed over its legal
+        moves.
+        """
+        idx = self._location_index(self._active_player if player is None else player)
+        masks = self._knight_masks
+        open_cells = self._all_cells & ~self._blocked
+        targets = range(self.width * self.height) if idx == Board.NOT_MOVED else self._neighbors[idx]
+        return sum(popcount(masks[i] & open_cells) for i in targets if open_cells >> i & 1)
+
+    def dead_cell_count(self):
+        """Return the number of blank cells that have no blank knight target.
+        The bitmask backend does not keep a degree map (it would make copies
+        expensive), so the open cells are tested one by one.
+        """
+        masks = self._knight_masks
+        open_cells = remaining = self._all_cells & ~self._blocked
+        count = 0
+        while remaining:
+            low = remaining & -remaining
+            if not masks[low.bit_length() - 1] & open_cells:
+                count += 1
+            remaining ^= low
+        return count
+
+    def apply_move(self, move):
+        """Move the active player to a specified location.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        idx = move[0] + move[1] * self.height
+        blocked_keys, p1_keys, p2_keys, side_key = self._zobrist
+        if self._active_player == self._player_2:
+            prev_idx, location_keys = self._p2_loc, p2_keys
+            self._p2_loc = idx
+        else:
+            prev_idx, location_keys = self._p1_loc, p1_keys
+            self._p1_loc = idx
+        self._undo_stack.append(prev_idx)
+        self._blocked |= 1 << idx
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count += 1
+        self._blank_count -= 1
+        self._blank_row_sum -= move[0]
+        self._blank_col_sum -= move[1]
+
+        self._hash ^= blocked_keys[idx] ^ location_keys[idx] ^ side_key
+        if prev_idx != Board.NOT_MOVED:
+            self._hash ^= location_keys[prev_idx]
+
+    def undo_move(self):
+        """Revert the last move applied to this board in-place, restoring the
+        exact state from before the matching call to apply_move().
+        """
+        if not self._undo_stack:
+            raise RuntimeError("There is no move to undo on this board.")
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count -= 1
+        blocked_keys, p1_keys, p2_keys, side_key = self._zobrist
+        prev_idx = self._undo_stack.pop()
+        if self._active_player == self._player_2:
+            idx, location_keys = self._p2_loc, p2_keys
+            self._p2_loc = prev_idx
+        else:
+            idx, location_keys = self._p1_loc, p1_keys
+            self._p1_loc = prev_idx
+        self._blocked &= ~(1 << idx)
+        row, col = self._coords[idx]
+        self._blank_count += 1
+        self._blank_row_sum += row
+        self._blank_col_sum += col
+
+        self._hash ^= blocked_keys[idx] ^ location_keys[idx] ^ side_key
+        if prev_idx != Board.NOT_MOVED:
+            self._hash ^= location_keys[prev_idx]
+
+    def to_string(self, symbols=['1', '2']):
+        """Generate a string representation of the current game state, marking
+        the location of each player and indicating which cells have been
+        blocked, and which remain open.
+        """
+        col_margin = len(str(self.height - 1)) + 1
+        prefix = "{:<" + "{}".format(col_margin) + "}"
+        offset = " " * (col_margin + 3)
+        out = offset + '   '.join(map(str, range(self.width))) + '\n\r'
+        for i in range(self.height):
+            out += prefix.format(i) + ' | '
+            for j in range(self.width):
+                idx = i + j * self.height
+                if not self._blocked >> idx & 1:
+                    out += ' '
+                elif self._p1_loc == idx:
+                    out += symbols[0]
+                elif self._p2_loc == idx:
+                    out += symbols[1]
+                else:
+                    out += '-'
+                out += ' | '
+            out += '\n\r'
+
+        return out
+
+    def _location_index(self, player):
+        """Return the cell index of the specified player, or NOT_MOVED. """
+        if player == self._player_1:
+            return self._p1_loc
+        elif player == self._player_2:
+            return self._p2_loc
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
+    def _mask_to_moves(self, mask):
+        """Convert a cell bitmask into a list of (row, column) pairs in
+        increasing cell index order.
+        """
+        coords = self._coords
+        moves = []
+        while mask:
+            low = mask & -mask
+            moves.append(coords[low.bit_length() - 1])
+            mask ^= low
+        return moves
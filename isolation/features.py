@@ -0,0 +1,60 @@
+"""
+This file contains `extract_features`, which computes the board features used
+by the evaluation functions in one pass over a game state.
+
+The heuristics of sample_players.py and game_agent.py all start with the
+same terminal tests (`is_loser()` and `is_winner()` each look up the mobility
+of the active player) and then look up the mobility of both players.
+Extracting the features once per node and sharing them avoids repeating these
+queries. The blank statistics are maintained by the board and are read from
+it directly (`blank_count()`, `blank_ratio()`, `blank_centroid()`).
+"""
+from collections import namedtuple
+
+Features = namedtuple("Features", ["utility", "player_mobility", "opponent_mobility"])
+Features.__doc__ = """Board features of a game state from the point of view of one player.
+
+utility : float
+    +inf if the player has won, -inf if the player has lost and 0 otherwise,
+    exactly as `Board.utility()`.
+
+player_mobility, opponent_mobility : int
+    The number of legal moves of the player and of its opponent.
+"""
+
+# Building the tuple directly skips the Python-level __new__ of namedtuple,
+# which costs as much as a move generation on the leaf evaluation path
+_new_features = tuple.__new__
+
+
+def extract_features(game, player):
+    """Compute the features of a game state from the point of view of
+    `player`, querying the mobility of each player only once.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        An instance of `isolation.Board` encoding the current state of the
+        game (e.g., player locations and blocked cells).
+
+    player : object
+        One of the objects registered by the game object as a valid player.
+
+    Returns
+    -------
+    Features
+        The features of the game state.
+    """
+    player_mobility = game.mobility(player)
+    opponent_mobility = game.mobility(game.get_opponent(player))
+
+    # Same rules as is_loser() and is_winner(): only a player to move without
+    # legal moves ends the game
+    utility = 0.
+    if player == game.active_player:
+        if not player_mobility:
+            utility = float("-inf")
+    elif not opponent_mobility:
+        utility = float("inf")
+
+    return _new_features(Features, (utility, player_mobility, opponent_mobility))
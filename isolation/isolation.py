@@ -7,12 +7,122 @@ You MAY use and modify this class, however ALL function signatures must
 remain compatible with the defaults provided, and none of your changes will
 be available to project reviewers.
 """
+import itertools
 import random
 import timeit
 from copy import copy
 
 TIME_LIMIT_MILLIS = 150
 
+_KNIGHT_DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                      (1, -2), (1, 2), (2, -1), (2, 1)]
+
+# Source of the game_id of new boards
+_GAME_IDS = itertools.count(1)
+
+# Number of set bits of a non-negative int; int.bit_count is new in Python 3.10
+popcount = getattr(int, "bit_count", None) or (lambda mask: bin(mask).count("1"))
+
+# (width, height) -> (neighbor table, cell coordinates) shared by all boards
+_KNIGHT_TABLES = {}
+
+
+def knight_tables(width, height):
+    """Return the precomputed knight-move tables for a board of the given
+    size, building and caching them on first use.
+
+    Cells are indexed as in the board state (index = row + col * height).
+
+    Returns
+    -------
+    (tuple<tuple<int>>, tuple<(int, int)>)
+        The in-bounds knight targets of every cell index, and the (row,
+        column) coordinate pair of every cell index.
+    """
+    key = (width, height)
+    tables = _KNIGHT_TABLES.get(key)
+    if tables is None:
+        coords = tuple((idx % height, idx // height) for idx in range(width * height))
+        neighbors = tuple(
+            tuple(r + dr + (c + dc) * height for dr, dc in _KNIGHT_DIRECTIONS
+                  if 0 <= r + dr < height and 0 <= c + dc < width)
+            for r, c in coords)
+        tables = _KNIGHT_TABLES[key] = (neighbors, coords)
+    return tables
+
+
+# (width, height) -> Zobrist keys shared by all boards
+_ZOBRIST_KEYS = {}
+
+
+def zobrist_keys(width, height):
+    """Return the 64-bit Zobrist keys for a board of the given size. The keys
+    are generated from a fixed seed, so they are identical between runs.
+
+    Returns
+    -------
+    (tuple<int>, tuple<int>, tuple<int>, int)
+        One key per cell index for a blocked cell, for the location of
+        player 1 and for the location of player 2, and the key toggled by
+        every move to encode the side to move.
+    """
+    key = (width, height)
+    keys = _ZOBRIST_KEYS.get(key)
+    if keys is None:
+        rng = random.Random("isolation-zobrist-{}x{}".format(width, height))
+        cells = width * height
+        keys = _ZOBRIST_KEYS[key] = (
+            tuple(rng.getrandbits(64) for _ in range(cells)),
+            tuple(rng.getrandbits(64) for _ in range(cells)),
+            tuple(rng.getrandbits(64) for _ in range(cells)),
+            rng.getrandbits(64))
+    return keys
+
+
+# (width, height) -> symmetry tables shared by all boards
+_SYMMETRY_TABLES = {}
+
+
+def symmetry_tables(width, height):
+    """Return the symmetries of a board of the given size: the 8 rotations
+    and reflections of a square board, or the 4 reflections (including the
+    identity and the half turn) that are valid on a rectangular board. The
+    first symmetry is the identity.
+
+    Returns
+    -------
+    (tuple<tuple<int>>, tuple<tuple<int>>, tuple<tuple<tuple<int>>>)
+        For every symmetry, the cell index each cell index is mapped to, the
+        inverse mapping, and the mapped bitmask of every value of every byte
+        of a cell bitmask (so a whole mask is mapped with one lookup per
+        8 cells).
+    """
+    key = (width, height)
+    tables = _SYMMETRY_TABLES.get(key)
+    if tables is None:
+        h, w = height - 1, width - 1
+        maps = [lambda r, c: (r, c), lambda r, c: (h - r, w - c),
+                lambda r, c: (h - r, c), lambda r, c: (r, w - c)]
+        if width == height:
+            maps += [lambda r, c: (c, h - r), lambda r, c: (w - c, r),
+                     lambda r, c: (c, r), lambda r, c: (w - c, h - r)]
+        cells = width * height
+        perms, inverses, byte_masks = [], [], []
+        for transform in maps:
+            perm = tuple(row + col * height for row, col in
+                         (transform(idx % height, idx // height) for idx in range(cells)))
+            inverse = [0] * cells
+            for idx, target in enumerate(perm):
+                inverse[target] = idx
+            perms.append(perm)
+            inverses.append(tuple(inverse))
+            byte_masks.append(tuple(
+                tuple(sum(1 << perm[8 * chunk + bit] for bit in range(8)
+                          if value >> bit & 1 and 8 * chunk + bit < cells) for value in range(256))
+                for chunk in range((cells + 7) // 8)))
+        tables = _SYMMETRY_TABLES[key] = (tuple(perms), tuple(inverses), tuple(byte_masks))
+    return tables
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
@@ -41,10 +151,15 @@ class Board(object):
         self.width = width
         self.height = height
         self.move_count = 0
+        # Copies of the board keep the identifier of the game
+        self.game_id = next(_GAME_IDS)
         self._player_1 = player_1
         self._player_2 = player_2
         self._active_player = player_1
         self._inactive_player = player_2
+        self._neighbors, self._coords = knight_tables(width, height)
+        self._zobrist = zobrist_keys(width, height)
+        self._hash = 0
 
         # The last 3 entries of the board state includes initiative (0 for
         # player 1, 1 for player 2) player 2 last move, and player 1 last move
@@ -52,8 +167,37 @@ class Board(object):
         self._board_state[-1] = Board.NOT_MOVED
         self._board_state[-2] = Board.NOT_MOVED
 
+        # Number of open cells and sums of their rows and columns, updated by
+        # apply_move() and undo_move() for the blank_*() queries
+        self._blank_count = width * height
+        self._blank_row_sum = width * height * (height - 1) // 2
+        self._blank_col_sum = width * height * (width - 1) // 2
+
+        # Number of open knight targets of every cell, and number of open
+        # cells that have none (no player can leave them), updated by
+        # apply_move() and undo_move() for the mobility queries
+        self._degree = [len(cell) for cell in self._neighbors]
+        self._dead_count = self._degree.count(0)
+
+        # Previous location of the player that made each applied move, used
+        # by undo_move() to restore the state
+        self._undo_stack = []
+
     def hash(self):
-        return str(self._board_state).__hash__()
+        """Return the 64-bit Zobrist key of the current state. The key covers
+        the blocked cells, the location of both players and the side to move,
+        and is updated incrementally by apply_move() and undo_move().
+        """
+        return self._hash
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return (self._hash == other._hash and self.width == other.width and
+                self.height == other.height and self._board_state == other._board_state)
 
     @property
     def active_player(self):
@@ -90,13 +234,50 @@ class Board(object):
             return self._active_player
         raise RuntimeError("`player` must be an object registered as a player in the current game.")
 
+    def replace_player(self, player, new_player):
+        """Register `new_player` in place of `player`, keeping the position,
+        the side to move and the hash of the board.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        new_player : hashable
+            The object that takes its place.
+        """
+        if player not in (self._player_1, self._player_2):
+            raise RuntimeError("`player` must be an object registered as a player in the current game.")
+        for attribute in ("_player_1", "_player_2", "_active_player", "_inactive_player"):
+            if getattr(self, attribute) == player:
+                setattr(self, attribute, new_player)
+
     def copy(self):
-        """ Return a deep copy of the current board. """
-        new_board = Board(self._player_1, self._player_2, width=self.width, height=self.height)
+        """ Return a deep copy of the current board. The copy starts with an
+        empty undo history, so undo_move() cannot revert moves that were
+        applied before the copy was made.
+        """
+        # Bypass __init__ so that the state list is allocated only once
+        new_board = Board.__new__(Board)
+        new_board.width = self.width
+        new_board.height = self.height
         new_board.move_count = self.move_count
+        new_board.game_id = self.game_id
+        new_board._player_1 = self._player_1
+        new_board._player_2 = self._player_2
         new_board._active_player = self._active_player
         new_board._inactive_player = self._inactive_player
+        new_board._neighbors = self._neighbors
+        new_board._coords = self._coords
+        new_board._zobrist = self._zobrist
+        new_board._hash = self._hash
         new_board._board_state = copy(self._board_state)
+        new_board._blank_count = self._blank_count
+        new_board._blank_row_sum = self._blank_row_sum
+        new_board._blank_col_sum = self._blank_col_sum
+        new_board._degree = copy(self._degree)
+        new_board._dead_count = self._dead_count
+        new_board._undo_stack = []
         return new_board
 
     def forecast_move(self, move):
@@ -136,12 +317,94 @@ class Board(object):
         return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
                 self._board_state[idx] == Board.BLANK)
 
+    def canonical_key(self):
+        """Return the canonical key of the current state and the symmetry
+        that produces it, as a pair (key, transform).
+
+        Positions related by a rotation or reflection of the board (see
+        `symmetry_tables()`) have the same key, and the key identifies a
+        position up to symmetry exactly: it packs one bit per blocked cell,
+        the cell index of player 1 and of player 2 (width * height if the
+        player has not moved) and the side to move, for the symmetry giving
+        the smallest value. Moves are mapped between the state and its
+        canonical orientation with transform_move() and
+        inverse_transform_move().
+        """
+        cells = self.width * self.height
+        perms, _, byte_masks = symmetry_tables(self.width, self.height)
+        blocked = ((1 << cells) - 1) & ~self.blank_mask()
+        blocked_bytes = blocked.to_bytes((cells + 7) // 8, "little")
+        locations = [self._location_index(self._player_1), self._location_index(self._player_2)]
+        shift = cells.bit_length()
+        side = self.move_count & 1
+
+        best_key = best_transform = None
+        for transform, perm in enumerate(perms):
+            masks = byte_masks[transform]
+            key = 0
+            for chunk, value in enumerate(blocked_bytes):
+                if value:
+                    key |= masks[chunk][value]
+            for offset, idx in enumerate(locations):
+                key |= (cells if idx is Board.NOT_MOVED else perm[idx]) << (cells + offset * shift)
+            if best_key is None or key < best_key:
+                best_key, best_transform = key, transform
+        return best_key | side << (cells + 2 * shift), best_transform
+
+    def transform_move(self, move, transform):
+        """Map `move` to the orientation given by `transform`, a symmetry
+        index returned by canonical_key().
+        """
+        perms, _, _ = symmetry_tables(self.width, self.height)
+        idx = perms[transform][move[0] + move[1] * self.height]
+        return idx % self.height, idx // self.height
+
+    def inverse_transform_move(self, move, transform):
+        """Map `move` from the orientation given by `transform` back to the
+        orientation of the board; the inverse of transform_move().
+        """
+        _, inverses, _ = symmetry_tables(self.width, self.height)
+        idx = inverses[transform][move[0] + move[1] * self.height]
+        return idx % self.height, idx // self.height
+
     def get_blank_spaces(self):
         """Return a list of the locations that are still available on the board.
         """
         return [(i, j) for j in range(self.width) for i in range(self.height)
                 if self._board_state[i + j * self.height] == Board.BLANK]
 
+    def blank_mask(self):
+        """Return the blank cells as an integer bitmask, where bit `i` is set
+        if the cell with index i = row + col * height is blank.
+        """
+        state = self._board_state
+        return sum(1 << idx for idx in range(self.width * self.height) if state[idx] == Board.BLANK)
+
+    def blank_count(self):
+        """Return the number of cells that are still available on the board.
+        The count is maintained by apply_move() and undo_move().
+        """
+        return self._blank_count
+
+    def blank_ratio(self):
+        """Return the fraction of the cells of the board that are still
+        available, between 0 and 1.
+        """
+        return self._blank_count / float(self.width * self.height)
+
+    def blank_centroid(self):
+        """Return the mean (row, column) of the cells that are still available
+        on the board, or None if every cell is blocked.
+
+        The sums of the coordinates of the open cells are maintained by
+        apply_move() and undo_move(), so unlike averaging get_blank_spaces()
+        this does not scan the board.
+        """
+        count = self._blank_count
+        if not count:
+            return None
+        return float(self._blank_row_sum / count), float(self._blank_col_sum / count)
+
     def get_player_location(self, player):
         """Find the current location of the specified player on the board.
 
@@ -184,11 +447,47 @@ class Board(object):
         -------
         list<(int, int)>
             The list of coordinate pairs (row, column) of all legal moves
-            for the player constrained by the current game state.
+            for the player constrained by the current game state. The order
+            is deterministic; callers that want a random order must shuffle
+            the list themselves.
         """
         if player is None:
             player = self.active_player
-        return self.__get_moves(self.get_player_location(player))
+        if player == self._player_1:
+            return self.__get_moves(self._board_state[-1])
+        elif player == self._player_2:
+            return self.__get_moves(self._board_state[-2])
+        raise RuntimeError(
+            "Invalid player in get_legal_moves: {}".format(player))
+
+    def mobility(self, player=None):
+        """Return the number of legal moves of the specified player (the
+        active player if None), the same value as len(get_legal_moves()),
+        from the maintained degree map.
+        """
+        idx = self._location_index(self._active_player if player is None else player)
+        if idx == Board.NOT_MOVED:
+            return self._blank_count
+        return self._degree[idx]
+
+    def second_order_mobility(self, player=None):
+        """Return the number of moves available after each legal move of the
+        specified player (the active player if None), summed over its legal
+        moves.
+        """
+        idx = self._location_index(self._active_player if player is None else player)
+        state = self._board_state
+        degree = self._degree
+        if idx == Board.NOT_MOVED:
+            return sum(degree[i] for i in range(self.width * self.height) if state[i] == Board.BLANK)
+        return sum(degree[i] for i in self._neighbors[idx] if state[i] == Board.BLANK)
+
+    def dead_cell_count(self):
+        """Return the number of blank cells that have no blank knight target.
+        A player moving to a dead cell has no move left afterwards, so dead
+        cells only count as a final move.
+        """
+        return self._dead_count
 
     def apply_move(self, move):
         """Move the active player to a specified location.
@@ -201,19 +500,78 @@ class Board(object):
         """
         idx = move[0] + move[1] * self.height
         last_move_idx = int(self.active_player == self._player_2) + 1
+        prev_idx = self._board_state[-last_move_idx]
+        self._undo_stack.append(prev_idx)
         self._board_state[-last_move_idx] = idx
         self._board_state[idx] = 1
         self._board_state[-3] ^= 1
+        self._blank_count -= 1
+        self._blank_row_sum -= move[0]
+        self._blank_col_sum -= move[1]
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
 
+        state = self._board_state
+        degree = self._degree
+        dead_count = self._dead_count - (not degree[idx])
+        for i in self._neighbors[idx]:
+            degree[i] -= 1
+            if not degree[i] and state[i] == Board.BLANK:
+                dead_count += 1
+        self._dead_count = dead_count
+
+        # The location keys of player 1 and 2 are entries 1 and 2 of the table
+        blocked_keys, _, _, side_key = self._zobrist
+        location_keys = self._zobrist[last_move_idx]
+        self._hash ^= blocked_keys[idx] ^ location_keys[idx] ^ side_key
+        if prev_idx != Board.NOT_MOVED:
+            self._hash ^= location_keys[prev_idx]
+
+    def undo_move(self):
+        """Revert the last move applied to this board in-place, restoring the
+        exact state from before the matching call to apply_move().
+
+        Together with apply_move() this allows a search to walk the game tree
+        on a single board instead of creating a copy for every node. Only
+        legal moves (moves to a blank cell) can be reverted exactly.
+        """
+        if not self._undo_stack:
+            raise RuntimeError("There is no move to undo on this board.")
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count -= 1
+        last_move_idx = int(self._active_player == self._player_2) + 1
+        idx = self._board_state[-last_move_idx]
+        prev_idx = self._undo_stack.pop()
+        self._board_state[idx] = Board.BLANK
+        self._board_state[-last_move_idx] = prev_idx
+        self._board_state[-3] ^= 1
+        row, col = self._coords[idx]
+        self._blank_count += 1
+        self._blank_row_sum += row
+        self._blank_col_sum += col
+
+        state = self._board_state
+        degree = self._degree
+        dead_count = self._dead_count + (not degree[idx])
+        for i in self._neighbors[idx]:
+            if not degree[i] and state[i] == Board.BLANK:
+                dead_count -= 1
+            degree[i] += 1
+        self._dead_count = dead_count
+
+        blocked_keys, _, _, side_key = self._zobrist
+        location_keys = self._zobrist[last_move_idx]
+        self._hash ^= blocked_keys[idx] ^ location_keys[idx] ^ side_key
+        if prev_idx != Board.NOT_MOVED:
+            self._hash ^= location_keys[prev_idx]
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
-        return player == self._inactive_player and not self.get_legal_moves(self._active_player)
+        return player == self._inactive_player and not self.mobility(self._active_player)
 
     def is_loser(self, player):
         """ Test whether the specified player has lost the game. """
-        return player == self._active_player and not self.get_legal_moves(self._active_player)
+        return player == self._active_player and not self.mobility(self._active_player)
 
     def utility(self, player):
         """Returns the utility of the current game state from the perspective
@@ -247,20 +605,26 @@ class Board(object):
 
         return 0.
 
-    def __get_moves(self, loc):
+    def _location_index(self, player):
+        """Return the cell index of the specified player, or NOT_MOVED. """
+        if player == self._player_1:
+            return self._board_state[-1]
+        elif player == self._player_2:
+            return self._board_state[-2]
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
+    def __get_moves(self, loc_idx):
         """Generate the list of possible moves for an L-shaped motion (like a
-        knight in chess).
+        knight in chess) from the cell index `loc_idx`.
         """
-        if loc == Board.NOT_MOVED:
+        if loc_idx == Board.NOT_MOVED:
             return self.get_blank_spaces()
 
-        r, c = loc
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2), (1, 2), (2, -1), (2, 1)]
-        valid_moves = [(r + dr, c + dc) for dr, dc in directions
-                       if self.move_is_legal((r + dr, c + dc))]
-        random.shuffle(valid_moves)
-        return valid_moves
+        state = self._board_state
+        coords = self._coords
+        return [coords[idx] for idx in self._neighbors[loc_idx]
+                if state[idx] == Board.BLANK]
 
     def print_board(self):
         """DEPRECATED - use Board.to_string()"""
@@ -295,7 +659,7 @@ class Board(object):
 
         return out
 
-    def play(self, time_limit=TIME_LIMIT_MILLIS):
+    def play(self, time_limit=TIME_LIMIT_MILLIS, ponder=False, move_times=None):
         """Execute a match between the players by alternately soliciting them
         to select a move and applying it in the game.
 
@@ -305,6 +669,19 @@ class Board(object):
             The maximum number of milliseconds to allow before timeout
             during each turn.
 
+        ponder : bool (optional)
+            Let the players think on the opponent's time: after every move,
+            the player that moved is given a copy of the board through its
+            start_ponder(game) method, and its stop_ponder() method is called
+            before its next get_move(). At the end of the game, its
+            end_ponder() method is called to release the resources of
+            pondering, or stop_ponder() if it has none. Players without
+            these methods do not ponder.
+
+        move_times : list (optional)
+            A list that receives the number of milliseconds taken by every
+            move of the returned move history, in the same order.
+
         Returns
         ----------
         (player, list<[(int, int),]>, str)
@@ -316,27 +693,47 @@ class Board(object):
 
         time_millis = lambda: 1000 * timeit.default_timer()
 
-        while True:
-
-            legal_player_moves = self.get_legal_moves()
-            game_copy = self.copy()
-
-            move_start = time_millis()
-            time_left = lambda : time_limit - (time_millis() - move_start)
-            curr_move = self._active_player.get_move(game_copy, time_left)
-            move_end = time_left()
-
-            if curr_move is None:
-                curr_move = Board.NOT_MOVED
-
-            if move_end < 0:
-                return self._inactive_player, move_history, "timeout"
-
-            if curr_move not in legal_player_moves:
-                if len(legal_player_moves) > 0:
-                    return self._inactive_player, move_history, "forfeit"
-                return self._inactive_player, move_history, "illegal move"
-
-            move_history.append(list(curr_move))
-
-            self.apply_move(curr_move)
+        try:
+            while True:
+
+                legal_player_moves = self.get_legal_moves()
+                game_copy = self.copy()
+
+                if ponder:
+                    stop_ponder = getattr(self._active_player, "stop_ponder", None)
+                    if stop_ponder is not None:
+                        stop_ponder()
+
+                move_start = time_millis()
+                time_left = lambda : time_limit - (time_millis() - move_start)
+                curr_move = self._active_player.get_move(game_copy, time_left)
+                move_end = time_left()
+                move_time = time_millis() - move_start
+
+                if curr_move is None:
+                    curr_move = Board.NOT_MOVED
+
+                if move_end < 0:
+                    return self._inactive_player, move_history, "timeout"
+
+                if curr_move not in legal_player_moves:
+                    if len(legal_player_moves) > 0:
+                        return self._inactive_player, move_history, "forfeit"
+                    return self._inactive_player, move_history, "illegal move"
+
+                move_history.append(list(curr_move))
+                if move_times is not None:
+                    move_times.append(move_time)
+
+                self.apply_move(curr_move)
+
+                if ponder:
+                    start_ponder = getattr(self._inactive_player, "start_ponder", None)
+                    if start_ponder is not None:
+                        start_ponder(self.copy())
+        finally:
+            if ponder:
+                for player in (self._player_1, self._player_2):
+                    end_ponder = getattr(player, "end_ponder", None) or getattr(player, "stop_ponder", None)
+                    if end_ponder is not None:
+                        end_ponder()
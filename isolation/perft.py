@@ -0,0 +1,157 @@
+"""
+Perft-style correctness and throughput suite for the `isolation.Board`
+backends.
+
+`perft(game, depth)` counts the positions reachable in exactly `depth` plies
+(games that end earlier contribute nothing), walking the tree in-place with
+apply_move() and undo_move(). The counts of the reference positions below
+are stored, so any backend that generates or applies moves differently from
+the list backend fails the check. The suite also reports the positions per
+second of the individual board operations. Run it with:
+
+    python -m isolation.perft [--backend NAME] [--depth N]
+"""
+import argparse
+import timeit
+
+from .isolation import Board
+from .bitboard import BitBoard
+
+BACKENDS = [("list", Board), ("bitboard", BitBoard)]
+
+# (name, width, height, opening moves, {depth: perft count})
+REFERENCE_POSITIONS = [
+    ("5x5 empty", 5, 5, (), {1: 25, 2: 600, 3: 2208, 4: 7712, 5: 24160}),
+    ("5x5 corner", 5, 5, ((0, 0), (2, 2)),
+     {1: 2, 2: 16, 3: 80, 4: 144, 5: 352, 6: 824, 7: 1840, 8: 4888, 9: 8920}),
+    ("7x7 empty", 7, 7, (), {1: 49, 2: 2352, 3: 11280, 4: 52672}),
+    ("7x7 opening", 7, 7, ((3, 3), (2, 4)), {1: 8, 2: 62, 3: 296, 4: 1144, 5: 3984, 6: 14124, 7: 52044}),
+    ("7x7 midgame", 7, 7, ((6, 2), (2, 1), (5, 4), (4, 2), (3, 3), (2, 3), (4, 5), (0, 2), (5, 3), (1, 0)),
+     {1: 5, 2: 10, 3: 36, 4: 188, 5: 585, 6: 1864, 7: 5269, 8: 13341, 9: 34920, 10: 88067}),
+    ("9x9 opening", 9, 9, ((4, 4), (0, 0)), {1: 8, 2: 16, 3: 112, 4: 542, 5: 2474, 6: 11524, 7: 54412}),
+]
+
+
+def perft(game, depth):
+    """Return the number of positions reached from `game` in exactly `depth`
+    plies. The board is walked in-place and left unchanged.
+    """
+    if depth == 0:
+        return 1
+    legal_moves = game.get_legal_moves()
+    if depth == 1:
+        return len(legal_moves)
+    count = 0
+    for move in legal_moves:
+        game.apply_move(move)
+        count += perft(game, depth - 1)
+        game.undo_move()
+    return count
+
+
+def reference_board(board_cls, width, height, opening):
+    """Return a board of class `board_cls` with the `opening` moves applied. """
+    game = board_cls("Player1", "Player2", width, height)
+    for move in opening:
+        game.apply_move(move)
+    return game
+
+
+def check_backend(board_cls, max_depth=None):
+    """Compare the perft counts of `board_cls` on every reference position
+    with the stored values, up to `max_depth` plies.
+
+    Returns
+    -------
+    list<(str, int, int, int)>
+        The (position name, depth, expected, actual) of every mismatch.
+    """
+    mismatches = []
+    for name, width, height, opening, counts in REFERENCE_POSITIONS:
+        for depth, expected in sorted(counts.items()):
+            if max_depth is not None and depth > max_depth:
+                break
+            actual = perft(reference_board(board_cls, width, height, opening), depth)
+            if actual != expected:
+                mismatches.append((name, depth, expected, actual))
+    return mismatches
+
+
+def sample_positions(board_cls, depth=3):
+    """Return independent copies of every non-terminal position within
+    `depth` plies of the reference positions, with one legal move each.
+    """
+    samples = []
+
+    def collect(game, remaining):
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return
+        samples.append((game.copy(), legal_moves[len(legal_moves) // 2]))
+        if remaining:
+            for move in legal_moves:
+                collect(game.forecast_move(move), remaining - 1)
+
+    for _, width, height, opening, _ in REFERENCE_POSITIONS:
+        collect(reference_board(board_cls, width, height, opening), depth)
+    return samples
+
+
+def operation_rates(board_cls, samples=None, repeat=3):
+    """Time every board operation over the sample positions and return a
+    dictionary of operation name -> positions per second, for the fastest of
+    `repeat` runs. apply_move is paired with undo_move to restore the sample.
+    """
+    samples = samples or sample_positions(board_cls)
+
+    def legal_moves():
+        for game, _ in samples:
+            game.get_legal_moves()
+
+    def apply_move():
+        for game, move in samples:
+            game.apply_move(move)
+            game.undo_move()
+
+    def forecast_move():
+        for game, move in samples:
+            game.forecast_move(move)
+
+    def copy():
+        for game, _ in samples:
+            game.copy()
+
+    rates = {}
+    for name, operation in (("get_legal_moves", legal_moves), ("apply_move", apply_move),
+                            ("forecast_move", forecast_move), ("copy", copy)):
+        elapsed = min(timeit.repeat(operation, number=1, repeat=repeat))
+        rates[name] = len(samples) / elapsed
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft suite for the isolation board backends")
+    parser.add_argument("--backend", choices=[name for name, _ in BACKENDS], action="append",
+                        help="backend to test, may be repeated (default: all)")
+    parser.add_argument("--depth", type=int, default=None,
+                        help="maximum perft depth to check (default: every stored depth)")
+    args = parser.parse_args()
+
+    failed = False
+    for name, board_cls in BACKENDS:
+        if args.backend and name not in args.backend:
+            continue
+        start = timeit.default_timer()
+        mismatches = check_backend(board_cls, args.depth)
+        elapsed = timeit.default_timer() - start
+        failed = failed or bool(mismatches)
+        print("{}: perft {} in {:.2f}s".format(name, "FAILED" if mismatches else "ok", elapsed))
+        for position, depth, expected, actual in mismatches:
+            print("  {} depth {}: expected {}, got {}".format(position, depth, expected, actual))
+        for operation, rate in operation_rates(board_cls).items():
+            print("  {:<16}{:>12.0f} positions/sec".format(operation, rate))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
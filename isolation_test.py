@@ -0,0 +1,388 @@
+"""Unit tests for the `isolation` board backends."""
+
+import math
+import random
+import unittest
+
+import isolation
+import game_agent
+
+from isolation import perft
+from sample_players import improved_score
+
+
+class KnightTablesTest(unittest.TestCase):
+    """Move generation from the shared knight-move tables"""
+
+    def test_tables_are_shared(self):
+        board_a = isolation.Board("Player1", "Player2", 5, 6)
+        board_b = isolation.Board("Player1", "Player2", 5, 6)
+        self.assertIs(board_a._neighbors, board_b._neighbors)
+        self.assertIs(board_a._neighbors, isolation.knight_tables(5, 6)[0])
+
+    def test_corner_and_centre_targets(self):
+        neighbors, coords = isolation.knight_tables(7, 7)
+        self.assertEqual(sorted(coords[idx] for idx in neighbors[0]), [(1, 2), (2, 1)])
+        self.assertEqual(len(neighbors[3 + 3 * 7]), 8)
+
+    def test_legal_moves_are_deterministic(self):
+        board = isolation.Board("Player1", "Player2")
+        board.apply_move((3, 3))
+        board.apply_move((0, 0))
+        expected = board.get_legal_moves()
+        self.assertEqual(len(expected), 8)
+        for _ in range(10):
+            self.assertEqual(board.get_legal_moves(), expected)
+
+
+class BitBoardTest(unittest.TestCase):
+    """The bitmask backend must behave exactly like the list backend"""
+
+    def play_random_game(self, width, height, seed):
+        rng = random.Random(seed)
+        board = isolation.Board("Player1", "Player2", width, height)
+        bitboard = isolation.BitBoard("Player1", "Player2", width, height)
+        while True:
+            for player in ("Player1", "Player2"):
+                self.assertEqual(board.get_player_location(player),
+                                 bitboard.get_player_location(player))
+                self.assertEqual(sorted(board.get_legal_moves(player)),
+                                 sorted(bitboard.get_legal_moves(player)))
+                self.assertEqual(board.is_winner(player), bitboard.is_winner(player))
+                self.assertEqual(board.utility(player), bitboard.utility(player))
+            self.assertEqual(board.get_blank_spaces(), bitboard.get_blank_spaces())
+            self.assertEqual(board.to_string(), bitboard.to_string())
+            moves = sorted(board.get_legal_moves())
+            if not moves:
+                return
+            move = rng.choice(moves)
+            self.assertEqual(sorted(board.forecast_move(move).get_legal_moves()),
+                             sorted(bitboard.forecast_move(move).get_legal_moves()))
+            board.apply_move(move)
+            bitboard.apply_move(move)
+            self.assertEqual(board.move_count, bitboard.move_count)
+
+    def test_matches_list_backend(self):
+        for seed, (width, height) in enumerate([(7, 7), (5, 5), (9, 6), (4, 8)]):
+            self.play_random_game(width, height, seed)
+
+    def test_copy_is_independent(self):
+        bitboard = isolation.BitBoard("Player1", "Player2")
+        bitboard.apply_move((3, 3))
+        clone = bitboard.copy()
+        clone.apply_move((0, 0))
+        self.assertEqual(bitboard.get_player_location("Player2"), None)
+        self.assertEqual(clone.get_player_location("Player2"), (0, 0))
+        self.assertIn((0, 0), bitboard.get_blank_spaces())
+
+    def test_game_id_shared_by_copies(self):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            board = board_class("Player1", "Player2")
+            board.apply_move((3, 3))
+            self.assertEqual(board.copy().game_id, board.game_id)
+            self.assertEqual(board.forecast_move((2, 2)).game_id, board.game_id)
+            self.assertNotEqual(board_class("Player1", "Player2").game_id, board.game_id)
+
+    def test_replace_player(self):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            board = board_class("Player1", "Player2")
+            for move in ((3, 3), (2, 4), (1, 5)):
+                board.apply_move(move)
+            key = board.hash()
+            board.replace_player("Player1", "Other")
+            self.assertEqual((board.active_player, board.inactive_player), ("Player2", "Other"))
+            self.assertEqual(board.get_player_location("Other"), (1, 5))
+            self.assertEqual(board.hash(), key)
+            with self.assertRaises(RuntimeError):
+                board.replace_player("Player1", "Player3")
+
+    def test_agents_play_on_bitboard(self):
+        player1 = game_agent.AlphaBetaPlayer(search_depth=3, score_fn=improved_score)
+        player2 = game_agent.MinimaxPlayer(search_depth=2, score_fn=improved_score)
+        game = isolation.BitBoard(player1, player2)
+        winner, history, termination = game.play(time_limit=float("inf"))
+        self.assertIn(winner, (player1, player2))
+        self.assertEqual(termination, "illegal move")
+
+
+class UndoMoveTest(unittest.TestCase):
+    """undo_move() must restore the exact state before apply_move()"""
+
+    def snapshot(self, board):
+        return (board.to_string(), board.move_count, board.active_player,
+                board.get_player_location("Player1"), board.get_player_location("Player2"),
+                board.get_legal_moves(), board.get_blank_spaces(), board.blank_count(), board.blank_centroid(),
+                board.mobility("Player1"), board.mobility("Player2"), board.dead_cell_count())
+
+    def check_backend(self, board_cls, seed):
+        rng = random.Random(seed)
+        board = board_cls("Player1", "Player2", 6, 5)
+        history = [self.snapshot(board)]
+        while board.get_legal_moves():
+            for move in board.get_legal_moves():
+                board.apply_move(move)
+                board.undo_move()
+                self.assertEqual(self.snapshot(board), history[-1])
+            board.apply_move(rng.choice(board.get_legal_moves()))
+            history.append(self.snapshot(board))
+        while len(history) > 1:
+            history.pop()
+            board.undo_move()
+            self.assertEqual(self.snapshot(board), history[-1])
+        self.assertRaises(RuntimeError, board.undo_move)
+
+    def test_list_backend(self):
+        self.check_backend(isolation.Board, 0)
+
+    def test_bitboard_backend(self):
+        self.check_backend(isolation.BitBoard, 1)
+
+    def test_copy_has_own_history(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            board = board_cls("Player1", "Player2")
+            board.apply_move((3, 3))
+            clone = board.copy()
+            self.assertRaises(RuntimeError, clone.undo_move)
+            clone.apply_move((0, 0))
+            clone.undo_move()
+            board.undo_move()
+            self.assertEqual(clone.get_player_location("Player1"), (3, 3))
+            self.assertEqual(board.get_player_location("Player1"), None)
+
+
+class ZobristHashTest(unittest.TestCase):
+    """The incremental Zobrist key must always match the position"""
+
+    def reference_hash(self, board):
+        blocked_keys, p1_keys, p2_keys, side_key = isolation.zobrist_keys(board.width, board.height)
+        key = side_key if board.move_count % 2 else 0
+        for idx, (r, c) in enumerate(isolation.knight_tables(board.width, board.height)[1]):
+            if (r, c) not in board.get_blank_spaces():
+                key ^= blocked_keys[idx]
+            if (r, c) == board.get_player_location("Player1"):
+                key ^= p1_keys[idx]
+            if (r, c) == board.get_player_location("Player2"):
+                key ^= p2_keys[idx]
+        return key
+
+    def test_incremental_updates(self):
+        rng = random.Random(2)
+        board = isolation.Board("Player1", "Player2", 5, 7)
+        bitboard = isolation.BitBoard("Player1", "Player2", 5, 7)
+        hashes = [board.hash()]
+        while board.get_legal_moves():
+            move = rng.choice(board.get_legal_moves())
+            board.apply_move(move)
+            bitboard.apply_move(move)
+            self.assertEqual(board.hash(), self.reference_hash(board))
+            self.assertEqual(board.hash(), bitboard.hash())
+            self.assertEqual(hash(board), hash(bitboard))
+            hashes.append(board.hash())
+        self.assertEqual(len(set(hashes)), len(hashes))
+        while len(hashes) > 1:
+            hashes.pop()
+            board.undo_move()
+            bitboard.undo_move()
+            self.assertEqual(board.hash(), hashes[-1])
+            self.assertEqual(bitboard.hash(), hashes[-1])
+
+    def test_transpositions_share_dict_entries(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            first = board_cls("Player1", "Player2")
+            second = board_cls("Player1", "Player2")
+            for move in [(3, 3), (0, 0), (1, 4), (2, 2), (3, 6), (4, 3)]:
+                first.apply_move(move)
+            for move in [(1, 4), (0, 0), (3, 3), (2, 2), (3, 6), (4, 3)]:
+                second.apply_move(move)
+            self.assertEqual(first, second)
+            self.assertEqual({first: "value"}[second], "value")
+            second.undo_move()
+            self.assertNotEqual(first, second)
+            self.assertNotEqual(first.hash(), second.hash())
+
+
+class BlankStatisticsTest(unittest.TestCase):
+    """The incremental blank statistics must match a scan of the open cells"""
+
+    def check_board(self, board):
+        blanks = board.get_blank_spaces()
+        self.assertEqual(board.blank_count(), len(blanks))
+        self.assertEqual(board.blank_ratio(), len(blanks) / float(board.width * board.height))
+        if blanks:
+            self.assertEqual(board.blank_centroid(), (float(sum(r for r, _ in blanks) / len(blanks)),
+                                                      float(sum(c for _, c in blanks) / len(blanks))))
+        else:
+            self.assertIsNone(board.blank_centroid())
+
+    def test_random_games(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for seed, (width, height) in enumerate([(7, 7), (5, 5), (9, 6), (4, 8)]):
+                rng = random.Random(seed)
+                board = board_cls("Player1", "Player2", width, height)
+                self.check_board(board)
+                while board.get_legal_moves():
+                    board = board.forecast_move(rng.choice(board.get_legal_moves()))
+                    self.check_board(board)
+
+    def test_full_board(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            board = board_cls("Player1", "Player2", 2, 1)
+            board.apply_move((0, 0))
+            board.apply_move((0, 1))
+            self.check_board(board)
+            self.assertEqual(board.blank_ratio(), 0.)
+
+
+class DegreeMapTest(unittest.TestCase):
+    """The mobility queries must match counts of the generated moves"""
+
+    def check_board(self, board):
+        neighbors, _ = isolation.knight_tables(board.width, board.height)
+        blanks = set(board.get_blank_spaces())
+        cells = {(idx % board.height, idx // board.height): idx for idx in range(board.width * board.height)}
+        for player in ("Player1", "Player2"):
+            self.assertEqual(board.mobility(player), len(board.get_legal_moves(player)))
+        self.assertEqual(board.mobility(), len(board.get_legal_moves()))
+        self.assertEqual(board.second_order_mobility(),
+                         sum(len(board.forecast_move(move).get_legal_moves(board.active_player))
+                             for move in board.get_legal_moves()))
+        dead = [cell for cell in blanks
+                if not any(board.move_is_legal((i % board.height, i // board.height)) for i in neighbors[cells[cell]])]
+        self.assertEqual(board.dead_cell_count(), len(dead))
+
+    def test_random_games(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for seed, (width, height) in enumerate([(7, 7), (5, 5), (9, 6), (3, 3)]):
+                rng = random.Random(seed)
+                board = board_cls("Player1", "Player2", width, height)
+                self.check_board(board)
+                while board.get_legal_moves():
+                    board.apply_move(rng.choice(board.get_legal_moves()))
+                    self.check_board(board)
+                    self.check_board(board.copy())
+
+    def test_undo_restores_degrees(self):
+        board = isolation.Board("Player1", "Player2")
+        degrees = list(board._degree)
+        for move in [(3, 3), (2, 4), (1, 5), (0, 2)]:
+            board.apply_move(move)
+        for _ in range(4):
+            board.undo_move()
+        self.assertEqual(board._degree, degrees)
+        self.assertEqual(board.dead_cell_count(), 0)
+
+
+class SymmetryTest(unittest.TestCase):
+    """Positions related by a symmetry of the board share a canonical key"""
+
+    def test_symmetry_counts(self):
+        self.assertEqual(len(isolation.symmetry_tables(7, 7)[0]), 8)
+        self.assertEqual(len(isolation.symmetry_tables(6, 4)[0]), 4)
+        # One key per orbit of the first move: 10 on 7x7, 6 on 6x4
+        for (width, height), orbits in (((7, 7), 10), ((6, 4), 6)):
+            board = isolation.Board("Player1", "Player2", width, height)
+            keys = {board.forecast_move(move).canonical_key()[0] for move in board.get_legal_moves()}
+            self.assertEqual(len(keys), orbits)
+
+    def test_random_games(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for seed, (width, height) in enumerate([(7, 7), (5, 5), (6, 4)]):
+                rng = random.Random(seed)
+                board = board_cls("Player1", "Player2", width, height)
+                moves = []
+                while board.get_legal_moves():
+                    moves.append(rng.choice(board.get_legal_moves()))
+                    board.apply_move(moves[-1])
+                    key, transform = board.canonical_key()
+                    canonical_moves = {board.transform_move(move, transform) for move in board.get_legal_moves()}
+                    for symmetry in range(len(isolation.symmetry_tables(width, height)[0])):
+                        image = board_cls("Player1", "Player2", width, height)
+                        for move in moves:
+                            image.apply_move(board.transform_move(move, symmetry))
+                        image_key, image_transform = image.canonical_key()
+                        self.assertEqual(image_key, key)
+                        self.assertEqual({image.transform_move(move, image_transform)
+                                          for move in image.get_legal_moves()}, canonical_moves)
+                    for move in board.get_legal_moves():
+                        self.assertEqual(board.inverse_transform_move(board.transform_move(move, transform),
+                                                                      transform), move)
+
+
+class FeaturesTest(unittest.TestCase):
+    """The extracted features must match the values computed from the
+    public Board methods, on both backends.
+    """
+
+    def random_positions(self, board_cls, seed, width=7, height=7):
+        rng = random.Random(seed)
+        board = board_cls("Player1", "Player2", width, height)
+        while True:
+            yield board
+            moves = board.get_legal_moves()
+            if not moves:
+                return
+            board.apply_move(rng.choice(moves))
+
+    def test_matches_board_methods(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for seed, (width, height) in enumerate([(7, 7), (5, 5), (9, 6)]):
+                for board in self.random_positions(board_cls, seed, width, height):
+                    for player in ("Player1", "Player2"):
+                        features = isolation.extract_features(board, player)
+                        self.assertEqual(features.utility, board.utility(player))
+                        self.assertEqual(features.player_mobility, len(board.get_legal_moves(player)))
+                        self.assertEqual(features.opponent_mobility,
+                                         len(board.get_legal_moves(board.get_opponent(player))))
+
+    def test_heuristics_unchanged(self):
+        # Reference implementation of improved_score with the terminal tests
+        def reference_improved(game, player):
+            if game.is_loser(player):
+                return float("-inf")
+            if game.is_winner(player):
+                return float("inf")
+            return float(len(game.get_legal_moves(player)) -
+                         len(game.get_legal_moves(game.get_opponent(player))))
+
+        for board in self.random_positions(isolation.Board, 3):
+            if board.move_count < 2:
+                continue
+            for player in ("Player1", "Player2"):
+                self.assertEqual(improved_score(board, player), reference_improved(board, player))
+                score = game_agent.custom_score(board, player)
+                if math.isinf(score):
+                    self.assertEqual(score, board.utility(player))
+                else:
+                    player_moves, opponent_moves = game_agent.get_open_moves(board, player)
+                    blank_perc = len(board.get_blank_spaces()) / float(board.width * board.height)
+                    self.assertEqual(score, player_moves - opponent_moves -
+                                     game_agent.get_distance_to_blanks(board, player) * blank_perc * 0.5)
+
+
+class PerftTest(unittest.TestCase):
+    """Check the move generation of both backends against the stored perft
+    counts of the reference positions.
+    """
+
+    def test_list_backend(self):
+        self.assertEqual(perft.check_backend(isolation.Board, max_depth=5), [])
+
+    def test_bitboard_backend(self):
+        self.assertEqual(perft.check_backend(isolation.BitBoard, max_depth=5), [])
+
+    def test_board_is_restored(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            game = perft.reference_board(board_cls, 7, 7, ((3, 3), (2, 4)))
+            before = (game.hash(), game.to_string())
+            self.assertEqual(perft.perft(game, 4), 1144)
+            self.assertEqual((game.hash(), game.to_string()), before)
+
+    def test_operation_rates(self):
+        samples = perft.sample_positions(isolation.BitBoard, depth=1)
+        rates = perft.operation_rates(isolation.BitBoard, samples, repeat=1)
+        self.assertEqual(sorted(rates), ["apply_move", "copy", "forecast_move", "get_legal_moves"])
+        self.assertTrue(all(rate > 0 for rate in rates.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
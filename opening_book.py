@@ -0,0 +1,195 @@
+"""Build and read opening books for the `AlphaBetaPlayer`.
+
+The builder searches every position of the first plies of the game once,
+deeply, and stores the best move of each position in a compact binary file.
+Positions related by a symmetry of the board (the 8 rotations and
+reflections of a square board, or the 4 reflections of a rectangular one)
+share a single record. The file is read through `mmap`, so a lookup only
+touches the few pages visited by a binary search. Build a book with:
+
+    python opening_book.py --plies 3 --time 1000 --output opening_book.bin
+
+and pass `OpeningBook("opening_book.bin")` as the `opening_book` option of
+an `AlphaBetaPlayer`.
+
+File format (little-endian): a header with the magic bytes b"ISOBOOK1",
+the board width and height, the number of plies covered and the number of
+records, followed by the records sorted by key. Each record holds the
+canonical key of a position (see `Board.canonical_key()`), the cell index of the
+best move in the canonical orientation, the completed search depth and the
+score for the player to move.
+"""
+import argparse
+import mmap
+import struct
+import timeit
+
+from collections import namedtuple
+
+from isolation import Board
+from game_agent import AlphaBetaPlayer, MoveOrderer, custom_score
+
+MAGIC = b"ISOBOOK1"
+HEADER = struct.Struct("<8sBBBxI")  # magic, width, height, plies, record count
+RECORD = struct.Struct("<QBBf")  # canonical key, move cell index, depth, score
+
+BookEntry = namedtuple("BookEntry", ["move", "depth", "score"])
+
+
+def check_board_size(width, height):
+    """Raise a RuntimeError if the canonical keys of a board of the given
+    size (see `Board.canonical_key()`) do not fit in a book record.
+    """
+    cells = width * height
+    if cells + 2 * cells.bit_length() + 1 > 64:
+        raise RuntimeError("Opening books only support boards of up to 51 cells.")
+
+
+class OpeningBook:
+    """Read-only opening book backed by a memory-mapped file.
+
+    Parameters
+    ----------
+    path : str
+        The path of a book file written by `write_book()`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as book_file:
+            self._map = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.plies, self._count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or len(self._map) != HEADER.size + self._count * RECORD.size:
+            self._map.close()
+            raise RuntimeError("{} is not a valid opening book.".format(path))
+
+    def __len__(self):
+        return self._count
+
+    def __getstate__(self):
+        # Players holding a book are sent to the worker processes of the
+        # tournament; every process maps the file again
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def close(self):
+        """Unmap the book file. """
+        self._map.close()
+
+    def lookup(self, game):
+        """Return the `BookEntry` of the position of `game`, with the move
+        mapped back to the orientation of `game`, or None if the position is
+        not in the book.
+        """
+        if game.move_count > self.plies or game.width != self.width or game.height != self.height:
+            return None
+        key, transform = game.canonical_key()
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record_key = struct.unpack_from("<Q", self._map, HEADER.size + mid * RECORD.size)[0]
+            if record_key < key:
+                lo = mid + 1
+            elif record_key > key:
+                hi = mid
+            else:
+                _, cell, depth, score = RECORD.unpack_from(self._map, HEADER.size + mid * RECORD.size)
+                move = game.inverse_transform_move((cell % self.height, cell // self.height), transform)
+                return BookEntry(move, depth, score)
+        return None
+
+
+def write_book(path, records, width, height, plies):
+    """Write `records`, a dictionary of canonical key -> (move cell index in
+    the canonical orientation, depth, score), to a book file.
+    """
+    with open(path, "wb") as book_file:
+        book_file.write(HEADER.pack(MAGIC, width, height, plies, len(records)))
+        for key in sorted(records):
+            cell, depth, score = records[key]
+            book_file.write(RECORD.pack(key, cell, min(depth, 255), score))
+
+
+def opening_positions(plies, width=7, height=7):
+    """Return the move sequences of one representative of every position
+    with at most `plies` moves played, up to symmetry.
+    """
+    positions = []
+    level = [()]
+    seen = set()
+    for ply in range(plies + 1):
+        next_level = []
+        for moves in level:
+            game = Board("Player1", "Player2", width, height)
+            for move in moves:
+                game.apply_move(move)
+            key, _ = game.canonical_key()
+            if key in seen:
+                continue
+            seen.add(key)
+            positions.append(moves)
+            if ply < plies:
+                next_level.extend(moves + (move,) for move in game.get_legal_moves())
+        level = next_level
+    return positions
+
+
+def search_position(moves, width, height, time_limit, depth, score_fn):
+    """Search the position reached by `moves` and return (canonical key,
+    move cell index in the canonical orientation, completed depth, score for
+    the player to move), or None if the player to move has no legal move.
+    """
+    player = AlphaBetaPlayer(search_depth=depth, score_fn=score_fn, in_place=True, tt_size_mb=16,
+                             move_orderer=MoveOrderer(), stats_records=0)
+    players = (player, "Opponent") if len(moves) % 2 == 0 else ("Opponent", player)
+    game = Board(players[0], players[1], width, height)
+    for move in moves:
+        game.apply_move(move)
+    start = 1000 * timeit.default_timer()
+    move = player.get_move(game, lambda: time_limit - (1000 * timeit.default_timer() - start))
+    if move == (-1, -1):
+        return None
+    key, transform = game.canonical_key()
+    row, col = game.transform_move(move, transform)
+    score = player.search_score if player.search_score is not None else 0.
+    return key, row + col * height, player.completed_depth, score
+
+
+def build_book(path, plies=3, width=7, height=7, time_limit=1000, depth=999, score_fn=custom_score, log=print):
+    """Search every opening position with at most `plies` moves played for
+    up to `time_limit` milliseconds (and `depth` plies), and write the book.
+    """
+    check_board_size(width, height)
+    positions = opening_positions(plies, width, height)
+    records = {}
+    for count, moves in enumerate(positions, 1):
+        result = search_position(moves, width, height, time_limit, depth, score_fn)
+        if result is not None:
+            key, cell, completed_depth, score = result
+            records[key] = (cell, completed_depth, score)
+        if log is not None and count % 100 == 0:
+            log("{}/{} positions searched".format(count, len(positions)))
+    write_book(path, records, width, height, plies)
+    return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an opening book for the AlphaBetaPlayer")
+    parser.add_argument("--plies", type=int, default=3, help="book positions with at most this many moves played")
+    parser.add_argument("--time", type=float, default=1000, help="search time per position in milliseconds")
+    parser.add_argument("--depth", type=int, default=999, help="maximum search depth per position")
+    parser.add_argument("--size", type=int, nargs=2, default=(7, 7), metavar=("WIDTH", "HEIGHT"),
+                        help="board size")
+    parser.add_argument("--output", default="opening_book.bin", help="path of the book file")
+    args = parser.parse_args()
+
+    width, height = args.size
+    start = timeit.default_timer()
+    count = build_book(args.output, args.plies, width, height, args.time, args.depth)
+    print("{} positions written to {} in {:.0f}s".format(count, args.output, timeit.default_timer() - start))
+
+
+if __name__ == "__main__":
+    main()
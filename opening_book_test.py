@@ -0,0 +1,97 @@
+"""Unit tests for the opening book builder and reader."""
+
+import os
+import pickle
+import tempfile
+import unittest
+
+import opening_book
+
+from isolation import Board, symmetry_tables
+from game_agent import AlphaBetaPlayer
+from sample_players import improved_score
+
+
+def board_after(moves, width=5, height=5, players=("Player1", "Player2")):
+    game = Board(players[0], players[1], width, height)
+    for move in moves:
+        game.apply_move(move)
+    return game
+
+
+def transform_moves(moves, perm, height=5):
+    cells = (perm[row + col * height] for row, col in moves)
+    return [(cell % height, cell // height) for cell in cells]
+
+
+class OpeningBookTest(unittest.TestCase):
+    """Tiny books are built on a 5x5 board with shallow searches"""
+
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix=".bin")
+        os.close(handle)
+        cls.count = opening_book.build_book(cls.path, plies=2, width=5, height=5, time_limit=float("inf"),
+                                            depth=2, score_fn=improved_score, log=None)
+        cls.book = opening_book.OpeningBook(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.book.close()
+        os.remove(cls.path)
+
+    def test_book_covers_every_opening_position(self):
+        self.assertEqual(len(self.book), self.count)
+        self.assertEqual(self.count, len(opening_book.opening_positions(2, 5, 5)))
+        with open(self.path, "rb") as book_file:
+            self.assertEqual(len(book_file.read()),
+                             opening_book.HEADER.size + self.count * opening_book.RECORD.size)
+
+    def test_lookup_maps_moves_to_the_position(self):
+        # Symmetric positions may map the book move to any equivalent move
+        perms, _, _ = symmetry_tables(5, 5)
+        for moves in ([], [(1, 3)], [(1, 3), (0, 0)]):
+            entry = self.book.lookup(board_after(moves))
+            self.assertIsNotNone(entry)
+            self.assertEqual(entry.depth, 2)
+            expected = board_after(moves + [entry.move]).canonical_key()[0]
+            for perm in perms:
+                moves_t = transform_moves(moves, perm)
+                move = self.book.lookup(board_after(moves_t)).move
+                self.assertTrue(board_after(moves_t).move_is_legal(move))
+                self.assertEqual(board_after(moves_t + [move]).canonical_key()[0], expected)
+
+    def test_positions_outside_the_book(self):
+        self.assertIsNone(self.book.lookup(board_after([(1, 3), (0, 0), (3, 4)])))
+        self.assertIsNone(self.book.lookup(Board("Player1", "Player2", 7, 7)))
+
+    def test_player_plays_book_moves_without_searching(self):
+        player = AlphaBetaPlayer(search_depth=2, score_fn=improved_score, opening_book=self.book)
+        game = board_after([(1, 3)], players=("Player1", player))
+        move = player.get_move(game, lambda: 1000.)
+        self.assertEqual(move, self.book.lookup(game).move)
+        self.assertEqual(player.nodes, 0)
+
+        game = board_after([(1, 3), (0, 0), (3, 4)], players=(player, "Player2"))
+        player.get_move(game, lambda: 1000.)
+        self.assertGreater(player.nodes, 0)
+
+    def test_book_is_picklable(self):
+        book = pickle.loads(pickle.dumps(self.book))
+        game = board_after([(2, 2)])
+        self.assertEqual(book.lookup(game), self.book.lookup(game))
+        book.close()
+
+    def test_invalid_file(self):
+        handle, path = tempfile.mkstemp()
+        os.write(handle, b"not an opening book")
+        os.close(handle)
+        try:
+            with self.assertRaises(RuntimeError):
+                opening_book.OpeningBook(path)
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,6 +8,14 @@ own agent and example heuristic functions.
 
 from random import randint
 
+from isolation import extract_features
+from isolation.batch import child_features
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 def null_score(game, player):
     """This heuristic presumes no knowledge for non-terminal states, and
@@ -65,7 +73,7 @@ def open_move_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    return float(len(game.get_legal_moves(player)))
+    return float(game.mobility(player))
 
 
 def improved_score(game, player):
@@ -89,15 +97,36 @@ def improved_score(game, player):
     float
         The heuristic value of the current game state
     """
-    if game.is_loser(player):
-        return float("-inf")
+    features = extract_features(game, player)
+    if features.utility:
+        return features.utility
+
+    return float(features.player_mobility - features.opponent_mobility)
 
-    if game.is_winner(player):
-        return float("inf")
 
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
-    return float(own_moves - opp_moves)
+def improved_score_batch(game, moves, player):
+    """Vectorized `improved_score` of every child of `game` reached by one of
+    `moves`, the legal moves of the active player. Requires NumPy.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        The parent game state.
+
+    moves : list<(int, int)>
+        Legal moves of the active player of `game`.
+
+    player : hashable
+        One of the objects registered by the game object as a valid player.
+
+    Returns
+    ----------
+    list<float>
+        The heuristic value of every child, in the order of `moves`.
+    """
+    features = child_features(game, moves, player)
+    scores = (features.player_mobility - features.opponent_mobility).astype(float)
+    return np.where(features.utility != 0, features.utility, scores).tolist()
 
 
 def center_score(game, player):
@@ -133,6 +162,32 @@ def center_score(game, player):
     return float((h - y)**2 + (w - x)**2)
 
 
+def center_score_batch(game, moves, player):
+    """Vectorized `center_score` of every child of `game` reached by one of
+    `moves`, the legal moves of the active player. Requires NumPy.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        The parent game state.
+
+    moves : list<(int, int)>
+        Legal moves of the active player of `game`.
+
+    player : hashable
+        One of the objects registered by the game object as a valid player.
+
+    Returns
+    ----------
+    list<float>
+        The heuristic value of every child, in the order of `moves`.
+    """
+    features = child_features(game, moves, player)
+    w, h = game.width, game.height
+    scores = (h - features.player_rows)**2 + (w - features.player_cols)**2
+    return np.where(features.utility != 0, features.utility, scores).tolist()
+
+
 class RandomPlayer():
     """Player that chooses a move randomly."""
     def __init__(self, name=""):
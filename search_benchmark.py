@@ -0,0 +1,124 @@
+"""Compare search configurations of the `AlphaBetaPlayer` by the number of
+nodes searched and the iterative deepening depth reached on the same
+positions under the same per-move time limit as the tournament, and the
+parallel root-split search with the serial alpha-beta search at a fixed
+depth.
+
+Run it with:
+
+    python search_benchmark.py [--workers N] [--depth D]
+"""
+import argparse
+import os
+import random
+import timeit
+
+from isolation import Board
+from sample_players import improved_score
+from game_agent import AlphaBetaPlayer, MoveOrderer
+from tournament import TIME_LIMIT
+
+NUM_POSITIONS = 20
+
+# name -> AlphaBetaPlayer options; a fresh MoveOrderer is added to each player
+CONFIGURATIONS = [
+    ("Alpha-beta", dict()),
+    ("PVS", dict(pvs=True)),
+    ("Aspiration", dict(aspiration_window=1.)),
+    ("PVS+Aspiration", dict(pvs=True, aspiration_window=1.)),
+]
+
+
+def random_positions(count, seed=0, plies=4):
+    """Return `count` lists of moves that play random openings of `plies`
+    plies.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = Board("Player1", "Player2")
+        moves = []
+        for _ in range(plies):
+            legal_moves = game.get_legal_moves()
+            if not legal_moves:
+                break
+            moves.append(rng.choice(legal_moves))
+            game.apply_move(moves[-1])
+        if len(moves) == plies and game.get_legal_moves():
+            positions.append(moves)
+    return positions
+
+
+def run_configuration(options, positions, time_limit=TIME_LIMIT):
+    """Search every position with a player built with `options` and return
+    the (total nodes, average depth reached) of the searches, as counted by
+    the player's own search statistics.
+    """
+    nodes = 0
+    depths = 0
+    for moves in positions:
+        player = AlphaBetaPlayer(score_fn=improved_score, in_place=True, move_orderer=MoveOrderer(), **options)
+        game = Board(player, "Opponent")
+        for move in moves:
+            game.apply_move(move)
+        start = 1000 * timeit.default_timer()
+        player.get_move(game, lambda: time_limit - (1000 * timeit.default_timer() - start))
+        nodes += player.nodes
+        depths += player.completed_depth
+    return nodes, depths / float(len(positions))
+
+
+def fixed_depth_search(positions, depth, workers):
+    """Search every position to `depth` plies without a time limit, in
+    parallel with `workers` processes if workers > 1, and return the (total
+    time in seconds, total nodes) of the searches. The process pool is
+    started before the timer.
+    """
+    player = AlphaBetaPlayer(score_fn=improved_score, in_place=True, move_orderer=MoveOrderer(),
+                             parallel_workers=workers, parallel_min_depth=1)
+    player.time_left = lambda: float("inf")
+    elapsed = 0.
+    nodes = 0
+    try:
+        for index, moves in enumerate(positions):
+            game = Board(player, "Opponent")
+            for move in moves:
+                game.apply_move(move)
+            if index == 0:
+                player.search(game, 1)
+            player.nodes = 0
+            start = timeit.default_timer()
+            player.search(game, depth)
+            elapsed += timeit.default_timer() - start
+            nodes += player.nodes
+    finally:
+        player.close()
+    return elapsed, nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the AlphaBetaPlayer search options")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="processes of the parallel search (default: the number of CPUs)")
+    parser.add_argument("--depth", type=int, default=6, help="depth of the parallel search comparison")
+    args = parser.parse_args()
+
+    positions = random_positions(NUM_POSITIONS)
+    print("{} positions, {} ms per move".format(len(positions), TIME_LIMIT))
+    print("{:<16}{:>10}{:>12}".format("Configuration", "Nodes", "Avg depth"))
+    for name, options in CONFIGURATIONS:
+        nodes, depth = run_configuration(options, positions)
+        print("{:<16}{:>10}{:>12.2f}".format(name, nodes, depth))
+
+    print("\nDepth {} searches, {} workers".format(args.depth, args.workers))
+    serial_time, serial_nodes = fixed_depth_search(positions, args.depth, 1)
+    parallel_time, parallel_nodes = fixed_depth_search(positions, args.depth, args.workers)
+    print("{:<16}{:>10}{:>12}".format("Search", "Nodes", "Time (s)"))
+    print("{:<16}{:>10}{:>12.2f}".format("Serial", serial_nodes, serial_time))
+    print("{:<16}{:>10}{:>12.2f}".format("Parallel", parallel_nodes, parallel_time))
+    print("Speedup {:.2f}x, search overhead {:+.1%}".format(
+        serial_time / parallel_time, parallel_nodes / float(serial_nodes) - 1))
+
+
+if __name__ == "__main__":
+    main()
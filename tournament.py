@@ -11,21 +11,34 @@ players, and the players play each match twice -- once as the first player and
 once as the second player.  Randomizing the openings and switching the player
 order corrects for imbalances due to both starting position and initiative.
 """
+import argparse
 import itertools
+import math
 import random
 import warnings
 
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
+from game_records import GameRecord, GameRecordWriter
 from isolation import Board
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
-from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
+from game_agent import (MinimaxPlayer, AlphaBetaPlayer, MCTSPlayer, custom_score,
                         custom_score_2, custom_score_3)
 
 NUM_MATCHES = 20  # number of matches against each opponent
 TIME_LIMIT = 50  # number of milliseconds before timeout (orig=150)
 MAX_DEPTH = 5
+SPRT_BATCH = 10  # number of game pairs played between two checks of the SPRT
+# Pairs added to every outcome count of the SPRT statistics, so that a few
+# one-sided pairs keep a finite Elo and a variance that does not end the test
+SPRT_PRIOR = 0.5
+
+# Search options shared by every minimax based agent in the tournament; the
+# shuffled root moves keep the games from the same opening apart, and the seed
+# of every game keeps them reproducible
+SEARCH_OPTIONS = dict(in_place=True, randomize_root=True)
 
 DESCRIPTION = """
 This script evaluates the performance of the custom_score evaluation function
@@ -36,54 +49,126 @@ Iterative Deepening and the custom_score function defined in game_agent.py.
 Agent = namedtuple("Agent", ["player", "name"])
 
 
-def play_round(cpu_agent, test_agents, win_counts, num_matches):
+SPRTResult = namedtuple("SPRTResult", ["pairs", "score", "elo", "elo_lower", "elo_upper", "llr", "decision"])
+
+GameResult = namedtuple("GameResult", ["cpu_index", "test_index", "cpu_first", "opening", "cpu_won", "loser_name",
+                                       "termination", "move_history", "move_times"])
+
+# Agents of the tournament in the current process, set by init_worker()
+_worker_agents = None
+
+
+def make_opening(rng, width=7, height=7):
+    """Return a random first move and response to start every game of a
+    match with.
+    """
+    game = Board("Player1", "Player2", width, height)
+    opening = []
+    for _ in range(2):
+        opening.append(rng.choice(game.get_legal_moves()))
+        game.apply_move(opening[-1])
+    return opening
+
+
+def play_game(cpu_agent, test_agent, cpu_first, opening, seed, time_limit=TIME_LIMIT):
+    """Play a single game between the cpu agent and a test agent from the
+    given opening, with the global random generator seeded with `seed`. The
+    agents draw their random moves from the global generator, whose state
+    is restored after the game.
+
+    Returns
+    -------
+    (bool, str, str, list<[int, int]>, list<float>)
+        Whether the cpu agent won, the name of the losing agent, the reason
+        for the end of the game, the move history after the opening and the
+        time of every move in milliseconds.
+    """
+    players = (cpu_agent, test_agent) if cpu_first else (test_agent, cpu_agent)
+    game = Board(players[0].player, players[1].player)
+    for move in opening:
+        game.apply_move(move)
+    move_times = []
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        winner, move_history, termination = game.play(time_limit=time_limit, move_times=move_times)
+    finally:
+        random.setstate(state)
+    loser = cpu_agent if winner != cpu_agent.player else test_agent
+    return winner == cpu_agent.player, loser.name, termination, move_history, move_times
+
+
+def init_worker(cpu_agents, test_agents):
+    """Register the agents of the tournament in the current process; every
+    worker process of the pool gets its own copy of the agents.
+    """
+    global _worker_agents
+    _worker_agents = (cpu_agents, test_agents)
+
+
+def play_task(task):
+    """Play the game described by a task tuple (cpu agent index, test agent
+    index, cpu first, opening, seed, time limit) with the agents registered by
+    init_worker().
+    """
+    cpu_index, test_index, cpu_first, opening, seed, time_limit = task
+    cpu_agents, test_agents = _worker_agents
+    result = play_game(cpu_agents[cpu_index], test_agents[test_index], cpu_first, opening, seed, time_limit)
+    return GameResult(cpu_index, test_index, cpu_first, opening, *result)
+
+
+def play_round(cpu_index, test_agents, num_matches, rng, executor=None, time_limit=TIME_LIMIT):
     """Compare the test agents to the cpu agent in "fair" matches.
 
     "Fair" matches use random starting locations and force the agents to
     play as both first and second player to control for advantages resulting
     from choosing better opening moves or having first initiative to move.
-    """
-    timeout_count = 0
-    forfeit_count = 0
-    last_lost_game_moves = []
-    for _ in range(num_matches):
-
-        games = sum([[Board(cpu_agent.player, agent.player),
-                      Board(agent.player, cpu_agent.player)]
-                    for agent in test_agents], [])
 
-        # initialize all games with a random move and response
-        for _ in range(2):
-            move = random.choice(games[0].get_legal_moves())
-            for game in games:
-                game.apply_move(move)
+    All the games of a match start from the same opening. The games are
+    played by `executor` if one is given, or else one after another in this
+    process; the openings and game seeds only depend on `rng`, so both give
+    identical results for deterministic agents.
 
-        # play all games and tally the results
-        count = 0
-        for game in games:
-            winner, move_hist, termination = game.play(time_limit=TIME_LIMIT)
-            win_counts[winner] += 1
-            if winner.name != "AB_Custom" and game.active_player.name == "AB_Custom":
-                last_lost_game_moves.append((termination, move_hist))
-            count += 1
+    Returns
+    -------
+    iterator<GameResult>
+        The results of every game, in the order the games were created,
+        produced as the games finish.
+    """
+    tasks = []
+    for _ in range(num_matches):
+        opening = make_opening(rng)
+        for test_index in range(len(test_agents)):
+            for cpu_first in (True, False):
+                tasks.append((cpu_index, test_index, cpu_first, opening, rng.getrandbits(32), time_limit))
 
-        if termination == "timeout":
-            timeout_count += 1
-        elif winner not in test_agents and termination == "forfeit":
-            forfeit_count += 1
+    if executor is None:
+        return map(play_task, tasks)
+    return executor.map(play_task, tasks)
 
-    return timeout_count, forfeit_count, last_lost_game_moves
 
+def game_record(result, cpu_agents, test_agents):
+    """Return the `GameRecord` of a game result. """
+    names = [cpu_agents[result.cpu_index].name, test_agents[result.test_index].name]
+    if not result.cpu_first:
+        names.reverse()
+    winner = 1 if result.cpu_won == result.cpu_first else 2
+    return GameRecord(names[0], names[1], winner, result.opening, result.move_history, result.termination,
+                      result.move_times)
 
-def update(total_wins, wins):
-    for player in total_wins:
-        total_wins[player] += wins[player]
-    return total_wins
 
+def play_matches(cpu_agents, test_agents, num_matches, workers=1, seed=None, time_limit=TIME_LIMIT,
+                 record_path=None):
+    """Play matches between the test agent and each cpu_agent individually.
 
-def play_matches(cpu_agents, test_agents, num_matches):
-    """Play matches between the test agent and each cpu_agent individually. """
-    total_wins = {agent.player: 0 for agent in test_agents}
+    Games are spread over a pool of `workers` processes when workers > 1.
+    With a `record_path`, every game is appended to that game record file
+    (see `game_records`) as it finishes, and the games lost by AB_Custom are
+    listed by record number instead of by move history.
+    Returns the number of wins of every test agent, by agent name.
+    """
+    rng = random.Random(seed)
+    total_wins = {agent.name: 0 for agent in test_agents}
     total_timeouts = 0.
     total_forfeits = 0.
     total_matches = 2 * num_matches * len(cpu_agents)
@@ -94,31 +179,52 @@ def play_matches(cpu_agents, test_agents, num_matches):
     print("{:^9}{:^13} {:^5}| {:^5} {:^5}| {:^5} {:^5}| {:^5} {:^5}| {:^5}"
           .format("", "", *(["Won", "Lost"] * 4)))
 
-    for idx, agent in enumerate(cpu_agents):
-        wins = {test_agents[0].player: 0,
-                test_agents[1].player: 0,
-                test_agents[2].player: 0,
-                test_agents[3].player: 0,
-                agent.player: 0}
-
-        print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
-
-        timeout_count, forfeit_count, move_hist = play_round(agent, test_agents, wins, num_matches)
-        total_timeouts += timeout_count
-        total_forfeits += forfeit_count
-        total_wins = update(total_wins, wins)
-        _total = 2 * num_matches
-        round_totals = sum([[wins[agent.player], _total - wins[agent.player]]
-                            for agent in test_agents], [])
-        print(" {:^5}| {:^5} {:^5}| {:^5} {:^5}| {:^5} {:^5}| {:^5}"
-              .format(*round_totals))
-        for hist in move_hist:
-            print("\t\t\t\t{} {}".format(hist[0], hist[1]))
+    writer = GameRecordWriter(record_path) if record_path is not None else None
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                       initargs=(cpu_agents, test_agents))
+    else:
+        init_worker(cpu_agents, test_agents)
+
+    try:
+        for idx, agent in enumerate(cpu_agents):
+            print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
+
+            wins = [0] * len(test_agents)
+            lost_games = []
+            for result in play_round(idx, test_agents, num_matches, rng, executor, time_limit):
+                if not result.cpu_won:
+                    wins[result.test_index] += 1
+                elif result.termination == "forfeit":
+                    total_forfeits += 1
+                if result.termination == "timeout":
+                    total_timeouts += 1
+                game = result.move_history
+                if writer is not None:
+                    writer.write(game_record(result, cpu_agents, test_agents))
+                    game = "game #{}".format(writer.count - 1)
+                if result.loser_name == "AB_Custom":
+                    lost_games.append((result.termination, game))
+
+            _total = 2 * num_matches
+            round_totals = sum([[wins[i], _total - wins[i]] for i in range(len(test_agents))], [])
+            for i, test_agent in enumerate(test_agents):
+                total_wins[test_agent.name] += wins[i]
+            print(" {:^5}| {:^5} {:^5}| {:^5} {:^5}| {:^5} {:^5}| {:^5}"
+                  .format(*round_totals))
+            for hist in lost_games:
+                print("\t\t\t\t{} {}".format(hist[0], hist[1]))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if writer is not None:
+            writer.close()
 
     print("-" * 74)
     print("{:^9}{:^13}{:^13}{:^13}{:^13}{:^13}\n".format(
         "", "Win Rate:",
-        *["{:.1f}%".format(100 * total_wins[a.player] / total_matches)
+        *["{:.1f}%".format(100 * total_wins[a.name] / total_matches)
           for a in test_agents]
     ))
 
@@ -131,33 +237,203 @@ def play_matches(cpu_agents, test_agents, num_matches):
         print(("\nYour ID search forfeited {} games while there were still " +
                "legal moves available to play.\n").format(total_forfeits))
 
+    return total_wins
+
+
+def elo(score):
+    """Return the Elo difference that gives the expected `score` (between 0
+    and 1, exclusive) to the stronger player.
+    """
+    return -400 * math.log10(1 / score - 1)
+
+
+def pair_statistics(counts):
+    """Return the (number of pairs, mean, variance) of the score of a game
+    pair, given the `counts` of pairs scored 0, 1/2 and 1, after adding
+    `SPRT_PRIOR` pairs to every count. The LLR and the Elo estimates are all
+    computed from these smoothed statistics.
+    """
+    counts = [count + SPRT_PRIOR for count in counts]
+    total = sum(counts)
+    mean = (0.5 * counts[1] + counts[2]) / total
+    variance = (counts[0] * mean ** 2 + counts[1] * (0.5 - mean) ** 2 + counts[2] * (1 - mean) ** 2) / total
+    return total, mean, variance
+
+
+def sprt_llr(counts, elo0, elo1):
+    """Return the generalized SPRT log-likelihood ratio of the hypothesis
+    that the Elo difference is `elo1` against the hypothesis that it is
+    `elo0`, from the `counts` of game pairs scored 0, 1/2 and 1 (normal
+    approximation of the score of a pair, see `pair_statistics()`).
+    """
+    pairs, mean, variance = pair_statistics(counts)
+    score0, score1 = [1 / (1 + 10 ** (-e / 400.)) for e in (elo0, elo1)]
+    return pairs * (score1 - score0) * (2 * mean - score0 - score1) / (2 * variance)
+
+
+def elo_interval(counts, z=1.96):
+    """Return the Elo difference estimated from the `counts` of game pairs
+    scored 0, 1/2 and 1, and the bounds of its confidence interval for the
+    normal quantile `z` (95% by default), see `pair_statistics()`.
+    """
+    pairs, mean, variance = pair_statistics(counts)
+    margin = z * math.sqrt(variance / pairs)
+    lower = elo(mean - margin) if mean - margin > 0 else float("-inf")
+    upper = elo(mean + margin) if mean + margin < 1 else float("inf")
+    return elo(mean), lower, upper
+
+
+def play_sprt(agent, baseline, elo0=0., elo1=20., alpha=0.05, beta=0.05, max_pairs=1000, workers=1, seed=None,
+              time_limit=TIME_LIMIT, batch_pairs=SPRT_BATCH, record_path=None):
+    """Play pairs of games between `agent` and `baseline` from the same
+    opening, with each agent playing first once, until a sequential
+    probability ratio test decides between the hypotheses that the Elo
+    difference of `agent` over `baseline` is `elo0` (H0) or `elo1` (H1)
+    with the error rates `alpha` and `beta`, or `max_pairs` pairs were
+    played.
+
+    The pairs are played in batches of `batch_pairs`, spread over a pool of
+    `workers` processes when workers > 1, and the test is checked after
+    every batch. With a `record_path`, every game is appended to that game
+    record file. Prints the Elo estimate with its 95% confidence interval
+    after every batch.
+
+    Returns
+    -------
+    SPRTResult
+        The number of pairs played, the observed score of `agent`, the Elo
+        estimate and its confidence interval, the final log-likelihood
+        ratio, and the decision: "H1", "H0" or None if the test did not
+        conclude. The Elo and the LLR come from the smoothed statistics of
+        `pair_statistics()`; the score is the fraction of points won.
+    """
+    if max_pairs < 1 or batch_pairs < 1:
+        raise RuntimeError("The SPRT needs max_pairs and batch_pairs of at least 1.")
+    lower_bound = math.log(beta / (1 - alpha))
+    upper_bound = math.log((1 - beta) / alpha)
+    rng = random.Random(seed)
+    counts = [0, 0, 0]  # pairs scored 0, 1/2 and 1 by agent
+    score = lambda: (0.5 * counts[1] + counts[2]) / sum(counts)
+    decision = None
+    llr = 0.
+
+    print("\nSPRT {} vs {}: H0 Elo {:+g}, H1 Elo {:+g}, alpha {:g}, beta {:g}, LLR bounds [{:.2f}, {:.2f}]".format(
+        agent.name, baseline.name, elo0, elo1, alpha, beta, lower_bound, upper_bound))
+
+    writer = GameRecordWriter(record_path) if record_path is not None else None
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=([baseline], [agent]))
+    else:
+        init_worker([baseline], [agent])
+
+    try:
+        while decision is None and sum(counts) < max_pairs:
+            batch = min(batch_pairs, max_pairs - sum(counts))
+            # The games of a pair come out of play_round one after the other
+            pair_wins = 0
+            for number, result in enumerate(play_round(0, [agent], batch, rng, executor, time_limit)):
+                if writer is not None:
+                    writer.write(game_record(result, [baseline], [agent]))
+                pair_wins += not result.cpu_won
+                if number % 2 == 1:
+                    counts[pair_wins] += 1
+                    pair_wins = 0
+
+            llr = sprt_llr(counts, elo0, elo1)
+            if llr >= upper_bound:
+                decision = "H1"
+            elif llr <= lower_bound:
+                decision = "H0"
+            print("{:>6} pairs  score {:5.1f}%  Elo {:+7.1f} [{:+.1f}, {:+.1f}]  LLR {:+.2f}".format(
+                sum(counts), 100 * score(), *elo_interval(counts), llr), flush=True)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if writer is not None:
+            writer.close()
+
+    pairs = sum(counts)
+    print({"H1": "H1 accepted: {} is stronger by about {:+g} Elo".format(agent.name, elo1),
+           "H0": "H0 accepted: {} is not stronger than {:+g} Elo".format(agent.name, elo0),
+           None: "No decision after {} pairs".format(pairs)}[decision])
+    return SPRTResult(pairs, score(), *elo_interval(counts), llr=llr, decision=decision)
+
+
+def search_rates(agents):
+    """Return a line per agent with the nodes per second of the minimax
+    based agents and the playouts per second of the MCTS agents, measured
+    over the games played in this process.
+    """
+    lines = []
+    for agent in agents:
+        player = agent.player
+        if isinstance(player, MCTSPlayer) and player.total_playouts:
+            lines.append("{:>13}: {:.0f} playouts/sec".format(agent.name, player.playouts_per_second()))
+        elif getattr(player, "stats", None) is not None and player.stats.records:
+            lines.append("{:>13}: {:.0f} nodes/sec".format(agent.name, player.stats.summary()["nps"]))
+    return lines
+
 
 def main():
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes to play the games in parallel")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed of the openings and of every game, for reproducible tournaments")
+    parser.add_argument("--mcts", action="store_true",
+                        help="replace AB_Custom_3 by an MCTS agent with the same time budget")
+    parser.add_argument("--record", default=None, metavar="PATH",
+                        help="append every game to this game record file")
+    parser.add_argument("--sprt", action="store_true",
+                        help="play AB_Custom against AB_Improved until a sequential probability ratio test concludes, "
+                             "instead of the round-robin tournament")
+    parser.add_argument("--elo0", type=float, default=0., help="Elo difference of the SPRT null hypothesis")
+    parser.add_argument("--elo1", type=float, default=20., help="Elo difference of the SPRT alternative hypothesis")
+    parser.add_argument("--alpha", type=float, default=0.05, help="SPRT probability of a false H1")
+    parser.add_argument("--beta", type=float, default=0.05, help="SPRT probability of a false H0")
+    parser.add_argument("--max-pairs", type=int, default=1000, help="game pairs played before an SPRT gives up")
+    args = parser.parse_args()
+
     # Define two agents to compare -- these agents will play from the same
     # starting position against the same adversaries in the tournament
     test_agents = [
-        Agent(AlphaBetaPlayer(search_depth=MAX_DEPTH, score_fn=improved_score), "AB_Improved"),
-        Agent(AlphaBetaPlayer(search_depth=MAX_DEPTH, score_fn=custom_score, name="AB_Custom", info_log=False), "AB_Custom"),
-        Agent(AlphaBetaPlayer(search_depth=MAX_DEPTH, score_fn=custom_score_2), "AB_Custom_2"),
-        Agent(AlphaBetaPlayer(search_depth=MAX_DEPTH, score_fn=custom_score_3), "AB_Custom_3")
+        Agent(AlphaBetaPlayer(search_depth=MAX_DEPTH, score_fn=improved_score, **SEARCH_OPTIONS), "AB_Improved"),
+        Agent(AlphaBetaPlayer(search_depth=MAX_DEPTH, score_fn=custom_score, name="AB_Custom", info_log=False,
+                               **SEARCH_OPTIONS), "AB_Custom"),
+        Agent(AlphaBetaPlayer(search_depth=MAX_DEPTH, score_fn=custom_score_2, **SEARCH_OPTIONS), "AB_Custom_2"),
+        Agent(AlphaBetaPlayer(search_depth=MAX_DEPTH, score_fn=custom_score_3, **SEARCH_OPTIONS), "AB_Custom_3")
     ]
+    if args.mcts:
+        test_agents[3] = Agent(MCTSPlayer(), "MCTS")
+
+    if args.sprt:
+        if args.max_pairs < 1:
+            parser.error("--max-pairs must be at least 1")
+        play_sprt(test_agents[1], test_agents[0], args.elo0, args.elo1, args.alpha, args.beta, args.max_pairs,
+                  args.workers, args.seed, record_path=args.record)
+        return
 
     # Define a collection of agents to compete against the test agents
     cpu_agents = [
         Agent(RandomPlayer(), "Random"),
-        Agent(MinimaxPlayer(search_depth=MAX_DEPTH, score_fn=open_move_score), "MM_Open"),
-        Agent(MinimaxPlayer(search_depth=MAX_DEPTH, score_fn=center_score), "MM_Center"),
-        Agent(MinimaxPlayer(search_depth=MAX_DEPTH, score_fn=improved_score), "MM_Improved"),
-        Agent(AlphaBetaPlayer(search_depth=MAX_DEPTH, score_fn=open_move_score), "AB_Open"),
-        Agent(AlphaBetaPlayer(search_depth=MAX_DEPTH, score_fn=center_score), "AB_Center"),
-        Agent(AlphaBetaPlayer(search_depth=MAX_DEPTH, score_fn=improved_score), "AB_Improved")
+        Agent(MinimaxPlayer(search_depth=MAX_DEPTH, score_fn=open_move_score, **SEARCH_OPTIONS), "MM_Open"),
+        Agent(MinimaxPlayer(search_depth=MAX_DEPTH, score_fn=center_score, **SEARCH_OPTIONS), "MM_Center"),
+        Agent(MinimaxPlayer(search_depth=MAX_DEPTH, score_fn=improved_score, **SEARCH_OPTIONS), "MM_Improved"),
+        Agent(AlphaBetaPlayer(search_depth=MAX_DEPTH, score_fn=open_move_score, **SEARCH_OPTIONS), "AB_Open"),
+        Agent(AlphaBetaPlayer(search_depth=MAX_DEPTH, score_fn=center_score, **SEARCH_OPTIONS), "AB_Center"),
+        Agent(AlphaBetaPlayer(search_depth=MAX_DEPTH, score_fn=improved_score, **SEARCH_OPTIONS), "AB_Improved")
     ]
 
     print(DESCRIPTION)
     print("{:^74}".format("*************************"))
     print("{:^74}".format("Playing Matches"))
     print("{:^74}".format("*************************"))
-    play_matches(cpu_agents, test_agents, NUM_MATCHES)
+    play_matches(cpu_agents, test_agents, NUM_MATCHES, args.workers, args.seed, record_path=args.record)
+
+    # The agents only play in this process without workers
+    for line in search_rates(test_agents):
+        print(line)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+"""Unit tests for the tournament script."""
+
+import io
+import unittest
+
+from contextlib import redirect_stdout
+
+import tournament
+
+from game_agent import AlphaBetaPlayer, MinimaxPlayer
+from sample_players import RandomPlayer, improved_score, open_move_score
+
+
+def make_agents():
+    test_agents = [
+        tournament.Agent(AlphaBetaPlayer(search_depth=2, score_fn=improved_score), "AB_Improved"),
+        tournament.Agent(AlphaBetaPlayer(search_depth=1, score_fn=open_move_score, name="AB_Custom"), "AB_Custom"),
+        tournament.Agent(MinimaxPlayer(search_depth=1, score_fn=improved_score), "MM_Improved"),
+        tournament.Agent(RandomPlayer(), "Random_2"),
+    ]
+    cpu_agents = [
+        tournament.Agent(RandomPlayer(), "Random"),
+        tournament.Agent(AlphaBetaPlayer(search_depth=1, score_fn=improved_score), "AB_Improved"),
+    ]
+    return cpu_agents, test_agents
+
+
+class ParallelTournamentTest(unittest.TestCase):
+    """Seeded tournaments give the same results with and without workers"""
+
+    def run_tournament(self, workers, seed):
+        cpu_agents, test_agents = make_agents()
+        output = io.StringIO()
+        with redirect_stdout(output):
+            wins = tournament.play_matches(cpu_agents, test_agents, 2, workers=workers, seed=seed,
+                                           time_limit=float("inf"))
+        return wins, output.getvalue()
+
+    def test_openings_are_paired(self):
+        rng = tournament.random.Random(3)
+        cpu_agents, test_agents = make_agents()
+        tournament.init_worker(cpu_agents, test_agents)
+        results = list(tournament.play_round(1, test_agents, 2, rng, time_limit=float("inf")))
+        self.assertEqual(len(results), 4 * len(test_agents))
+        for match in (results[:8], results[8:]):
+            self.assertEqual(len(set(tuple(r.opening) for r in match)), 1)
+            self.assertEqual(sorted((r.test_index, r.cpu_index) for r in match),
+                             sorted([(i, 1) for i in range(4)] * 2))
+        self.assertNotEqual(results[0].opening, results[8].opening)
+
+    def test_games_keep_the_global_random_state(self):
+        cpu_agents, test_agents = make_agents()
+        tournament.random.seed(11)
+        expected = tournament.random.random()
+        tournament.random.seed(11)
+        results = [tournament.play_game(cpu_agents[0], test_agents[3], True, [(3, 3), (2, 4)], 5, float("inf"))
+                   for _ in range(2)]
+        self.assertEqual(tournament.random.random(), expected)
+        # Same game apart from the move times
+        self.assertEqual(results[0][:4], results[1][:4])
+
+    def test_search_agents_vary_with_the_seed(self):
+        agents = [tournament.Agent(AlphaBetaPlayer(search_depth=2, score_fn=improved_score,
+                                                   **tournament.SEARCH_OPTIONS), name)
+                  for name in ("AB_Improved", "AB_Custom")]
+        games = [tournament.play_game(agents[0], agents[1], True, [(3, 3), (2, 4)], seed, float("inf"))[:4]
+                 for seed in (1, 1, 2, 3)]
+        self.assertEqual(games[0], games[1])
+        self.assertGreater(len({tuple(map(tuple, game[3])) for game in games}), 1)
+
+    def test_parallel_matches_serial(self):
+        serial = self.run_tournament(1, seed=7)
+        parallel = self.run_tournament(2, seed=7)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(sorted(serial[0]), ["AB_Custom", "AB_Improved", "MM_Improved", "Random_2"])
+
+
+class SPRTTest(unittest.TestCase):
+    """Elo estimates and early stopping of the sequential test"""
+
+    def test_elo(self):
+        self.assertEqual(tournament.elo(0.5), 0.)
+        self.assertAlmostEqual(tournament.elo(0.75), 190.85, places=2)
+        self.assertAlmostEqual(tournament.elo(0.25), -190.85, places=2)
+
+    def test_statistics(self):
+        pairs, mean, variance = tournament.pair_statistics([10, 20, 10])
+        self.assertEqual(pairs, 40 + 3 * tournament.SPRT_PRIOR)
+        self.assertAlmostEqual(mean, 0.5, places=4)
+        self.assertAlmostEqual(variance, 0.125, places=2)
+        estimate, lower, upper = tournament.elo_interval([10, 20, 10])
+        self.assertAlmostEqual(estimate, 0., places=2)
+        self.assertAlmostEqual(lower, -upper, places=2)
+        self.assertLess(lower, -50)
+
+    def test_llr(self):
+        self.assertGreater(tournament.sprt_llr([5, 20, 35], 0, 20), 2.94)
+        self.assertLess(tournament.sprt_llr([30, 40, 30], 0, 20), 0)
+        self.assertAlmostEqual(tournament.sprt_llr([30, 40, 30], 0, 20), -tournament.sprt_llr([30, 40, 30], -20, 0))
+        self.assertLess(tournament.sprt_llr([0, 40, 0], 0, 20), 0)
+
+    def test_stops_early(self):
+        agent = tournament.Agent(AlphaBetaPlayer(search_depth=2, score_fn=improved_score), "AB_Improved")
+        baseline = tournament.Agent(RandomPlayer(), "Random")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            result = tournament.play_sprt(agent, baseline, 0, 100, max_pairs=100, seed=1, time_limit=float("inf"),
+                                          batch_pairs=4)
+        self.assertEqual(result.decision, "H1")
+        self.assertLess(result.pairs, 100)
+        self.assertEqual(result.pairs % 4, 0)
+        self.assertGreater(result.elo, 0)
+        self.assertLess(result.elo_lower, result.elo)
+        self.assertIn("H1 accepted", output.getvalue())
+
+        with redirect_stdout(output):
+            result = tournament.play_sprt(agent, baseline, 0, 100, max_pairs=2, seed=1, time_limit=float("inf"),
+                                          batch_pairs=4)
+        self.assertEqual((result.pairs, result.decision), (2, None))
+        self.assertEqual(result.score, 1.)
+        self.assertIn("score 100.0%", output.getvalue())
+        self.assertIn("No decision after 2 pairs", output.getvalue())
+        with self.assertRaises(RuntimeError):
+            tournament.play_sprt(agent, baseline, max_pairs=0)
+
+
+class SearchRatesTest(unittest.TestCase):
+
+    def test_rates_of_agents_that_played(self):
+        agents = [tournament.Agent(tournament.MCTSPlayer(max_playouts=50), "MCTS"),
+                  tournament.Agent(AlphaBetaPlayer(search_depth=2, score_fn=improved_score), "AB_Improved"),
+                  tournament.Agent(RandomPlayer(), "Random")]
+        self.assertEqual(tournament.search_rates(agents), [])
+        game = tournament.Board(agents[0].player, agents[1].player)
+        for _ in range(4):
+            game.apply_move(game.active_player.get_move(game, lambda: 1e3))
+        lines = tournament.search_rates(agents)
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].endswith("playouts/sec"))
+        self.assertTrue(lines[1].endswith("nodes/sec"))
+
+
+if __name__ == '__main__':
+    unittest.main()